@@ -4,6 +4,7 @@
 создаём объект игры и запускаем главный цикл."""
 from __future__ import annotations
 
+import argparse
 import sys
 
 try:
@@ -13,9 +14,19 @@ except Exception as e:  # pragma: no cover
 
 from zuma import config as cfg
 from zuma.game import Game
+from zuma.loop import FixedStep, run_game_frame
+from zuma.perf import Profiler
+from zuma.replay import Recorder, encode
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Marble Run")
+    parser.add_argument("--record", metavar="PATH",
+                        help="write a replay of the session to PATH")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time frame stages and write a .csv/.json report")
+    args = parser.parse_args()
+
     pygame.init()
     pygame.display.set_caption("Marble Run — Spiral Shooter")
     screen = pygame.display.set_mode((cfg.WIDTH, cfg.HEIGHT))
@@ -23,21 +34,37 @@ def main() -> None:
 
     session = Game(screen)
     session.state = "menu"
+    recorder = Recorder(session) if args.record else None
+    profiler = Profiler() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+
+    # Симуляция идёт фиксированными шагами, кадры только рисуют
+    sim = FixedStep()
 
     running = True
-    while running:
-        dt = clock.tick(cfg.FPS) / 1000.0
-        events = pygame.event.get()
+    try:
+        while running:
+            dt = clock.tick(cfg.FPS) / 1000.0
+            events = pygame.event.get()
 
-        for ev in events:
-            if ev.type == pygame.QUIT:
-                running = False
+            for ev in events:
+                if ev.type == pygame.QUIT:
+                    running = False
 
-        session.handle_events(events)
-        session.update(float(dt))
-        session.draw(screen)
+            session.handle_events(events)
+            alpha = run_game_frame(session, sim, float(dt))
+            session.draw(screen, alpha=alpha)
 
-        pygame.display.flip()
+            pygame.display.flip()
+    finally:
+        # реплей сохраняется и при выходе через SystemExit
+        if recorder is not None:
+            with open(args.record, "wb") as f:
+                f.write(encode(recorder.finish()))
+        if profiler is not None:
+            profiler.disable()
+            profiler.export(args.profile)
 
     pygame.quit()
     sys.exit(0)
@@ -0,0 +1,41 @@
+﻿import unittest
+
+from zuma import balance
+from zuma.env import ZumaEnv
+
+
+class TestBalance(unittest.TestCase):
+    def test_report_does_not_depend_on_pool(self):
+        serial = balance.run([1], 4, seed=5, workers=1, chunk=3)
+        pooled = balance.run([1], 4, seed=5, workers=2, chunk=1)
+        self.assertEqual(serial, pooled)
+        self.assertEqual(serial[1]["games"], 4)
+
+    def test_summarize(self):
+        report = balance.summarize(
+            [(True, 60.0, 700), (False, 10.0, 100), (False, 20.0, 300)]
+            )
+        self.assertAlmostEqual(report["win_rate"], 1 / 3)
+        self.assertEqual(report["time_to_game_over"]["count"], 2)
+        self.assertAlmostEqual(report["time_to_game_over"]["p50"], 15.0)
+        self.assertAlmostEqual(report["score"]["p50"], 300.0)
+
+    def test_game_seeds_are_distinct(self):
+        seeds = {balance.game_seed(0, lvl, i) for lvl in (1, 2) for i in range(100)}
+        self.assertEqual(len(seeds), 200)
+
+    def test_policy_does_not_touch_chain(self):
+        env = ZumaEnv()
+        env.reset(2)
+        chain = env.game.level.chain
+        env.game.frog.current_ball_color = (1, 2, 3)
+        env.game.frog.next_ball_color = (4, 5, 6)
+        palette, version = list(chain.palette), chain.version
+        # целей нет: шар уходит в хвост цепочки
+        self.assertEqual(balance.scripted_policy(env)[1:], (True, False))
+        self.assertEqual(chain.palette, palette)
+        self.assertEqual(chain.version, version)
+
+
+if __name__ == "__main__":
+    unittest.main()
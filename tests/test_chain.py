@@ -0,0 +1,337 @@
+import unittest
+from unittest.mock import patch
+
+from zuma import Ball, ChainBuffer, buffer
+from zuma import settings
+from zuma import spiral
+from zuma.chain import (
+    group_at, drop_indices, reflow, advance, match_size, cascade,
+    advance_segments, insert_at
+    )
+
+
+RED, GREEN, BLUE = settings.RED, settings.GREEN, settings.BLUE
+
+
+def make_chain(colors, step=2.0):
+    return ChainBuffer(
+        Ball(color=c, t=i * step) for i, c in enumerate(colors)
+        )
+
+
+class TestChainBuffer(unittest.TestCase):
+    def test_list_like_access(self):
+        chain = make_chain([RED, GREEN, BLUE])
+        self.assertEqual(len(chain), 3)
+        self.assertEqual(chain[1].color, GREEN)
+        self.assertEqual(chain[-1].t, 4.0)
+        self.assertEqual(chain[0].pos, spiral.get_position(0.0))
+        self.assertIsInstance(chain[0], Ball)
+
+        chain.insert(1, Ball(color=BLUE, t=1.0, ball_type="slow"))
+        self.assertEqual([b.color for b in chain], [RED, BLUE, GREEN, BLUE])
+        self.assertEqual(chain[1].type, "slow")
+
+        popped = chain.pop(1)
+        self.assertEqual(popped.kind, "slow")
+        self.assertEqual(len(chain), 3)
+
+        del chain[0:2]
+        self.assertEqual([b.color for b in chain], [BLUE])
+
+    def test_view_writes_through(self):
+        chain = make_chain([RED, GREEN])
+        chain[0].t = 7.5
+        self.assertEqual(chain.ts[0], 7.5)
+        self.assertEqual(chain[0].pos, spiral.get_position(7.5))
+        chain[1].update(1.0, speed=2.0)
+        self.assertAlmostEqual(chain[1].t, 4.0)
+
+    def test_compact_codes(self):
+        chain = make_chain([RED, RED, BLUE])
+        self.assertEqual(chain.color_codes[0], chain.color_codes[1])
+        self.assertNotEqual(chain.color_codes[0], chain.color_codes[2])
+        with self.assertRaises(ValueError):
+            chain.append(Ball(color=RED, t=9.0, ball_type="unknown"))
+
+
+@unittest.skipUnless(spiral.np is not None, "numpy not installed")
+class TestChainPositionsNumpy(unittest.TestCase):
+    def moved(self):
+        chain = make_chain([RED, GREEN, BLUE] * 100, step=0.5)
+        chain.split(120)
+        chain.shift_segment(1, 3.0)
+        chain.shift(7.5)
+        chain.set_ts([i * 0.5 + 2.0 for i in range(40)], start=10)
+        return chain
+
+    def test_numpy_pass_matches_list_fallback(self):
+        xs, ys = self.moved().positions()
+        with patch.object(spiral, "np", None), patch.object(buffer, "np", None):
+            chain = self.moved()
+            lx, ly = chain.positions()
+            ts = list(chain.ts)
+        self.assertEqual(len(xs), len(lx))
+        for a, b in zip(list(xs) + list(ys), list(lx) + list(ly)):
+            self.assertAlmostEqual(a, b, places=9)
+        for t, x, y in zip(ts, xs, ys):
+            ex, ey = spiral.xy(t)
+            self.assertAlmostEqual(x, ex, places=9)
+            self.assertAlmostEqual(y, ey, places=9)
+
+
+class TestChainRuns(unittest.TestCase):
+    def check_runs(self, chain):
+        # индекс серий должен совпадать с пересчётом «в лоб»
+        # (серии не выходят за границы сегментов)
+        colors = [b.color for b in chain]
+        for i, c in enumerate(colors):
+            first, end = chain.segment_bounds(chain.segment_of(i))
+            lo = i
+            while lo > first and colors[lo - 1] == c:
+                lo -= 1
+            hi = i
+            while hi + 1 < end and colors[hi + 1] == c:
+                hi += 1
+            self.assertEqual(chain.run_at(i), (lo, hi - lo + 1))
+
+    def test_runs_follow_edits(self):
+        chain = make_chain([RED, RED, GREEN, GREEN, GREEN, BLUE])
+        self.check_runs(chain)
+        self.assertEqual(chain.run_at(3), (2, 3))
+
+        chain.insert(3, Ball(color=BLUE, t=5.0))
+        self.check_runs(chain)
+        chain.insert(0, Ball(color=RED, t=-2.0))
+        self.check_runs(chain)
+        del chain[3:5]
+        self.check_runs(chain)
+        chain[1].color = GREEN
+        self.check_runs(chain)
+        chain.extend([Ball(color=BLUE, t=20.0), Ball(color=BLUE, t=22.0)])
+        self.check_runs(chain)
+        self.assertEqual(
+            [length for _, length, _ in chain.runs()],
+            [chain.run_at(i)[1] for i in range(len(chain))
+             if chain.run_at(i)[0] == i]
+            )
+
+    def test_runs_stop_at_segment_boundaries(self):
+        chain = make_chain([RED, GREEN, GREEN, GREEN, GREEN, BLUE])
+        chain.split(3)
+        self.check_runs(chain)
+        self.assertEqual(chain.run_at(2), (1, 2))
+        self.assertEqual(chain.run_at(3), (3, 2))
+        chain.insert(3, Ball(color=GREEN, t=5.0))
+        self.check_runs(chain)
+        chain.join(1)
+        self.check_runs(chain)
+        self.assertEqual(chain.run_at(1), (1, 5))
+
+    def test_match_size(self):
+        chain = make_chain([RED, GREEN, GREEN, BLUE])
+        self.assertEqual(match_size(chain, 1, GREEN), 3)
+        self.assertEqual(match_size(chain, 3, GREEN), 3)
+        self.assertEqual(match_size(chain, 2, GREEN), 3)
+        self.assertEqual(match_size(chain, 0, BLUE), 1)
+        self.assertEqual(match_size(chain.to_balls(), 1, GREEN), 3)
+
+    def test_match_size_does_not_intern_colors(self):
+        chain = make_chain([RED, GREEN, GREEN, BLUE])
+        palette = list(chain.palette)
+        self.assertEqual(match_size(chain, 1, (1, 2, 3)), 1)
+        self.assertEqual(chain.find_color_code((1, 2, 3)), -1)
+        self.assertEqual(chain.palette, palette)
+
+
+class TestChainOps(unittest.TestCase):
+    def test_group_at_and_drop(self):
+        chain = make_chain([RED, GREEN, GREEN, GREEN, BLUE])
+        group = group_at(chain, 2)
+        self.assertEqual(group, [1, 2, 3])
+        drop_indices(chain, group)
+        self.assertEqual([b.color for b in chain], [RED, BLUE])
+
+    def test_drop_indices_returns_removed(self):
+        chain = make_chain([RED, GREEN, BLUE, RED, GREEN, BLUE])
+        removed = drop_indices(chain, [5, 1, 2, 2, 9])
+        self.assertEqual([b.color for b in removed], [GREEN, BLUE, BLUE])
+        self.assertEqual([b.t for b in removed], [2.0, 4.0, 10.0])
+        self.assertEqual([b.color for b in chain], [RED, RED, GREEN])
+
+        balls = make_chain([RED, GREEN, BLUE]).to_balls()
+        removed = drop_indices(balls, [0, 1])
+        self.assertEqual([b.color for b in removed], [RED, GREEN])
+        self.assertEqual(len(balls), 1)
+
+    def test_reflow_and_advance(self):
+        chain = make_chain([RED, GREEN, BLUE], step=0.1)
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        reflow(chain, spacing_px=spacing)
+        for a, b in zip(chain.ts, chain.ts[1:]):
+            self.assertLessEqual(
+                abs(spiral.chord_length(a, b) - spacing), 0.5
+                )
+
+        before = list(chain.ts)
+        advance(chain, 0.5, 2.0)
+        for t0, t1 in zip(before, chain.ts):
+            self.assertAlmostEqual(t1, t0 + 1.0)
+        self.assertEqual(chain[2].pos, spiral.get_position(chain[2].t))
+
+    def test_reflow_from_index_keeps_prefix(self):
+        chain = make_chain([RED, GREEN, BLUE, RED, GREEN], step=0.1)
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        reflow(chain, spacing_px=spacing, start=2)
+        self.assertEqual(list(chain.ts[:3]), [0.0, 0.1, 0.2])
+        for a, b in zip(chain.ts[2:], chain.ts[3:]):
+            self.assertLessEqual(
+                abs(spiral.chord_length(a, b) - spacing), 0.5
+                )
+
+    def test_reflow_backward_moves_prefix(self):
+        chain = make_chain([RED, GREEN, BLUE, RED], step=0.1)
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        reflow(chain, spacing_px=spacing, start=2, forward=False)
+        self.assertAlmostEqual(chain.ts[2], 0.2)
+        self.assertAlmostEqual(chain.ts[3], 0.3)
+        self.assertLess(chain.ts[0], chain.ts[1])
+        self.assertLessEqual(
+            abs(spiral.chord_length(chain.ts[1], chain.ts[2]) - spacing), 0.5
+            )
+
+
+class TestCascade(unittest.TestCase):
+    def test_cascade_reports_depth(self):
+        # B R R [G G G] R B B: G уходит, сходятся R R + R, затем B + B B
+        colors = [BLUE, RED, RED, GREEN, GREEN, GREEN, RED, BLUE, BLUE]
+        chain = make_chain(colors)
+        waves = cascade(chain, 4)
+        self.assertEqual(waves, [3, 3, 3])
+        self.assertEqual(len(chain), 0)
+
+    def test_cascade_stops_on_mismatch(self):
+        chain = make_chain([RED, RED, GREEN, GREEN, GREEN, BLUE, RED])
+        waves = cascade(chain, 2)
+        self.assertEqual(waves, [3])
+        self.assertEqual([b.color for b in chain], [RED, RED, BLUE, RED])
+
+    def test_cascade_closes_gap(self):
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        chain = make_chain([BLUE, RED, GREEN, GREEN, GREEN, RED, BLUE])
+        reflow(chain, spacing_px=spacing)
+        waves = cascade(chain, 3, spacing_px=spacing)
+        self.assertEqual(waves, [3])
+        self.assertLessEqual(
+            abs(spiral.chord_length(chain.ts[1], chain.ts[2]) - spacing), 0.5
+            )
+
+    def test_cascade_on_plain_list(self):
+        balls = [Ball(color=c, t=i) for i, c in
+                 enumerate([RED, GREEN, GREEN, GREEN, RED, RED])]
+        self.assertEqual(cascade(balls, 1), [3, 3])
+        self.assertEqual(balls, [])
+
+
+class TestChainOffset(unittest.TestCase):
+    def test_shift_moves_global_offset(self):
+        chain = make_chain([RED, GREEN, BLUE])
+        advance(chain, 1.0, 1.5)
+        self.assertAlmostEqual(chain.offset, 1.5)
+        self.assertEqual(list(chain.ts), [1.5, 3.5, 5.5])
+        self.assertEqual(chain[1].pos, spiral.get_position(3.5))
+
+    def test_insert_after_shift_keeps_absolute_t(self):
+        chain = make_chain([RED, GREEN])
+        chain.shift(10.0)
+        chain.insert(1, Ball(color=BLUE, t=11.0))
+        self.assertEqual(list(chain.ts), [10.0, 11.0, 12.0])
+        chain.clear()
+        self.assertEqual(chain.offset, 0.0)
+
+    def test_bisect_t_across_segments(self):
+        from bisect import bisect_left
+        chain = make_chain([RED, GREEN, BLUE, RED, GREEN, BLUE], step=2.0)
+        chain.split(2)
+        chain.split(4)
+        chain.shift_segment(1, 0.5)
+        chain.shift(3.0)
+        ts = list(chain.ts)
+        for t in [-1.0, 3.0, 4.0, 7.0, 7.5, 8.0, 11.0, 13.0, 20.0]:
+            self.assertEqual(chain.bisect_t(t), bisect_left(ts, t))
+        self.assertEqual(ChainBuffer().bisect_t(1.0), 0)
+
+
+class TestSegments(unittest.TestCase):
+    def spaced(self, colors):
+        chain = make_chain(colors, step=0.1)
+        reflow(chain, spacing_px=settings.BALL_DIAMETER + settings.BALL_SPACING)
+        return chain
+
+    def test_drop_inside_splits_segment(self):
+        chain = self.spaced([RED, GREEN, GREEN, GREEN, BLUE])
+        cascade(chain, 2, close_gaps=False)
+        self.assertEqual(chain.segment_count, 2)
+        self.assertEqual(chain.segment_bounds(1), (1, 2))
+        self.assertEqual(chain.segment_combo(1), 1)
+
+    def test_group_does_not_cross_gap(self):
+        chain = self.spaced([RED, GREEN, GREEN, BLUE, GREEN, RED])
+        del chain[3]
+        self.assertEqual(chain.segment_count, 2)
+        self.assertEqual([b.color for b in chain],
+                         [RED, GREEN, GREEN, GREEN, RED])
+        self.assertEqual(group_at(chain, 2), [])
+        self.assertEqual(group_at(chain, 3), [])
+        self.assertEqual(match_size(chain, 2, GREEN), 3)
+
+    def test_only_rear_segment_moves(self):
+        chain = self.spaced([RED, GREEN, GREEN, GREEN, BLUE, RED])
+        cascade(chain, 2, close_gaps=False)
+        before = list(chain.ts)
+        waves = advance_segments(chain, 0.5, 2.0)
+        self.assertEqual(waves, [])
+        self.assertAlmostEqual(chain.ts[0], before[0] + 1.0)
+        self.assertEqual(list(chain.ts[1:]), before[1:])
+
+    def test_pull_back_snaps_and_combos(self):
+        chain = self.spaced([BLUE, RED, GREEN, GREEN, GREEN, RED, RED, BLUE])
+        cascade(chain, 3, close_gaps=False)
+        waves = []
+        for _ in range(200):
+            waves += advance_segments(chain, 0.05, 0.0)
+            if waves:
+                break
+        self.assertEqual(waves, [(3, 2)])
+        self.assertEqual([b.color for b in chain], [BLUE, BLUE])
+
+    def test_rear_pushes_front_on_contact(self):
+        chain = self.spaced([RED, GREEN, GREEN, GREEN, BLUE])
+        cascade(chain, 2, close_gaps=False)
+        for _ in range(100):
+            advance_segments(chain, 0.05, 2.0)
+            if chain.segment_count == 1:
+                break
+        self.assertEqual(chain.segment_count, 1)
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        self.assertLessEqual(
+            abs(spiral.chord_length(chain.ts[0], chain.ts[1]) - spacing), 0.5
+            )
+
+    def test_insert_pushes_touching_front_segment(self):
+        chain = self.spaced([RED, GREEN, BLUE, RED, GREEN, BLUE])
+        chain.split(3)
+        front = list(chain.ts[3:])
+        insert_at(chain, 1, Ball(color=BLUE, t=chain[1].t))
+        ts = list(chain.ts)
+        self.assertEqual(ts, sorted(ts))
+        self.assertTrue(chain.ordered())
+        self.assertGreater(chain.ts[4], front[0])
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        self.assertLessEqual(
+            abs(spiral.chord_length(chain.ts[3], chain.ts[4]) - spacing), 0.5
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
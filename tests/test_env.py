@@ -0,0 +1,102 @@
+﻿import math
+import random
+import subprocess
+import sys
+import unittest
+
+from zuma.env import ZumaEnv
+
+
+def aim_at_middle_ball(obs, env):
+    x, y = env.game.level.chain.pos_at(len(obs["t"]) // 2)
+    return math.atan2(y - env.game.frog.pos[1], x - env.game.frog.pos[0])
+
+
+class TestEnv(unittest.TestCase):
+    def run_episode(self, seed, steps=300):
+        env = ZumaEnv(frame_skip=4)
+        obs = env.reset(seed)
+        total = 0.0
+        trace = []
+        for i in range(steps):
+            action = (aim_at_middle_ball(obs, env), i % 10 == 0, i % 25 == 0)
+            obs, reward, done, info = env.step(action)
+            total += reward
+            trace.append((reward, len(obs["t"]), obs["current"]))
+            if done:
+                break
+        return total, trace, info
+
+    def test_same_seed_same_episode(self):
+        self.assertEqual(self.run_episode(3), self.run_episode(3))
+
+    def test_episode_ignores_global_random(self):
+        # Случайность сессии своя: чужие вызовы random на неё не влияют
+        expected = self.run_episode(5, steps=120)
+        env = ZumaEnv(frame_skip=4)
+        obs = env.reset(5)
+        trace = []
+        for i in range(120):
+            random.seed(i)
+            random.random()
+            action = (aim_at_middle_ball(obs, env), i % 10 == 0, i % 25 == 0)
+            obs, reward, done, info = env.step(action)
+            trace.append((reward, len(obs["t"]), obs["current"]))
+            if done:
+                break
+        self.assertEqual(trace, expected[1])
+
+    def test_step_shapes(self):
+        env = ZumaEnv()
+        obs = env.reset(1)
+        self.assertEqual(len(obs["t"]), len(obs["color"]))
+        obs, reward, done, info = env.step((0.0, True, False))
+        self.assertEqual(len(obs["projectiles"]), 1)
+        self.assertIsInstance(reward, float)
+        self.assertFalse(done)
+        self.assertEqual(info["steps"], 1)
+        # перезарядка по игровому времени: второй выстрел сразу не выйдет
+        obs, _, _, _ = env.step((0.0, True, False))
+        self.assertEqual(len(obs["projectiles"]), 1)
+
+    def test_swap(self):
+        env = ZumaEnv()
+        obs = env.reset(1)
+        swapped, _, _, _ = env.step((0.0, False, True))
+        self.assertEqual(
+            (swapped["current"], swapped["next"]), (obs["next"], obs["current"])
+            )
+
+    def test_observation_does_not_touch_chain(self):
+        env = ZumaEnv()
+        env.reset(2)
+        chain = env.game.level.chain
+        env.game.frog.current_ball_color = (1, 2, 3)
+        palette, version = list(chain.palette), chain.version
+        obs = env.observation()
+        self.assertEqual(obs["current"], -1)
+        self.assertEqual(chain.palette, palette)
+        self.assertEqual(chain.version, version)
+
+    def test_never_imports_pygame(self):
+        code = (
+            "import sys\n"
+            "class Block:\n"
+            "    def find_spec(self, name, path=None, target=None):\n"
+            "        if name.split('.')[0] == 'pygame':\n"
+            "            raise AssertionError('pygame imported')\n"
+            "sys.meta_path.insert(0, Block())\n"
+            "from zuma.env import ZumaEnv\n"
+            "env = ZumaEnv()\n"
+            "env.reset(0)\n"
+            "for _ in range(50):\n"
+            "    env.step((0.5, True, False))\n"
+            )
+        res = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True
+            )
+        self.assertEqual(res.returncode, 0, res.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
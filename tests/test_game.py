@@ -1,9 +1,12 @@
-﻿import unittest
+﻿import math
+import unittest
 from unittest.mock import patch
 
 from zuma import Game
 from zuma import Ball
 from zuma import Frog
+from zuma import FlyingBall
+from zuma import physics, settings
 
 
 class TestGameStartLevel(unittest.TestCase):
@@ -59,5 +62,132 @@ class TestGamePowerUpCollision(unittest.TestCase):
         )
 
 
+class TestGameBatchCollision(unittest.TestCase):
+
+    def test_batch_used_for_several_projectiles(self):
+        calls = []
+
+        def collide_many(projectiles, chain):
+            calls.append(len(projectiles))
+            return [None] * len(projectiles)
+
+        g = Game(collide=lambda p, c: None, collide_many=collide_many)
+        g.start_level(1)
+        g.flying_balls.extend(g.frog.shoot() or [])
+        g.update(0.016)
+        self.assertEqual(calls, [])
+
+        g.flying_balls.extend(
+            FlyingBall(0, 0, 1, 0, (1, 2, 3)) for _ in range(3)
+            )
+        g.update(0.016)
+        self.assertEqual(calls, [len(g.flying_balls)])
+
+
+class TestGameHitscan(unittest.TestCase):
+
+    def test_hitscan_shot_lands_without_flight(self):
+        g = Game(hitscan=True)
+        g.start_level(1)
+        g.frog.angle = g.frog._aim = 0.3
+        target = g.frog.aim_target(g.level.chain)
+        self.assertIsNotNone(target)
+        before = len(g.level.chain)
+        with patch.object(Frog, "can_shoot", return_value=True):
+            g.shoot()
+        self.assertEqual(g.flying_balls, [])
+        self.assertNotEqual(len(g.level.chain), before)
+
+    def test_burst_hitscan_into_segments_matches_brute_force(self):
+        g = Game(hitscan=True, seed=3)
+        g.start_level(1)
+        chain = g.level.chain
+        mid = len(chain) // 2
+        chain.split(mid)
+        cx, cy = settings.SPIRAL_CENTER_X, settings.SPIRAL_CENTER_Y
+        x, y = chain[mid - 1].pos
+        g.frog.angle = g.frog._aim = math.atan2(y - cy, x - cx)
+        g.frog.burst_shoot_count = 2
+        g.frog.burst_angle_spread = 0.05
+
+        shots = []
+
+        def checked(angle, chain, radius=None):
+            hit = physics.hitscan(angle, chain, radius=radius)
+            shots.append(hit)
+            ts = list(chain.ts)
+            self.assertEqual(ts, sorted(ts))
+            self.assertEqual(hit, physics.hitscan(angle, chain.to_balls(), radius))
+            return hit
+
+        with patch("zuma.game.hitscan", side_effect=checked), \
+                patch.object(Frog, "can_shoot", return_value=True):
+            g.shoot()
+        self.assertEqual(len(shots), 2)
+        self.assertTrue(all(hit is not None for hit in shots))
+        self.assertTrue(chain.ordered())
+        self.assertEqual(
+            g.frog.aim_target(chain),
+            physics.hitscan(g.frog.angle, chain.to_balls(), settings.BALL_RADIUS)
+            )
+
+
+
+class TestGameSnapshot(unittest.TestCase):
+
+    def play(self, g, steps):
+        for k in range(steps):
+            g.frog._aim = (k * 0.05) % 6.0
+            if k % 30 == 0:
+                g.shoot(now=g.time + 100.0 * k)
+            g.update(1.0 / 120)
+
+    def trace(self, g):
+        return (g.state, g.score, g.lives, list(g.level.chain.ts),
+                list(g.level.chain.color_codes), g.frog.current_ball_color,
+                [tuple(p.pos) for p in g.flying_balls])
+
+    def test_restore_rolls_back_exactly(self):
+        g = Game(seed=4)
+        g.start_level(1)
+        self.play(g, 100)
+        snap = g.snapshot()
+        self.play(g, 300)
+        expected = self.trace(g)
+
+        g.restore(snap)
+        self.play(g, 300)
+        self.assertEqual(self.trace(g), expected)
+        # из одного снимка можно откатываться повторно
+        g.restore(snap)
+        self.play(g, 300)
+        self.assertEqual(self.trace(g), expected)
+
+    def test_clone_is_independent(self):
+        g = Game(seed=9)
+        g.start_level(1)
+        self.play(g, 60)
+        before = self.trace(g)
+        c = g.clone()
+        self.assertEqual(self.trace(c), before)
+        self.play(c, 400)
+        self.assertEqual(self.trace(g), before)
+        self.play(g, 400)
+        self.assertEqual(self.trace(g), self.trace(c))
+
+    def test_clone_continues_parent_rng(self):
+        g = Game(seed=12)
+        g.start_level(1)
+        self.play(g, 50)
+        c = g.clone()
+        self.assertIsNot(c.rng, g.rng)
+        self.assertIs(c.frog.rng, c.rng)
+        self.assertIs(c.level.rng, c.rng)
+        self.assertEqual(
+            [c.rng.random() for _ in range(5)],
+            [g.rng.random() for _ in range(5)]
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,6 +2,7 @@
 import random
 from zuma import Level
 from zuma import Ball
+from zuma import ChainBuffer
 from zuma import settings
 from zuma import spiral
 
@@ -12,7 +13,7 @@ class TestLevelGenerateChainLength(unittest.TestCase):
         expected = lvl.config.get(
             "initial_balls", settings.LEVELS[1]['initial_balls']
             )
-        self.assertIsInstance(lvl.chain, list)
+        self.assertIsInstance(lvl.chain, ChainBuffer)
         self.assertEqual(len(lvl.chain), expected)
 
 
@@ -38,5 +39,15 @@ class TestLevelActivatePowerup(unittest.TestCase):
         self.assertTrue(all("remaining" in p for p in lvl.active_powerups))
 
 
+
+class TestLevelRng(unittest.TestCase):
+    def test_same_rng_seed_same_chain(self):
+        a = Level(1, rng=random.Random(4))
+        random.random()
+        b = Level(1, rng=random.Random(4))
+        self.assertEqual(a.chain.color_codes, b.chain.color_codes)
+        self.assertEqual(list(a.chain.ts), list(b.chain.ts))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+﻿import unittest
+
+from zuma import Game
+from zuma import spiral
+from zuma.loop import FixedStep, run_game_frame, simulate
+
+
+class TestFixedStep(unittest.TestCase):
+    def test_frame_time_becomes_whole_steps(self):
+        clock = FixedStep(hz=120, max_steps=8)
+        self.assertEqual(clock.steps_for(1 / 60), 2)
+        self.assertAlmostEqual(clock.alpha, 0.0)
+        self.assertEqual(clock.steps_for(0.004), 0)
+        self.assertAlmostEqual(clock.alpha, 0.48)
+        self.assertEqual(clock.steps_for(0.005), 1)
+
+    def test_catch_up_is_capped(self):
+        clock = FixedStep(hz=100, max_steps=4)
+        self.assertEqual(clock.steps_for(1.0), 4)
+        self.assertAlmostEqual(clock.dropped, 0.96)
+        self.assertLess(clock.accumulator, clock.step)
+
+    def test_same_steps_for_any_frame_rate(self):
+        # 0.5 секунды кадрами по 1/30 и по 1/144 — одинаковые шаги
+        for fps in (30, 144):
+            steps = []
+            clock = FixedStep(hz=120)
+            for _ in range(fps // 2):
+                clock.advance(1 / fps, steps.append)
+            self.assertEqual(len(steps), 60)
+            self.assertTrue(all(s == 1 / 120 for s in steps))
+
+
+class TestGameLoop(unittest.TestCase):
+    def test_render_interpolates_between_states(self):
+        g = Game()
+        g.start_level(1)
+        clock = FixedStep(hz=120)
+        run_game_frame(g, clock, 1 / 120)
+        alpha = run_game_frame(g, clock, 0.5 / 120)
+        self.assertAlmostEqual(alpha, 0.5)
+        xs, ys = g.render_positions(alpha)
+        prev_t = g._render_prev[0]
+        t = prev_t + (g.level.chain.t_at(0) - prev_t) * alpha
+        self.assertAlmostEqual(xs[0], spiral.get_position(t)[0])
+        self.assertIsNone(g.render_positions(1.0))
+
+    def test_simulate_runs_headless(self):
+        g = Game()
+        g.start_level(1)
+        self.assertEqual(simulate(g, 1.0, hz=60), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
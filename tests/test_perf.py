@@ -0,0 +1,106 @@
+﻿import csv
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from zuma import chain
+from zuma.game import Game
+from zuma.perf import Profiler, Ring
+
+
+class TestRing(unittest.TestCase):
+    def test_wraps_and_summarizes(self):
+        ring = Ring(size=100)
+        for k in range(1, 251):
+            ring.add(k / 1000.0)
+        samples = ring.samples()
+        self.assertEqual(len(samples), 100)
+        self.assertEqual(samples[0], 0.151)
+        self.assertEqual(samples[-1], 0.250)
+        s = ring.summary()
+        self.assertEqual(s["count"], 250)
+        self.assertAlmostEqual(s["p50"], 200.0)
+        self.assertAlmostEqual(s["p95"], 245.0)
+        self.assertAlmostEqual(s["p99"], 249.0)
+        self.assertAlmostEqual(s["max"], 250.0)
+
+    def test_empty(self):
+        self.assertEqual(Ring(4).summary()["p99"], 0.0)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_leaves_functions_untouched(self):
+        update, reflow = Game.update, chain.reflow
+        prof = Profiler()
+        self.assertIs(Game.update, update)
+        with prof:
+            self.assertIsNot(Game.update, update)
+            self.assertIsNot(chain.reflow, reflow)
+        self.assertIs(Game.update, update)
+        self.assertIs(chain.reflow, reflow)
+
+    def test_records_stages_and_exports(self):
+        g = Game(seed=6)
+        g.start_level(1)
+        with Profiler(["update", "level", "collision"]) as prof:
+            for _ in range(50):
+                g.update(1.0 / 120)
+        for _ in range(10):
+            g.update(1.0 / 120)
+        summary = prof.summary()
+        self.assertEqual(summary["update"]["count"], 50)
+        self.assertEqual(summary["level"]["count"], 50)
+        self.assertLessEqual(summary["level"]["p50"], summary["level"]["p99"])
+
+        rows = list(csv.DictReader(io.StringIO(prof.to_csv())))
+        self.assertEqual([r["stage"] for r in rows],
+                         ["update", "level", "collision"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "perf.json")
+            prof.export(path)
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.assertEqual(len(data["update"]["samples_ms"]), 50)
+
+    def test_hooks_are_process_wide(self):
+        games = [Game(seed=k) for k in (1, 2)]
+        for g in games:
+            g.start_level(1)
+        originals = {
+            name: vars(Game)[name]
+            for name in ("update", "draw", "_resolve_projectiles")
+            }
+        with Profiler(["update"]) as prof:
+            with self.assertRaises(RuntimeError):
+                Profiler(["update"]).enable()
+            for g in games:
+                g.update(1.0 / 120)
+        self.assertEqual(prof.summary()["update"]["count"], 2)
+        for name, fn in originals.items():
+            self.assertIs(vars(Game)[name], fn)
+        for g in games:
+            self.assertNotIn("update", vars(g))
+
+    def test_collision_stage_includes_batch_check(self):
+        def slow_batch(projectiles, chain):
+            time.sleep(0.005)
+            return [None] * len(projectiles)
+
+        g = Game(seed=6, collide_many=slow_batch)
+        g.start_level(1)
+        for _ in range(2):
+            g.flying_balls.spawn(0.0, 0.0, 1.0, 0.0, (1, 2, 3))
+        with Profiler(["collision"]) as prof:
+            g.update(1.0 / 120)
+        self.assertGreaterEqual(prof.summary()["collision"]["max"], 5.0)
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            Profiler(["physics"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,372 @@
+﻿import math
+import random
+import unittest
+from unittest.mock import patch
+
+from zuma import Ball, ChainBuffer, FlyingBall
+from zuma import physics, settings
+from zuma import spiral
+from zuma.chain import insert_at, insertion_index, reflow
+from zuma.physics import (hit_index, hitscan, hitscan_table, sweep_hit,
+                          sweep_hits, sweep_hits_stacked, track_windows,
+                          SpatialHash)
+
+
+def make_chain(n, step=1.0):
+    colors = settings.BALL_COLORS
+    return ChainBuffer(
+        Ball(color=colors[i % len(colors)], t=i * step) for i in range(n)
+        )
+
+
+def shot_at(x, y, radius=settings.BALL_RADIUS):
+    return FlyingBall(x, y, 1.0, 0.0, (1, 2, 3), radius=radius)
+
+
+class TestHitIndex(unittest.TestCase):
+    def test_hits_ball_under_projectile(self):
+        chain = make_chain(10)
+        x, y = chain[4].pos
+        self.assertEqual(hit_index(shot_at(x, y), chain), 4)
+        self.assertEqual(
+            hit_index(shot_at(x, y), chain.to_balls()), 4
+            )
+
+    def test_center_is_outside_chain_ring(self):
+        chain = make_chain(10)
+        proj = shot_at(settings.SPIRAL_CENTER_X, settings.SPIRAL_CENTER_Y)
+        self.assertIsNone(hit_index(proj, chain))
+
+    def test_follows_shifted_chain(self):
+        chain = make_chain(5)
+        chain.shift(20.0)
+        x, y = spiral.get_position(22.0)
+        self.assertEqual(hit_index(shot_at(x, y, radius=1), chain), 2)
+
+
+class TestSpatialHash(unittest.TestCase):
+    def test_grid_matches_brute_force(self):
+        rng = random.Random(7)
+        chain = make_chain(120, step=0.3)
+        chain.shift(3.0)
+        balls = chain.to_balls()
+        for _ in range(500):
+            x = rng.uniform(0, settings.WIDTH)
+            y = rng.uniform(0, settings.HEIGHT)
+            proj = shot_at(x, y, radius=rng.choice([2, 15, 40]))
+            self.assertEqual(hit_index(proj, chain), hit_index(proj, balls))
+
+    def test_grid_rebuilds_after_change(self):
+        chain = make_chain(5)
+        x, y = chain[2].pos
+        self.assertEqual(hit_index(shot_at(x, y, radius=1), chain), 2)
+        del chain[0]
+        self.assertEqual(hit_index(shot_at(x, y, radius=1), chain), 1)
+
+    def test_query_neighbor_cells(self):
+        grid = SpatialHash(cell=10.0)
+        grid.rebuild([5.0, 15.0, 95.0], [5.0, 5.0, 95.0])
+        self.assertEqual(sorted(grid.query(9.0, 5.0, 3.0)), [0, 1])
+        self.assertEqual(grid.query(50.0, 50.0, 3.0), [])
+
+
+class TestTrackWindows(unittest.TestCase):
+    def test_long_chain_matches_brute_force(self):
+        chain = make_chain(5000, step=0.03)
+        chain.split(2500)
+        chain.shift_segment(1, 1.0)
+        balls = chain.to_balls()
+        rng = random.Random(5)
+        for _ in range(200):
+            t = rng.uniform(0.0, 150.0)
+            x, y = spiral.get_position(t)
+            proj = shot_at(
+                x + rng.uniform(-30, 30), y + rng.uniform(-30, 30),
+                radius=rng.choice([1, 15])
+                )
+            self.assertEqual(hit_index(proj, chain), hit_index(proj, balls))
+
+    def test_insert_next_to_segment_matches_brute_force(self):
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        chain = make_chain(40, step=0.1)
+        chain.shift(20.0)
+        reflow(chain, spacing_px=spacing)
+        chain.split(20)
+        for i in (18, 10, 19):
+            insert_at(chain, i, Ball(color=settings.RED, t=chain[i].t))
+            self.assertTrue(chain.ordered())
+        balls = chain.to_balls()
+        rng = random.Random(11)
+        for b in balls[15:25]:
+            for _ in range(20):
+                proj = shot_at(
+                    b.pos[0] + rng.uniform(-25, 25),
+                    b.pos[1] + rng.uniform(-25, 25),
+                    radius=rng.choice([1, 15])
+                    )
+                self.assertEqual(hit_index(proj, chain), hit_index(proj, balls))
+
+    def test_one_window_per_winding(self):
+        x, y = spiral.get_position(40.0)
+        windows = list(track_windows(x, y, settings.BALL_RADIUS * 2))
+        self.assertTrue(any(a <= 40.0 <= b for a, b in windows))
+        period = 2 * 3.141592653589793 / 0.2
+        for (_, b0), (a1, _) in zip(windows, windows[1:]):
+            self.assertGreater(a1 - b0, period / 2)
+
+
+class TestSweepHit(unittest.TestCase):
+    def test_catches_tunneling_shot(self):
+        chain = make_chain(10)
+        x, y = chain[4].pos
+        # за один большой шаг снаряд пролетает шар насквозь
+        proj = FlyingBall(x - 200, y, 1.0, 0.0, (1, 2, 3), speed=400.0)
+        proj.update(1.0)
+        self.assertIsNone(hit_index(proj, chain))
+        hit = sweep_hit(proj, chain)
+        self.assertIsNotNone(hit)
+        r = proj.radius + settings.BALL_RADIUS
+        bx, by = chain[hit.index].pos
+        px, py = hit.point
+        self.assertAlmostEqual((px - bx) ** 2 + (py - by) ** 2, r * r, 3)
+        self.assertLess(hit.toi, 0.5)
+
+    def test_earliest_contact_wins(self):
+        chain = make_chain(40, step=2.0)
+        balls = chain.to_balls()
+        rng = random.Random(3)
+        for _ in range(300):
+            x = rng.uniform(0, settings.WIDTH)
+            y = rng.uniform(0, settings.HEIGHT)
+            proj = FlyingBall(
+                x, y, rng.uniform(-1, 1), rng.uniform(-1, 1), (1, 2, 3),
+                speed=rng.choice([50.0, 600.0])
+                )
+            proj.update(0.5)
+            hit = sweep_hit(proj, chain)
+            self.assertEqual(hit, sweep_hit(proj, balls))
+            if hit is None:
+                continue
+            # до момента касания снаряд ни с чем не пересекался
+            ax, ay = proj.prev_pos
+            s = max(0.0, hit.toi - 1e-6)
+            probe = shot_at(
+                ax + s * (proj.pos[0] - ax), ay + s * (proj.pos[1] - ay)
+                )
+            if hit.toi > 0:
+                self.assertIsNone(hit_index(probe, balls))
+
+    def test_misses_outside_ring(self):
+        chain = make_chain(5)
+        proj = FlyingBall(0, 0, 1.0, 0.0, (1, 2, 3))
+        proj.update(0.1)
+        self.assertIsNone(sweep_hit(proj, chain))
+
+
+class TestSweepHits(unittest.TestCase):
+    def test_batch_matches_single(self):
+        chain = make_chain(60, step=1.5)
+        chain.shift(4.0)
+        rng = random.Random(11)
+        shots = []
+        for _ in range(200):
+            proj = FlyingBall(
+                rng.uniform(0, settings.WIDTH), rng.uniform(0, settings.HEIGHT),
+                rng.uniform(-1, 1), rng.uniform(-1, 1), (1, 2, 3),
+                speed=rng.choice([50.0, 900.0])
+                )
+            proj.update(0.25)
+            shots.append(proj)
+        for proj, hit in zip(shots, sweep_hits(shots, chain)):
+            single = sweep_hit(proj, chain)
+            if single is None:
+                self.assertIsNone(hit)
+                continue
+            self.assertEqual(hit.index, single.index)
+            self.assertAlmostEqual(hit.toi, single.toi, 9)
+
+    def test_stacked_matches_per_session(self):
+        rng = random.Random(13)
+        chains, groups = [], []
+        for g in range(12):
+            chain = make_chain(rng.randint(0, 50), step=1.5)
+            if len(chain) > 10:
+                chain.split(5)
+                chain.shift_segment(1, 2.0)
+            chain.shift(rng.uniform(0, 20))
+            shots = []
+            for _ in range(rng.randint(0, 4)):
+                proj = FlyingBall(
+                    rng.uniform(0, settings.WIDTH),
+                    rng.uniform(0, settings.HEIGHT),
+                    rng.uniform(-1, 1), rng.uniform(-1, 1), (1, 2, 3),
+                    speed=900.0
+                    )
+                proj.update(0.25)
+                shots.append(proj)
+            chains.append(chain)
+            groups.append(shots)
+        stacked = sweep_hits_stacked(groups, chains)
+        for shots, chain, hits in zip(groups, chains, stacked):
+            self.assertEqual(len(hits), len(shots))
+            for proj, hit in zip(shots, hits):
+                single = sweep_hit(proj, chain)
+                self.assertEqual(
+                    None if hit is None else hit.index,
+                    None if single is None else single.index
+                    )
+
+    def test_empty_inputs(self):
+        self.assertEqual(sweep_hits([], make_chain(3)), [])
+        self.assertEqual(sweep_hits([shot_at(0, 0)], ChainBuffer()), [None])
+
+
+def random_shots(rng, n, speeds=(50.0, 900.0)):
+    shots = []
+    for _ in range(n):
+        proj = FlyingBall(
+            rng.uniform(0, settings.WIDTH), rng.uniform(0, settings.HEIGHT),
+            rng.uniform(-1, 1), rng.uniform(-1, 1), (1, 2, 3),
+            speed=rng.choice(speeds)
+            )
+        proj.update(0.25)
+        shots.append(proj)
+    return shots
+
+
+@unittest.skipUnless(physics.np is not None, "numpy not installed")
+class TestSweepHitsNumpy(unittest.TestCase):
+    # Матричный путь NumPy против поштучного sweep_hit и запасного пути
+    def assert_same_hits(self, got, want):
+        self.assertEqual(len(got), len(want))
+        for hit, single in zip(got, want):
+            if single is None:
+                self.assertIsNone(hit)
+                continue
+            self.assertIsNotNone(hit)
+            self.assertEqual(hit.index, single.index)
+            self.assertAlmostEqual(hit.toi, single.toi, 9)
+            self.assertAlmostEqual(hit.point[0], single.point[0], 6)
+            self.assertAlmostEqual(hit.point[1], single.point[1], 6)
+
+    def test_matrix_matches_single_and_fallback(self):
+        chain = make_chain(80, step=1.2)
+        chain.split(40)
+        chain.shift_segment(1, 2.5)
+        chain.shift(3.0)
+        shots = random_shots(random.Random(21), 300)
+        hits = sweep_hits(shots, chain)
+        self.assertTrue(any(h is not None for h in hits))
+        self.assertTrue(any(h is not None and h.toi > 0 for h in hits))
+        self.assert_same_hits(hits, [sweep_hit(p, chain) for p in shots])
+        with patch.object(physics, "np", None):
+            fallback = sweep_hits(shots, chain)
+        self.assert_same_hits(hits, fallback)
+
+    def test_toi_matrix_marks_misses_and_overlaps(self):
+        np = physics.np
+        # снаряд 0 касается шара 0 в конце шага, снаряд 1 уже внутри
+        # шара 1, снаряд 2 ни во что не попадает
+        a = np.array([[0.0, 0.0], [500.0, 500.0], [0.0, -300.0]])
+        d = np.array([[20.0, 0.0], [0.0, 0.0], [1.0, 0.0]])
+        pr = np.zeros(3)
+        r = settings.BALL_RADIUS
+        cx = np.array([20.0 + r, 505.0])
+        cy = np.array([0.0, 500.0])
+        s = physics._toi_matrix(a, d, pr, cx, cy)
+        self.assertAlmostEqual(s[0, 0], 1.0, 9)
+        self.assertTrue(np.isinf(s[0, 1]))
+        self.assertEqual(s[1, 1], 0.0)
+        self.assertTrue(np.isinf(s[2]).all())
+        hits = physics._first_hits(s, a, d, 3)
+        self.assertEqual(hits[0].index, 0)
+        self.assertEqual(hits[1].index, 1)
+        self.assertIsNone(hits[2])
+
+
+    def test_stacked_branch_matches_per_session(self):
+        rng = random.Random(17)
+        chains, groups = [], []
+        for g in range(physics._STACK_MIN + 4):
+            chain = make_chain(rng.randint(20, 70), step=1.5)
+            chain.split(10)
+            chain.shift_segment(1, 2.0)
+            chain.shift(rng.uniform(0, 20))
+            chains.append(chain)
+            groups.append(random_shots(rng, rng.randint(1, 6), (900.0,)))
+        groups[3] = []
+        with patch.object(
+                physics, "_toi_matrix", wraps=physics._toi_matrix
+                ) as matrix:
+            stacked = sweep_hits_stacked(groups, chains)
+        self.assertEqual(matrix.call_count, 1)
+        self.assertEqual(stacked[3], [])
+        with patch.object(physics, "np", None):
+            fallback = sweep_hits_stacked(groups, chains)
+        hits = 0
+        for shots, chain, got, plain in zip(groups, chains, stacked, fallback):
+            want = [sweep_hit(p, chain) for p in shots]
+            self.assert_same_hits(got, want)
+            self.assert_same_hits(plain, want)
+            hits += sum(h is not None for h in got)
+        self.assertGreater(hits, 0)
+
+
+class TestHitscan(unittest.TestCase):
+    def test_table_matches_brute_force(self):
+        chain = make_chain(160, step=0.9)
+        chain.split(80)
+        chain.shift_segment(1, 3.0)
+        chain.shift(-10.0)
+        balls = chain.to_balls()
+        rng = random.Random(2)
+        for _ in range(500):
+            angle = rng.uniform(-7.0, 7.0)
+            hit = hitscan(angle, chain)
+            self.assertEqual(hit, hitscan(angle, balls))
+
+    def test_contact_point_on_ray(self):
+        chain = make_chain(20, step=2.0)
+        x, y = chain[5].pos
+        cx, cy = settings.SPIRAL_CENTER_X, settings.SPIRAL_CENTER_Y
+        angle = math.atan2(y - cy, x - cx)
+        hit = hitscan(angle, chain)
+        self.assertIsNotNone(hit)
+        px, py = hit.point
+        bx, by = chain[hit.index].pos
+        self.assertAlmostEqual(
+            math.hypot(px - bx, py - by), 2 * settings.BALL_RADIUS, 6
+            )
+        self.assertLessEqual(
+            math.hypot(px - cx, py - cy), math.hypot(x - cx, y - cy)
+            )
+
+    def test_table_is_cached_and_lazy(self):
+        table = hitscan_table()
+        self.assertIs(table, hitscan_table())
+        row = table.windows(1.0)
+        self.assertIs(row, table.windows(1.0))
+        self.assertEqual(table.sector(-1e-9), table.bins - 1)
+        s_mins = [w[2] for w in row]
+        self.assertEqual(s_mins, sorted(s_mins))
+
+
+class TestInsertionIndex(unittest.TestCase):
+    def test_side_follows_contact_point(self):
+        chain = make_chain(6, step=2.0)
+        bx, by = chain[2].pos
+        tx, ty = spiral.tangent(chain[2].t)
+        self.assertEqual(insertion_index(chain, 2, (bx + tx, by + ty)), 3)
+        self.assertEqual(insertion_index(chain, 2, (bx - tx, by - ty)), 2)
+
+    def test_no_insert_past_segment_front(self):
+        chain = make_chain(6, step=2.0)
+        chain.split(3)
+        bx, by = chain[2].pos
+        tx, ty = spiral.tangent(chain[2].t)
+        self.assertEqual(insertion_index(chain, 2, (bx + tx, by + ty)), 2)
+        self.assertEqual(insertion_index(chain, 5, (bx + tx, by + ty)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+﻿import math
+import unittest
+
+from zuma import config as cfg
+from zuma.entities import FlyingBall, ProjectilePool, ProjectileView
+
+
+class TestProjectilePool(unittest.TestCase):
+    def test_spawn_move_and_swap_remove(self):
+        pool = ProjectilePool(capacity=2)
+        a = pool.spawn(100, 100, 1, 0, (1, 2, 3), speed=10)
+        b = pool.spawn(100, 100, 0, 1, (4, 5, 6), speed=10)
+        c = pool.spawn(100, 100, -1, 0, (7, 8, 9), speed=10)
+        self.assertEqual(pool.capacity, 4)
+        pool.move(0.5)
+        self.assertEqual(a.pos, (105.0, 100.0))
+        self.assertEqual(a.prev_pos, (100.0, 100.0))
+
+        pool.remove(a)
+        self.assertNotIn(a, pool)
+        # последний живой снаряд занял место удалённого
+        self.assertEqual(list(pool), [c, b])
+        # освободившийся слот используется снова
+        d = pool.spawn(0, 0, 1, 1, (0, 0, 0))
+        self.assertIs(d, a)
+        self.assertEqual(len(pool), 3)
+        pool.remove(d)
+        with self.assertRaises(ValueError):
+            pool.remove(d)
+
+    def test_exit_time_matches_geometry(self):
+        pool = ProjectilePool()
+        for k in range(16):
+            ang = k * math.tau / 16 + 0.1
+            pool.spawn(cfg.FROG_X, cfg.FROG_Y, math.cos(ang), math.sin(ang),
+                       (1, 1, 1), speed=300)
+        geometry, analytic = {}, {}
+        for step in range(400):
+            pool.move(1 / 120)
+            for p in pool:
+                x, y = p.pos
+                r = p.radius
+                if (x < -r or x > cfg.WIDTH + r
+                        or y < -r or y > cfg.HEIGHT + r):
+                    geometry.setdefault(p.slot, step)
+                if p.is_offscreen():
+                    analytic.setdefault(p.slot, step)
+        self.assertEqual(len(analytic), 16)
+        # на границе допускаем расхождение в один шаг
+        for slot, step in geometry.items():
+            self.assertLessEqual(abs(analytic[slot] - step), 1)
+
+    def test_foreign_objects_and_list_interface(self):
+        pool = ProjectilePool()
+        fb = FlyingBall(10, 20, 0, 1, (1, 2, 3), speed=5)
+        view = pool.spawn_from(fb)
+        # spawn_from копирует снаряд в слот и отдаёт вид на слот
+        self.assertIsInstance(view, ProjectileView)
+        self.assertIn(view, pool)
+        self.assertNotIn(fb, pool)
+        self.assertEqual(pool[0].pos, (10.0, 20.0))
+        # append, как у списка, кладёт сам объект
+        pool.append(fb)
+        self.assertIn(fb, pool)
+        pool.remove(fb)
+        self.assertNotIn(fb, pool)
+
+        class Dummy:
+            pos = [0.0, 0.0]
+
+            def update(self, dt):
+                self.pos = [self.pos[0] + dt, 0.0]
+
+        d = Dummy()
+        pool.append(d)
+        pool.move(1.0)
+        self.assertEqual(d.pos, [1.0, 0.0])
+        self.assertEqual(pool[1], d)
+        pool.remove(d)
+        pool.clear()
+        self.assertEqual(pool, [])
+        self.assertFalse(pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
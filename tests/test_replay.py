@@ -0,0 +1,106 @@
+﻿import math
+import os
+import tempfile
+import unittest
+
+from zuma.game import Game, Input
+from zuma.replay import (Recorder, ReplayError, decode, encode, state_hash,
+                         verify, verify_bytes, verify_files)
+
+
+def record_session(seed=11, ticks=900, interval=120):
+    # Сессия с меню: Enter запускает уровень, дальше прицел и выстрелы
+    game = Game(seed=seed)
+    rec = Recorder(game, interval=interval)
+    for k in range(ticks):
+        if k == 3:
+            game.input(Input.ENTER)
+        if k % 5 == 0:
+            game.input(Input.AIM, math.sin(k * 0.013) * 3.0)
+        # чаще перезарядка (0.8 с) не даст стрелять
+        if k % 100 == 0:
+            game.input(Input.SHOOT)
+        game.update(1.0 / 120)
+    return rec.finish()
+
+
+class TestReplay(unittest.TestCase):
+    def test_roundtrip_and_verify(self):
+        rep = record_session()
+        self.assertNotEqual(rep.state, "menu")
+        self.assertGreater(len(rep.checkpoints), 0)
+        data = encode(rep)
+        back = decode(data)
+        self.assertEqual(back, rep)
+        self.assertIsNone(verify(back))
+        self.assertIsNone(verify_bytes(data))
+
+    def test_tampered_replay_fails(self):
+        rep = record_session()
+        shots = [i for i, c in enumerate(rep.inputs) if c[1] == Input.SHOOT]
+        del rep.inputs[shots[len(shots) // 2]]
+        self.assertIsNotNone(verify(rep))
+
+        rep = record_session()
+        rep.score += 500
+        self.assertIn("score", verify(rep))
+
+    def test_hash_covers_hidden_state(self):
+        game = Game(seed=3)
+        game.start_level(1)
+        for _ in range(30):
+            game.update(1.0 / 120)
+        base = state_hash(game)
+        self.assertEqual(state_hash(game.clone()), base)
+
+        def changed(edit):
+            other = game.clone()
+            edit(other)
+            return state_hash(other)
+
+        edits = [
+            lambda g: g.level.timers.schedule("slow", 5.0),
+            lambda g: g.level.pending_waves.append((3, 2)),
+            lambda g: setattr(g.frog, "shot_cooldown", 0.5),
+            lambda g: setattr(g.frog, "burst_shoot_count", 3),
+            lambda g: setattr(g.frog, "shoot_speed_multiplier", 2.0),
+            lambda g: g.rng.random(),
+            lambda g: g.level.chain.split(len(g.level.chain) // 2),
+            ]
+        for edit in edits:
+            self.assertNotEqual(changed(edit), base)
+
+    def test_aim_is_stored_as_float32(self):
+        game = Game(seed=1)
+        game.start_level(1)
+        rec = Recorder(game)
+        game.input(Input.AIM, 0.1)
+        game.input(Input.AIM, 0.2)
+        rep = rec.finish()
+        # за один шаг остаётся последний поворот
+        self.assertEqual(len(rep.inputs), 1)
+        self.assertNotEqual(game.frog._aim, 0.2)
+        self.assertAlmostEqual(game.frog._aim, 0.2, places=6)
+        self.assertTrue(decode(encode(rep)).started)
+
+    def test_bad_data(self):
+        data = encode(record_session(ticks=10))
+        with self.assertRaises(ReplayError):
+            decode(b"XXXX" + data[4:])
+        self.assertIsNotNone(verify_bytes(data[:-3]))
+
+    def test_verify_files_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.zrp")
+            with open(path, "wb") as f:
+                f.write(encode(record_session(ticks=300)))
+            self.assertEqual(verify_files([path], workers=1), [(path, None)])
+
+    def test_recording_needs_seed(self):
+        import random
+        with self.assertRaises(ValueError):
+            Recorder(Game(rng=random.Random(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 ﻿import unittest
+from unittest.mock import patch
+
 from zuma import spiral
 from zuma import settings
 
@@ -32,5 +34,88 @@ class TestSpiralFindTAtDistance(unittest.TestCase):
         self.assertNotEqual(t1, t0)
 
 
+class TestSpiralArcTable(unittest.TestCase):
+    def test_table_step_within_tolerance(self):
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        for t0 in (-40.0, 0.0, 35.5, 90.0, 140.0):
+            for forward in (True, False):
+                t1 = spiral.step_t(t0, spacing, forward=forward)
+                d = spiral.chord_length(t0, t1)
+                self.assertLessEqual(abs(d - spacing), 0.5)
+                self.assertEqual(t1 > t0, forward)
+
+    def test_table_matches_search(self):
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        fast = spiral.step_t(10.0, spacing)
+        slow = spiral.step_t(10.0, spacing, method=spiral.STEP_SEARCH)
+        self.assertAlmostEqual(fast, slow, delta=0.05)
+
+    def test_arc_table_roundtrip(self):
+        table = spiral.arc_table()
+        s = table.arc_at(42.0)
+        self.assertIsNotNone(s)
+        self.assertAlmostEqual(table.t_at(s), 42.0, places=6)
+        self.assertIs(table, spiral.arc_table())
+
+    def test_seed_positions_spacing(self):
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        ts = spiral.seed_positions(40, spacing=spacing)
+        for a, b in zip(ts, ts[1:]):
+            self.assertLessEqual(abs(spiral.chord_length(a, b) - spacing), 0.5)
+
+
+class TestSpiralNewtonStep(unittest.TestCase):
+    def test_newton_within_tolerance(self):
+        spacing = settings.BALL_DIAMETER + settings.BALL_SPACING
+        for t0 in (-60.0, 0.0, 50.0, 120.0, 140.0):
+            t1, iters = spiral.solve_step_t(
+                t0, spacing, method=spiral.STEP_NEWTON
+                )
+            self.assertGreater(t1, t0)
+            self.assertLessEqual(abs(spiral.chord_length(t0, t1) - spacing), 0.5)
+            self.assertGreaterEqual(iters, 1)
+
+    def test_iteration_report_covers_levels(self):
+        report = spiral.iteration_report()
+        self.assertEqual(set(report), set(settings.LEVELS))
+        for row in report.values():
+            self.assertLessEqual(
+                row[spiral.STEP_NEWTON][0], row[spiral.STEP_SEARCH][0]
+                )
+
+    def test_unknown_method_rejected(self):
+        with self.assertRaises(ValueError):
+            spiral.step_t(0.0, 10.0, method="magic")
+
+
+class TestSpiralXyMany(unittest.TestCase):
+    def test_xy_many_matches_scalar(self):
+        ts = [-10.0, 0.0, 12.5, 77.0, 170.0]
+        xs, ys = spiral.xy_many(ts)
+        self.assertEqual(len(xs), len(ts))
+        for t, x, y in zip(ts, xs, ys):
+            ex, ey = spiral.xy(t)
+            self.assertAlmostEqual(float(x), ex, places=9)
+            self.assertAlmostEqual(float(y), ey, places=9)
+
+
+@unittest.skipUnless(spiral.np is not None, "numpy not installed")
+class TestSpiralXyManyNumpy(unittest.TestCase):
+    def test_numpy_matches_list_fallback(self):
+        # t за концом спирали — радиус обрезается до нуля
+        ts = [i * 0.37 - 5.0 for i in range(600)]
+        xs, ys = spiral.xy_many(ts)
+        self.assertIsInstance(xs, spiral.np.ndarray)
+        with patch.object(spiral, "np", None):
+            lx, ly = spiral.xy_many(ts)
+            lr = spiral.radius_many(ts)
+        self.assertIsInstance(lx, list)
+        self.assertEqual(len(lx), len(xs))
+        for a, b in zip(xs.tolist() + ys.tolist(), lx + ly):
+            self.assertAlmostEqual(a, b, places=9)
+        for a, b in zip(spiral.radius_many(ts).tolist(), lr):
+            self.assertAlmostEqual(a, b, places=9)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,56 @@
+﻿import unittest
+
+from zuma import Game, Level
+from zuma import config as cfg
+from zuma.config import PowerUp
+from zuma.timers import TimerHeap
+
+
+class TestTimerHeap(unittest.TestCase):
+    def test_expiry_order_and_remaining(self):
+        timers = TimerHeap()
+        timers.schedule("a", 2.0)
+        timers.schedule("b", 1.0)
+        timers.schedule("c", 1.0)
+        self.assertEqual(timers.advance(0.5), [])
+        self.assertEqual(
+            timers.pending(), [("a", 1.5), ("b", 0.5), ("c", 0.5)]
+            )
+        self.assertEqual(timers.advance(0.5), ["b", "c"])
+        self.assertEqual(timers.advance(5.0), ["a"])
+        self.assertEqual(len(timers), 0)
+
+    def test_built_from_pending(self):
+        timers = TimerHeap([("x", 0.25), ("y", 3.0)])
+        self.assertEqual(timers.advance(0.25), ["x"])
+
+
+class TestPowerUpTimers(unittest.TestCase):
+    def test_speed_factor_follows_effects(self):
+        lvl = Level(1)
+        self.assertEqual(lvl._speed_mult, 1.0)
+        lvl.activate_powerup(PowerUp.TYPE_SLOW)
+        lvl.update(cfg.POWERUP_DURATION / 2)
+        lvl.activate_powerup(PowerUp.TYPE_SLOW)
+        lvl.activate_powerup(PowerUp.TYPE_REVERSE)
+        self.assertAlmostEqual(lvl._speed_mult, -cfg.POWERUP_SLOW_FACTOR)
+        # первое замедление кончилось, второе ещё действует
+        lvl.update(cfg.POWERUP_DURATION * 0.6)
+        self.assertAlmostEqual(lvl._speed_mult, -cfg.POWERUP_SLOW_FACTOR)
+        lvl.update(cfg.POWERUP_DURATION)
+        self.assertEqual(lvl._speed_mult, 1.0)
+        self.assertEqual(lvl.active_powerups, [])
+
+    def test_burst_ends_with_its_timer(self):
+        g = Game(seed=2)
+        g.start_level(1)
+        g._pickup_powerup(PowerUp.TYPE_BURST_SHOOT, 0)
+        self.assertEqual(g.frog.burst_shoot_count, 3)
+        g.update(cfg.POWERUP_DURATION - 0.1)
+        self.assertEqual(g.frog.burst_shoot_count, 3)
+        g.update(0.2)
+        self.assertEqual(g.frog.burst_shoot_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
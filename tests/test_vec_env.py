@@ -0,0 +1,38 @@
+﻿import unittest
+
+from zuma.env import ZumaEnv
+from zuma.vec_env import VecEnv, bench
+
+
+def policy(i, k):
+    return ((i * 0.37 + k * 0.05) % 6.283, k % 8 == 0, k % 50 == 49)
+
+
+class TestVecEnv(unittest.TestCase):
+    def test_matches_single_sessions(self):
+        n, steps = 10, 150
+        vec = VecEnv(n, frame_skip=4)
+        vec.reset([100 + i for i in range(n)])
+        traces = [[] for _ in range(n)]
+        for k in range(steps):
+            obs, rewards, dones, _ = vec.step([policy(i, k) for i in range(n)])
+            for i in range(n):
+                traces[i].append((rewards[i], dones[i], obs[i]["t"]))
+
+        for i in range(n):
+            env = ZumaEnv(frame_skip=4)
+            env.reset(100 + i)
+            trace = []
+            for k in range(steps):
+                obs, reward, done, _ = env.step(policy(i, k))
+                trace.append((reward, done, obs["t"]))
+            self.assertEqual(trace, traces[i])
+
+    def test_bench_reports_rates(self):
+        rows = bench((1, 2), steps=2)
+        self.assertEqual([n for n, _, _ in rows], [1, 2])
+        self.assertTrue(all(a > 0 and b > 0 for _, a, b in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
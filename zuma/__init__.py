@@ -4,7 +4,8 @@
 from . import config
 from . import settings
 from .config import PowerUp
-from .entities import Ball, FlyingBall, Frog
+from .entities import Ball, FlyingBall, Frog, ProjectilePool
+from .buffer import ChainBuffer
 from .level import Level
 from .game import Game
 
@@ -15,6 +16,8 @@ __all__ = [
     "Ball",
     "FlyingBall",
     "Frog",
+    "ProjectilePool",
+    "ChainBuffer",
     "Level",
     "Game",
 ]
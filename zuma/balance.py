@@ -0,0 +1,206 @@
+"""Балансировка уровней методом Монте-Карло.
+
+Для каждого уровня из cfg.LEVELS прогоняется много headless-игр
+(ZumaEnv) со скриптовой стратегией. Игры раздаются пулу процессов
+пачками (chunk) по номерам зёрен; зерно каждой игры зависит только
+от общего seed, уровня и номера игры, поэтому отчёт не зависит
+от числа процессов. По итогам считаются доля побед, время до
+поражения и распределение очков.
+
+Запуск: python -m zuma.balance --games 2000 --workers 8"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import config as cfg
+from .env import Action, ZumaEnv
+from .physics import hitscan
+
+# Шагов симуляции на одно решение стратегии (при 120 Гц — 20 решений в с)
+DECISION_SKIP: int = 6
+
+# Итог одной игры: (победа, время игры в с, очки)
+GameResult = Tuple[bool, float, int]
+
+
+def game_seed(seed: int, level: int, index: int) -> int:
+    # Зерно игры: детерминированно по (seed, уровень, номер игры)
+    return (int(seed) * 1_000_003 + int(level) * 10_007 + int(index)) % (2 ** 32)
+
+
+def scripted_policy(env: ZumaEnv) -> Action:
+    # Целится в самую длинную серию цвета текущего шара, которую
+    # видно без помех (проверка лучом по таблице hitscan); если такой
+    # нет, а у следующего шара есть, — меняет шары местами
+    game = env.game
+    chain = game.level.chain
+    frog = game.frog
+    if not chain:
+        return (frog.angle, False, False)
+
+    def best_shot(color) -> Optional[Tuple[int, float]]:
+        code = chain.find_color_code(color)
+        if code < 0:
+            return None
+        best = None
+        for lo, length, run_code in chain.runs():
+            if run_code != code:
+                continue
+            x, y = chain.pos_at(lo + length // 2)
+            angle = math.atan2(y - frog.pos[1], x - frog.pos[0])
+            hit = hitscan(angle, chain)
+            if hit is None or not lo - 1 <= hit.index <= lo + length:
+                continue
+            # длиннее серия — лучше; при равной — ближе к концу спирали
+            key = (length, lo)
+            if best is None or key > best[0]:
+                best = (key, angle)
+        return None if best is None else (best[0][0], best[1])
+
+    cur = best_shot(frog.current_ball_color)
+    if cur is not None:
+        return (cur[1], True, False)
+    nxt = best_shot(frog.next_ball_color)
+    if nxt is not None:
+        return (nxt[1], False, True)
+    # нечего собирать: сбрасываем шар в хвост цепочки
+    x, y = chain.pos_at(0)
+    return (math.atan2(y - frog.pos[1], x - frog.pos[0]), True, False)
+
+
+def play(level: int, seed: int) -> GameResult:
+    env = ZumaEnv(level, frame_skip=DECISION_SKIP)
+    env.reset(seed)
+    done = False
+    info: Dict = {}
+    while not done:
+        _, _, done, info = env.step(scripted_policy(env))
+    return info["state"] == "level_complete", float(info["time"]), int(info["score"])
+
+
+def run_chunk(task: Tuple[int, int, Sequence[int]]) -> Tuple[int, List[GameResult]]:
+    # Пачка игр одного уровня: (уровень, seed, номера игр)
+    level, seed, indices = task
+    return level, [play(level, game_seed(seed, level, i)) for i in indices]
+
+
+def _tasks(
+        levels: Iterable[int], games: int, seed: int, chunk: int
+        ) -> List[Tuple[int, int, range]]:
+    return [
+        (level, seed, range(lo, min(games, lo + chunk)))
+        for level in levels
+        for lo in range(0, games, chunk)
+        ]
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    data = sorted(values)
+    k = (len(data) - 1) * q
+    lo = math.floor(k)
+    hi = min(lo + 1, len(data) - 1)
+    return data[lo] + (data[hi] - data[lo]) * (k - lo)
+
+
+def summarize(results: Sequence[GameResult]) -> Dict:
+    wins = [r for r in results if r[0]]
+    losses = [r[1] for r in results if not r[0]]
+    scores = [float(r[2]) for r in results]
+    return {
+        "games": len(results),
+        "win_rate": len(wins) / len(results) if results else 0.0,
+        "time_to_game_over": {
+            "count": len(losses),
+            "mean": sum(losses) / len(losses) if losses else 0.0,
+            "p50": _percentile(losses, 0.5),
+            "p90": _percentile(losses, 0.9),
+            },
+        "score": {
+            "mean": sum(scores) / len(scores) if scores else 0.0,
+            "p10": _percentile(scores, 0.1),
+            "p50": _percentile(scores, 0.5),
+            "p90": _percentile(scores, 0.9),
+            },
+        }
+
+
+def run(
+        levels: Sequence[int], games: int, *, seed: int = 0,
+        workers: int | None = None, chunk: int = 25
+        ) -> Dict[int, Dict]:
+    # Прогоняет games игр на каждый уровень; workers=1 — без пула
+    tasks = _tasks(levels, int(games), int(seed), max(1, int(chunk)))
+    results: Dict[int, List[GameResult]] = {level: [] for level in levels}
+    if workers == 1:
+        for level, batch in map(run_chunk, tasks):
+            results[level].extend(batch)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for level, batch in pool.map(run_chunk, tasks):
+                results[level].extend(batch)
+    return {level: summarize(results[level]) for level in levels}
+
+
+def format_report(report: Dict[int, Dict]) -> str:
+    lines = [
+        f"{'level':>5} {'games':>6} {'win %':>6} {'lose t p50':>10} "
+        f"{'score p10':>9} {'p50':>6} {'p90':>6}"
+        ]
+    for level, row in report.items():
+        lines.append(
+            f"{level:>5} {row['games']:>6} {100 * row['win_rate']:>6.1f} "
+            f"{row['time_to_game_over']['p50']:>10.1f} "
+            f"{row['score']['p10']:>9.0f} {row['score']['p50']:>6.0f} "
+            f"{row['score']['p90']:>6.0f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m zuma.balance",
+        description="Monte Carlo balancing of cfg.LEVELS",
+        )
+    parser.add_argument("--games", type=int, default=1000,
+                        help="games per level")
+    parser.add_argument("--levels", default=",".join(map(str, cfg.LEVELS)),
+                        help="comma separated level numbers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (1 = no pool)")
+    parser.add_argument("--chunk", type=int, default=25,
+                        help="games per task sent to a worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path",
+                        help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    t0 = time.perf_counter()
+    report = run(
+        levels, args.games, seed=args.seed, workers=args.workers,
+        chunk=args.chunk
+        )
+    elapsed = time.perf_counter() - t0
+
+    print(format_report(report))
+    print(f"{args.games * len(levels)} games in {elapsed:.1f} s")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({str(k): v for k, v in report.items()}, f, indent=2)
+    return 0
+
+
+__all__ = ["game_seed", "scripted_policy", "play", "run", "summarize"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,674 @@
+"""Компактное хранение цепочки шаров.
+
+ChainBuffer держит цепочку «структурой массивов»: t — в массиве double,
+цвет — индексом палитры (uint8), тип шара — малым кодом (uint8).
+Снаружи буфер ведёт себя как список шаров: индексирование возвращает
+лёгкий вид BallView, который читает и пишет данные прямо в массивы,
+поэтому Game._on_hit, group_at и drop_indices работают без изменений.
+
+Цепочка делится на сегменты — подряд идущие шары, которые двигаются
+как единое целое. t шара хранится относительно смещения его сегмента
+и общего смещения всей цепочки, так что сдвиг сегмента или всей цепочки —
+это одно число, а не проход по шарам. Координаты шаров считаются лениво:
+только когда их запросили (столкновения, отрисовка), и только для
+сегментов, которые сдвинулись с прошлого запроса."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+from . import config as cfg
+from . import spiral as path_spiral
+from .entities import Ball
+
+Color = Tuple[int, int, int]
+
+
+# Коды типов шаров (хранятся в uint8)
+KINDS: Tuple[str, ...] = (
+    Ball.TYPE_NORMAL,
+    Ball.TYPE_SKULL,
+    cfg.PowerUp.TYPE_SLOW,
+    cfg.PowerUp.TYPE_REVERSE,
+    cfg.PowerUp.TYPE_FAST_SHOOT,
+    cfg.PowerUp.TYPE_EXPLOSION,
+    cfg.PowerUp.TYPE_BURST_SHOOT,
+)
+KIND_CODES: Dict[str, int] = {k: i for i, k in enumerate(KINDS)}
+KIND_NORMAL: int = KIND_CODES[Ball.TYPE_NORMAL]
+KIND_SKULL: int = KIND_CODES[Ball.TYPE_SKULL]
+
+
+def kind_code(kind: str) -> int:
+    try:
+        return KIND_CODES[str(kind)]
+    except KeyError:
+        raise ValueError(f"unknown ball kind: {kind!r}") from None
+
+
+class BallView(Ball):
+    """Шар цепочки как вид на строку буфера.
+
+Вид привязан к индексу: после вставки или удаления шаров перед ним
+он указывает уже на другой шар, поэтому долго его не храним."""
+
+    def __init__(self, buf: "ChainBuffer", index: int):
+        self._buf = buf
+        self._i = int(index)
+
+    @property
+    def index(self) -> int:
+        return self._i
+
+    @property
+    def t(self) -> float:
+        return self._buf.t_at(self._i)
+
+    @t.setter
+    def t(self, value: float) -> None:
+        self._buf.set_t(self._i, value)
+
+    @property
+    def pos(self) -> Tuple[float, float]:
+        return self._buf.pos_at(self._i)
+
+    @pos.setter
+    def pos(self, value) -> None:
+        self._buf._x[self._i] = float(value[0])
+        self._buf._y[self._i] = float(value[1])
+        self._buf._version += 1
+
+    @property
+    def color(self) -> Color:
+        return self._buf.palette[self._buf._color[self._i]]
+
+    @color.setter
+    def color(self, value) -> None:
+        self._buf.set_color(self._i, value)
+
+    @property
+    def kind(self) -> str:
+        return KINDS[self._buf._kind[self._i]]
+
+    @kind.setter
+    def kind(self, value: str) -> None:
+        self._buf._kind[self._i] = kind_code(value)
+
+    type = kind
+
+    @property
+    def radius(self) -> int:
+        return int(cfg.BALL_RADIUS)
+
+    def detach(self) -> Ball:
+        # Самостоятельная копия шара (не зависит от буфера)
+        return self._buf.ball(self._i)
+
+    def __repr__(self) -> str:
+        return (
+            f"BallView(index={self._i}, color={self.color}, "
+            f"t={self.t:.3f}, kind={self.kind!r})"
+            )
+
+
+class ChainBuffer:
+    """Цепочка шаров в виде параллельных массивов.
+
+Поддерживает операции списка (len, индексирование, срезы, insert,
+append, pop, del, итерация) и пакетные операции над всеми t сразу.
+Дополнительно ведётся индекс одноцветных серий: run_at(i) за O(1),
+и разбиение на сегменты: удаление шаров внутри сегмента разрывает его.
+Серии не выходят за границы сегментов."""
+
+    __slots__ = (
+        "_rel", "_x", "_y", "_color", "_kind", "_run_off", "_run_len",
+        "_seg_start", "_seg_off", "_seg_combo", "_seg_dirty", "_base",
+        "_pos_dirty", "_version",
+        "palette", "_palette_index", "__weakref__",
+        )
+
+    def __init__(self, balls: Iterable = (), *, palette: Sequence[Color] = ()):
+        # t шара = _rel[i] + смещение его сегмента + _base
+        self._rel = array("d")
+        self._base = 0.0
+        self._x = array("d")
+        self._y = array("d")
+        self._color = array("B")
+        self._kind = array("B")
+        # Индекс серий: смещение шара от начала его серии и длина серии
+        self._run_off = array("I")
+        self._run_len = array("I")
+        # Сегменты: индекс первого шара, смещение по t и глубина комбо,
+        # после которой сегмент откололся
+        self._seg_start = array("I")
+        self._seg_off = array("d")
+        self._seg_combo = array("B")
+        # Кэш координат: устаревшие сегменты и флаг «устарело всё»
+        self._seg_dirty = array("B")
+        self._pos_dirty = False
+        # Растёт при любом изменении координат или состава цепочки
+        # (по нему физика понимает, что её кэш устарел)
+        self._version = 0
+
+        self.palette: List[Color] = []
+        self._palette_index: Dict[Color, int] = {}
+        for col in (tuple(palette) or tuple(cfg.BALL_COLORS)) + (cfg.SKULL_COLOR,):
+            self.color_code(col)
+
+        self.extend(balls)
+
+    # --------------------------- палитра ---------------------------
+    def color_code(self, color) -> int:
+        col = tuple(int(c) for c in color)
+        code = self._palette_index.get(col)
+        if code is None:
+            if len(self.palette) >= 256:
+                raise ValueError("chain palette is full (256 colors)")
+            code = len(self.palette)
+            self.palette.append(col)
+            self._palette_index[col] = code
+        return code
+
+    def find_color_code(self, color) -> int:
+        # Код цвета без добавления в палитру: -1, если цвета в ней нет.
+        # Для чтения (наблюдения, оценки ходов), чтобы не менять буфер
+        return self._palette_index.get(tuple(int(c) for c in color), -1)
+
+    def _row(self, ball) -> Tuple[float, int, int]:
+        kind = getattr(ball, "kind", None) or getattr(ball, "type", Ball.TYPE_NORMAL)
+        return float(ball.t), self.color_code(ball.color), kind_code(kind)
+
+    # --------------------------- интерфейс списка ---------------------------
+    def __len__(self) -> int:
+        return len(self._rel)
+
+    def __iter__(self) -> Iterator[BallView]:
+        for i in range(len(self._rel)):
+            yield BallView(self, i)
+
+    def _index(self, i: int) -> int:
+        n = len(self._rel)
+        i = int(i)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("chain index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [BallView(self, j) for j in range(*i.indices(len(self._rel)))]
+        return BallView(self, self._index(i))
+
+    def __setitem__(self, i, ball) -> None:
+        i = self._index(i)
+        t, c, k = self._row(ball)
+        self._color[i] = c
+        self._kind[i] = k
+        self.set_t(i, t)
+        self._relabel(i - 1, i + 1)
+
+    def __delitem__(self, i) -> None:
+        n = len(self._rel)
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(n)
+            if step != 1:
+                for j in sorted(range(lo, hi, step), reverse=True):
+                    del self[j]
+                return
+        else:
+            lo = self._index(i)
+            hi = lo + 1
+        if hi <= lo:
+            return
+
+        # Шары по обе стороны удалённого участка были в одном сегменте —
+        # значит, сегмент разорван
+        split = 0 < lo and hi < n and self.segment_of(lo - 1) == self.segment_of(hi)
+
+        for arr in self._arrays():
+            del arr[lo:hi]
+        self._version += 1
+        self._cut_segments(lo, hi)
+        if split:
+            self.split(lo)
+        self._relabel(lo - 1, lo)
+
+    def insert(self, i: int, ball) -> None:
+        n = len(self._rel)
+        i = int(i)
+        if i < 0:
+            i = max(0, n + i)
+        i = min(i, n)
+        t, c, k = self._row(ball)
+
+        if n == 0:
+            self._add_segment(0, 0, 0.0)
+            seg = 0
+        else:
+            # Шар входит в сегмент того шара, перед которым встаёт
+            seg = self.segment_of(min(i, n - 1))
+            for k2 in range(seg + 1, len(self._seg_start)):
+                self._seg_start[k2] += 1
+
+        x, y = path_spiral.xy(t)
+        self._rel.insert(i, t - self._seg_off[seg] - self._base)
+        self._x.insert(i, x)
+        self._y.insert(i, y)
+        self._color.insert(i, c)
+        self._kind.insert(i, k)
+        self._run_off.insert(i, 0)
+        self._run_len.insert(i, 1)
+        self._version += 1
+        self._relabel(i - 1, i + 1)
+
+    def append(self, ball) -> None:
+        self.insert(len(self._rel), ball)
+
+    def extend(self, balls: Iterable) -> None:
+        rows = [self._row(b) for b in balls]
+        if not rows:
+            return
+        if not self._seg_start:
+            self._add_segment(0, 0, 0.0)
+        off = self._seg_off[-1] + self._base
+
+        ts = [r[0] for r in rows]
+        xs, ys = path_spiral.xy_many(ts)
+        start = len(self._rel)
+        self._rel.extend(t - off for t in ts)
+        self._x.extend(float(x) for x in xs)
+        self._y.extend(float(y) for y in ys)
+        self._color.extend(r[1] for r in rows)
+        self._kind.extend(r[2] for r in rows)
+        self._run_off.extend(array("I", [0]) * len(rows))
+        self._run_len.extend(array("I", [1]) * len(rows))
+        self._version += 1
+        self._relabel(start, len(self._rel) - 1)
+
+    def pop(self, i: int = -1) -> Ball:
+        i = self._index(i)
+        ball = self.ball(i)
+        del self[i]
+        return ball
+
+    def clear(self) -> None:
+        del self[:]
+
+    def ball(self, i: int) -> Ball:
+        i = self._index(i)
+        return Ball(
+            color=self.palette[self._color[i]], t=self.t_at(i),
+            ball_type=KINDS[self._kind[i]]
+            )
+
+    def to_balls(self) -> List[Ball]:
+        return [self.ball(i) for i in range(len(self._rel))]
+
+    def __repr__(self) -> str:
+        return (
+            f"ChainBuffer(len={len(self._rel)}, "
+            f"segments={len(self._seg_start)})"
+            )
+
+    # --------------------------- индекс серий ---------------------------
+    # Смещения внутри серии относительные, поэтому вставка и удаление
+    # сдвигают индексы без правки чужих серий: переразмечаются только
+    # серии, которые задела операция.
+
+    def _arrays(self) -> Tuple[array, ...]:
+        return (
+            self._rel, self._x, self._y, self._color, self._kind,
+            self._run_off, self._run_len,
+            )
+
+    def _seg_span(self, i: int) -> Tuple[int, int]:
+        # Первый и последний индекс сегмента, в котором лежит шар i
+        if not self._seg_start:
+            return 0, len(self._rel) - 1
+        lo, hi = self.segment_bounds(self.segment_of(i))
+        return lo, hi - 1
+
+    def _relabel(self, lo: int, hi: int) -> None:
+        # Переразмечает все серии, пересекающие отрезок [lo, hi].
+        # Серия не переходит через начало сегмента: одноцветные шары
+        # по разные стороны разрыва — разные серии
+        col = self._color
+        n = len(col)
+        lo = max(0, lo)
+        hi = min(n - 1, hi)
+        if lo > hi:
+            return
+        first = self._seg_span(lo)[0]
+        while lo > first and col[lo - 1] == col[lo]:
+            lo -= 1
+        last = self._seg_span(hi)[1]
+        while hi < last and col[hi + 1] == col[hi]:
+            hi += 1
+
+        i = lo
+        while i <= hi:
+            c = col[i]
+            end = min(hi, self._seg_span(i)[1])
+            j = i
+            while j < end and col[j + 1] == c:
+                j += 1
+            length = j - i + 1
+            self._run_off[i:j + 1] = array("I", range(length))
+            self._run_len[i:j + 1] = array("I", [length]) * length
+            i = j + 1
+
+    # --------------------------- сегменты ---------------------------
+    @property
+    def segment_count(self) -> int:
+        return len(self._seg_start)
+
+    def segment_of(self, i: int) -> int:
+        # Номер сегмента, в котором лежит шар i (бинарный поиск по началам)
+        return bisect_right(self._seg_start, i) - 1
+
+    def segment_bounds(self, k: int) -> Tuple[int, int]:
+        # Полуинтервал индексов [lo, hi) сегмента k
+        lo = self._seg_start[k]
+        hi = (
+            self._seg_start[k + 1] if k + 1 < len(self._seg_start)
+            else len(self._rel)
+            )
+        return lo, hi
+
+    def segments(self) -> Iterator[Tuple[int, int, float]]:
+        # Все сегменты по порядку: (начало, конец, смещение по t)
+        for k in range(len(self._seg_start)):
+            lo, hi = self.segment_bounds(k)
+            yield lo, hi, self._seg_off[k]
+
+    def segment_combo(self, k: int) -> int:
+        return self._seg_combo[k]
+
+    def set_segment_combo(self, k: int, depth: int) -> None:
+        self._seg_combo[k] = max(0, min(255, int(depth)))
+
+    def shift_segment(self, k: int, delta: float) -> None:
+        # Сдвиг одного сегмента — O(1), позиции пересчитаются по запросу
+        self._seg_off[k] += float(delta)
+        self._seg_dirty[k] = 1
+        self._version += 1
+
+    def _seg_arrays(self) -> Tuple[array, ...]:
+        return self._seg_start, self._seg_off, self._seg_combo, self._seg_dirty
+
+    def _add_segment(
+            self, k: int, start: int, off: float, combo: int = 0, dirty: int = 0
+            ) -> None:
+        self._seg_start.insert(k, start)
+        self._seg_off.insert(k, off)
+        self._seg_combo.insert(k, max(0, min(255, int(combo))))
+        self._seg_dirty.insert(k, dirty)
+
+    def _drop_segment(self, k: int) -> None:
+        for arr in self._seg_arrays():
+            del arr[k]
+
+    def split(self, i: int, *, combo: int = 0) -> int:
+        # Делает шар i началом нового сегмента; возвращает его номер
+        i = self._index(i)
+        k = self.segment_of(i)
+        if self._seg_start[k] == i:
+            return k
+        self._add_segment(
+            k + 1, i, self._seg_off[k], combo, self._seg_dirty[k]
+            )
+        self._relabel(i - 1, i)
+        return k + 1
+
+    def join(self, k: int) -> None:
+        # Сливает сегмент k с предыдущим: его t переводятся на смещение
+        # сегмента k-1 (O(шаров сегмента k), только в момент стыковки)
+        if not 0 < k < len(self._seg_start):
+            return
+        lo, hi = self.segment_bounds(k)
+        delta = self._seg_off[k] - self._seg_off[k - 1]
+        if delta:
+            rel = self._rel
+            rel[lo:hi] = array("d", (rel[i] + delta for i in range(lo, hi)))
+        if self._seg_dirty[k]:
+            self._seg_dirty[k - 1] = 1
+        self._drop_segment(k)
+        self._relabel(lo - 1, lo)
+
+    def _cut_segments(self, lo: int, hi: int) -> None:
+        # Поправляет начала сегментов после удаления шаров [lo, hi)
+        removed = hi - lo
+        n = len(self._rel)
+        starts = self._seg_start
+        k = 0
+        while k < len(starts):
+            s = starts[k]
+            if s >= hi:
+                starts[k] = s - removed
+            elif s >= lo:
+                seg_end = starts[k + 1] if k + 1 < len(starts) else n + removed
+                if seg_end <= hi:
+                    # сегмент удалён целиком
+                    self._drop_segment(k)
+                    continue
+                starts[k] = lo
+            k += 1
+        if starts and starts[0] != 0:
+            # Голова удалена: первый оставшийся сегмент начинается с 0
+            starts[0] = 0
+        if n == 0:
+            for arr in self._seg_arrays():
+                del arr[:]
+            self._base = 0.0
+        # Несколько сегментов могли съехаться в одно начало — оставляем последний
+        k = 1
+        while k < len(starts):
+            if starts[k] == starts[k - 1]:
+                self._drop_segment(k - 1)
+                continue
+            k += 1
+
+    # --------------------------- доступ к полям ---------------------------
+    def t_at(self, i: int) -> float:
+        return self._rel[i] + self._seg_off[self.segment_of(i)] + self._base
+
+    def ordered(self) -> bool:
+        # Шары упорядочены по t. Внутри сегмента порядок держит reflow,
+        # поэтому проверяются только стыки сегментов — O(число сегментов).
+        # Проверка для тестов и отладки, игровой код её не вызывает
+        starts, offs, rel = self._seg_start, self._seg_off, self._rel
+        return all(
+            rel[starts[k] - 1] + offs[k - 1] <= rel[starts[k]] + offs[k]
+            for k in range(1, len(starts))
+            )
+
+    def bisect_t(self, t: float) -> int:
+        # Индекс первого шара с t >= заданного (шары упорядочены по t):
+        # двоичный поиск сначала по головам сегментов, затем внутри сегмента
+        starts, offs, rel = self._seg_start, self._seg_off, self._rel
+        t = float(t) - self._base
+        lo, hi = 0, len(starts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if rel[starts[mid]] + offs[mid] < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        k = lo - 1
+        if k < 0:
+            return 0
+        a, b = self.segment_bounds(k)
+        return bisect_left(rel, t - offs[k], a, b)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def offset(self) -> float:
+        # Общее смещение всей цепочки по t
+        return self._base
+
+    def _abs_ts(self, lo: int, hi: int, k: int) -> array:
+        # Абсолютные t шаров [lo, hi) внутри сегмента k
+        off = self._seg_off[k] + self._base
+        if not off:
+            return self._rel[lo:hi]
+        return array("d", map(off.__add__, self._rel[lo:hi]))
+
+    @property
+    def ts(self) -> array:
+        # Абсолютные t всех шаров (новый массив; менять через set_t/set_ts)
+        out = array("d")
+        for k in range(len(self._seg_start)):
+            lo, hi = self.segment_bounds(k)
+            out.extend(self._abs_ts(lo, hi, k))
+        return out
+
+    def t_parts(self) -> Tuple[array, List[Tuple[int, float]]]:
+        # Сырые данные для пакетного подсчёта t снаружи: относительные t
+        # (только для чтения) и сегменты как (число шаров, смещение);
+        # t шара = rel[i] + смещение его сегмента
+        segs = []
+        for k in range(len(self._seg_start)):
+            lo, hi = self.segment_bounds(k)
+            segs.append((hi - lo, self._seg_off[k] + self._base))
+        return self._rel, segs
+
+    @property
+    def color_codes(self) -> array:
+        return self._color
+
+    @property
+    def kind_codes(self) -> array:
+        return self._kind
+
+    def run_at(self, i: int) -> Tuple[int, int]:
+        # Одноцветная серия (внутри сегмента), в которую входит шар i:
+        # (начало, длина)
+        i = self._index(i)
+        return i - self._run_off[i], self._run_len[i]
+
+    def runs(self) -> Iterator[Tuple[int, int, int]]:
+        # Все серии по порядку: (начало, длина, код цвета)
+        i, n = 0, len(self._rel)
+        while i < n:
+            length = self._run_len[i]
+            yield i, length, self._color[i]
+            i += length
+
+    def _write_positions(self, lo: int, hi: int, ts) -> None:
+        xs, ys = path_spiral.xy_many(ts)
+        if np is not None:
+            np.frombuffer(self._x, dtype=np.float64)[lo:hi] = xs
+            np.frombuffer(self._y, dtype=np.float64)[lo:hi] = ys
+            return
+        self._x[lo:hi] = array("d", xs)
+        self._y[lo:hi] = array("d", ys)
+
+    def _refresh_positions(self) -> None:
+        # Пересчитывает координаты только у сдвинувшихся сегментов.
+        # До следующего сдвига результат кэширован — в кадре это один проход.
+        every = self._pos_dirty
+        self._pos_dirty = False
+        dirty = self._seg_dirty
+        for k in range(len(self._seg_start)):
+            if not (every or dirty[k]):
+                continue
+            dirty[k] = 0
+            lo, hi = self.segment_bounds(k)
+            if hi > lo:
+                self._write_positions(lo, hi, self._abs_ts(lo, hi, k))
+
+    def positions(self) -> Tuple[array, array]:
+        # Массивы x и y всех шаров (только для чтения)
+        self._refresh_positions()
+        return self._x, self._y
+
+    def pos_at(self, i: int) -> Tuple[float, float]:
+        k = self.segment_of(i)
+        if self._pos_dirty or self._seg_dirty[k]:
+            self._refresh_positions()
+        return (self._x[i], self._y[i])
+
+    def set_t(self, i: int, t: float) -> None:
+        t = float(t)
+        k = self.segment_of(i)
+        self._rel[i] = t - self._seg_off[k] - self._base
+        self._version += 1
+        if not (self._pos_dirty or self._seg_dirty[k]):
+            x, y = path_spiral.xy(t)
+            self._x[i] = x
+            self._y[i] = y
+
+    def set_color(self, i: int, color) -> None:
+        i = self._index(i)
+        self._color[i] = self.color_code(color)
+        self._relabel(i - 1, i + 1)
+
+    # --------------------------- пакетные операции ---------------------------
+    def set_ts(self, ts: Sequence[float], start: int = 0) -> None:
+        # Записывает абсолютные t подряд начиная с индекса start и
+        # пересчитывает их позиции одним вызовом spiral.xy_many
+        n = len(ts)
+        if n == 0:
+            return
+        end = start + n
+        if start < 0 or end > len(self._rel):
+            raise IndexError("set_ts range out of chain bounds")
+        self._version += 1
+
+        k = self.segment_of(start)
+        i = start
+        while i < end:
+            _, seg_hi = self.segment_bounds(k)
+            hi = min(seg_hi, end)
+            off = self._seg_off[k] + self._base
+            piece = [float(ts[j - start]) for j in range(i, hi)]
+            self._rel[i:hi] = array("d", (t - off for t in piece))
+            if not (self._pos_dirty or self._seg_dirty[k]):
+                self._write_positions(i, hi, piece)
+            i = hi
+            k += 1
+
+    def shift(self, delta: float) -> None:
+        # Сдвигает всю цепочку: O(1) — меняется только общее смещение
+        if not self._rel:
+            return
+        self._base += float(delta)
+        self._pos_dirty = True
+        self._version += 1
+
+    # --------------------------- снимки ---------------------------
+    def snapshot(self) -> tuple:
+        # Плоский снимок состояния: копии массивов и скаляры.
+        # Снимок не меняется, из него можно восстанавливаться много раз
+        return (
+            tuple(a[:] for a in self._arrays() + self._seg_arrays()),
+            self._base, self._pos_dirty, tuple(self.palette),
+            )
+
+    def restore(self, snap: tuple) -> None:
+        # Возвращает буфер к снимку (в том числе снятому с другого буфера)
+        arrays, base, pos_dirty, palette = snap
+        (self._rel, self._x, self._y, self._color, self._kind,
+         self._run_off, self._run_len, self._seg_start, self._seg_off,
+         self._seg_combo, self._seg_dirty) = (a[:] for a in arrays)
+        self._base = base
+        self._pos_dirty = pos_dirty
+        if tuple(self.palette) != palette:
+            self.palette = list(palette)
+            self._palette_index = {c: i for i, c in enumerate(palette)}
+        # версия только растёт: кэши физики от прежнего состояния
+        # не должны принять восстановленное за своё
+        self._version += 1
+
+
+__all__ = ["ChainBuffer", "BallView", "KINDS", "KIND_CODES", "kind_code"]
@@ -4,28 +4,49 @@
 - выравнивания цепочки по расстоянию между шарами,
 - продвижения шаров по спирали,
 - добавления новых шаров в цепочки,
-- поиска одноцветных групп и удаления шаров."""
+- поиска одноцветных групп и удаления шаров,
+- каскадного схлопывания групп после закрытия разрыва,
+- движения и стыковки сегментов цепочки."""
 from __future__ import annotations
 
 import random
-from typing import List, Sequence, Optional
+from typing import List, Sequence, Optional, Tuple, Union
 
 from . import config as cfg
 from . import spiral as path_spiral
 
+from .buffer import ChainBuffer
 from .entities import Ball
 
+Chain = Union[ChainBuffer, List[Ball]]
+
 
 def _gap_t(spacing_px: float) -> float:
     # Переводим расстояние в пикселях в шаг t спирали
     return float(spacing_px) / float(cfg.SPIRAL_TIGHTNESS)
 
 
+def _place(balls: Chain, ts: Sequence[float], start: int = 0) -> None:
+    # Записывает t и позиции подряд идущим шарам начиная с start:
+    # координаты считаются одним пакетным вызовом spiral.xy_many
+    if isinstance(balls, ChainBuffer):
+        balls.set_ts(ts, start=start)
+        return
+    xs, ys = path_spiral.xy_many(ts)
+    for b, t, x, y in zip(balls[start:start + len(ts)], ts, xs, ys):
+        b.t = float(t)
+        b.pos = (float(x), float(y))
+
+
 def reflow(
-        chain: List[Ball], *, spacing_px: Optional[float] = None,
-          t0: Optional[float] = None
+        chain: Chain, *, spacing_px: Optional[float] = None,
+          t0: Optional[float] = None, start: int = 0, forward: bool = True
           ) -> None:
-    # Выравнивает цепочку по заданному расстоянию между шарами
+    # Выравнивает цепочку по заданному расстоянию между шарами.
+    # Шар start остаётся на месте (или ставится в t0), пересчитываются
+    # только шары после него (forward) либо перед ним (not forward):
+    # остальная часть цепочки не трогается. У буфера выравнивание
+    # не выходит за пределы сегмента шара start.
     if not chain:
         return
 
@@ -33,30 +54,111 @@ def reflow(
         cfg.BALL_DIAMETER + 
         cfg.BALL_SPACING if spacing_px is None else spacing_px
         )
-    cur_t = float(chain[0].t if t0 is None else t0)
+    n = len(chain)
+    start = min(max(0, int(start)), n - 1)
+    cur_t = float(chain[start].t if t0 is None else t0)
+
+    lo, hi = 0, n
+    if isinstance(chain, ChainBuffer):
+        lo, hi = chain.segment_bounds(chain.segment_of(start))
+
+    if forward:
+        ts = [cur_t]
+        for _ in range(hi - 1 - start):
+            cur_t = path_spiral.step_t(cur_t, spacing_px, forward=True)
+            ts.append(cur_t)
+        _place(chain, ts, start)
+        return
+
+    ts = [cur_t]
+    for _ in range(start - lo):
+        cur_t = path_spiral.step_t(cur_t, spacing_px, forward=False)
+        ts.append(cur_t)
+    ts.reverse()
+    _place(chain, ts, lo)
+
+
+def _segment_head(chain: Chain, i: int) -> bool:
+    # Начинает ли шар i сегмент (у списка сегмент один)
+    if isinstance(chain, ChainBuffer):
+        return chain.segment_bounds(chain.segment_of(i))[0] == i
+    return i == 0
+
+
+def insert_at(
+        chain: Chain, index: int, ball, *, spacing_px: Optional[float] = None
+        ) -> None:
+    # Вставляет шар перед шаром index и раздвигает только хвост его сегмента
+    if not chain:
+        chain.insert(0, ball)
+        return
+    index = min(max(0, int(index)), len(chain))
+    t0 = float(chain[min(index, len(chain) - 1)].t)
+    chain.insert(index, ball)
+    if _segment_head(chain, index):
+        # Новый шар встаёт на место головы сегмента и толкает её вперёд
+        reflow(chain, spacing_px=spacing_px, start=index, t0=t0)
+    else:
+        reflow(chain, spacing_px=spacing_px, start=index - 1)
+    if isinstance(chain, ChainBuffer):
+        _push_front(chain, chain.segment_of(index), spacing_px)
 
-    chain[0].t = cur_t
-    chain[0].pos = (
-        chain[0].calculate_position() 
-        if hasattr(chain[0], "calculate_position") 
-        else path_spiral.xy(cur_t)
+
+def _push_front(
+        chain: ChainBuffer, k: int, spacing_px: Optional[float] = None
+        ) -> None:
+    # Хвост сегмента k после раздвижки мог наехать на следующий сегмент:
+    # сдвигаем следующие сегменты вперёд ровно до касания, чтобы t
+    # оставались упорядоченными. Стыковка и проверка совпадения на стыке
+    # случатся в advance_segments: касающиеся сегменты там сливаются.
+    spacing_px = float(
+        cfg.BALL_DIAMETER + cfg.BALL_SPACING
+        if spacing_px is None else spacing_px
         )
+    while k + 1 < chain.segment_count:
+        lo, _ = chain.segment_bounds(k + 1)
+        need = path_spiral.step_t(chain.t_at(lo - 1), spacing_px, forward=True)
+        front_t = chain.t_at(lo)
+        if front_t >= need:
+            return
+        chain.shift_segment(k + 1, need - front_t)
+        k += 1
 
-    for b in chain[1:]:
-        cur_t = path_spiral.step_t(cur_t, spacing_px, forward=True)
-        b.t = float(cur_t)
-        b.pos = (
-            b.calculate_position() 
-            if hasattr(b, "calculate_position") 
-            else path_spiral.xy(cur_t)
-            )
+
+def insertion_index(chain: Chain, index: int, point) -> int:
+    # Куда вставлять шар, коснувшийся шара index в точке point:
+    # перед ним или после него по ходу спирали. Вставка после
+    # допускается только внутри сегмента шара index.
+    n = len(chain)
+    if not 0 <= index < n - 1 or _segment_head(chain, index + 1):
+        return index
+    bx, by = chain[index].pos
+    tx, ty = path_spiral.tangent(float(chain[index].t))
+    if (float(point[0]) - bx) * tx + (float(point[1]) - by) * ty > 0.0:
+        return index + 1
+    return index
+
+
+def close_gap(
+        chain: Chain, index: int, *, spacing_px: Optional[float] = None
+        ) -> None:
+    # Сразу закрывает разрыв перед шаром index: сегменты стыкуются,
+    # шары за разрывом подтягиваются к шару index-1
+    if not 0 < index < len(chain):
+        return
+    if isinstance(chain, ChainBuffer) and _segment_head(chain, index):
+        chain.join(chain.segment_of(index))
+    reflow(chain, spacing_px=spacing_px, start=index - 1)
 
 
 def prepend_wave(
-        chain: List[Ball], count: int, *,
-        skull_rate: Optional[float] = None, palette: Sequence = ()
+        chain: Chain, count: int, *,
+        skull_rate: Optional[float] = None, palette: Sequence = (),
+        rng=None
         ) -> None:
-    # Добавляет новые шары в начало цепочки
+    # Добавляет новые шары в начало цепочки.
+    # rng — генератор сессии (random.Random); по умолчанию модуль random
+    rng = random if rng is None else rng
     skull_rate = (
         cfg.SKULL_SPAWN_CHANCE 
         if skull_rate is None 
@@ -70,16 +172,26 @@ def prepend_wave(
 
     for i in range(int(count)):
         t = head_t - (i + 1) * step_t
-        is_skull = random.random() < skull_rate
+        is_skull = rng.random() < skull_rate
         btype = Ball.TYPE_SKULL if is_skull else Ball.TYPE_NORMAL
-        col = cfg.SKULL_COLOR if is_skull else random.choice(colors)
+        col = cfg.SKULL_COLOR if is_skull else rng.choice(colors)
         chain.insert(0, Ball(color=col, t=t, ball_type=btype))
 
 
-def advance(chain: List[Ball], dt: float, speed: float) -> str | None:
+def advance(chain: Chain, dt: float, speed: float) -> str | None:
     # двигает шары и проверяет конец цепочки
-    for b in chain:
-        b.update(float(dt), speed=float(speed))
+    dt = float(dt)
+    speed = float(speed)
+    if isinstance(chain, ChainBuffer):
+        chain.shift(dt * speed)
+    elif all(type(b) is Ball for b in chain):
+        # Все шары сдвигаются на одно и то же dt*speed — пересчитываем
+        # позиции пачкой, а не вызовом Ball.update на каждый шар
+        shift = dt * speed
+        _place(chain, [b.t + shift for b in chain])
+    else:
+        for b in chain:
+            b.update(dt, speed=speed)
 
     end_t = (
         (cfg.SPIRAL_START_RADIUS - cfg.SPIRAL_END_RADIUS)
@@ -90,30 +202,194 @@ def advance(chain: List[Ball], dt: float, speed: float) -> str | None:
     return None
 
 
-def group_at(chain: List[Ball], index: int) -> List[int]:
+def group_at(chain: Chain, index: int) -> List[int]:
     # ищет группу шаров
     if index < 0 or index >= len(chain):
         return []
 
-    wanted = chain[index].color
-    lo = index
-    hi = index
+    if isinstance(chain, ChainBuffer):
+        # Индекс серий буфера отвечает за O(1)
+        lo, length = chain.run_at(index)
+        hi = lo + length - 1
+    else:
+        wanted = chain[index].color
+        lo = index
+        hi = index
 
-    while lo - 1 >= 0 and chain[lo - 1].color == wanted:
-        lo -= 1
-    while hi + 1 < len(chain) and chain[hi + 1].color == wanted:
-        hi += 1
+        while lo - 1 >= 0 and chain[lo - 1].color == wanted:
+            lo -= 1
+        while hi + 1 < len(chain) and chain[hi + 1].color == wanted:
+            hi += 1
 
     if (hi - lo + 1) < int(cfg.MIN_MATCH):
         return []
     return list(range(lo, hi + 1))
 
 
-def drop_indices(chain: List[Ball], indices: List[int]) -> int:
+def match_size(chain: Chain, index: int, color) -> int:
+    # Размер одноцветной группы, которая получится, если вставить шар
+    # цвета color перед шаром index (index == len(chain) — в конец).
+    # Нужна ботам для оценки кандидатов выстрела.
+    n = len(chain)
+    index = min(max(0, int(index)), n)
+
+    if isinstance(chain, ChainBuffer):
+        code = chain.find_color_code(color)
+        codes = chain.color_codes
+        size = 1
+        if index > 0 and codes[index - 1] == code:
+            lo, _ = chain.run_at(index - 1)
+            size += index - lo
+        if index < n and codes[index] == code:
+            lo, length = chain.run_at(index)
+            size += lo + length - index
+        return size
+
+    color = tuple(color)
+    size = 1
+    i = index - 1
+    while i >= 0 and tuple(chain[i].color) == color:
+        size += 1
+        i -= 1
+    i = index
+    while i < n and tuple(chain[i].color) == color:
+        size += 1
+        i += 1
+    return size
+
+
+def _spans(indices: Sequence[int], n: int) -> List[tuple]:
+    # Склеивает индексы в непрерывные полуинтервалы [lo, hi)
+    spans: List[tuple] = []
+    for i in sorted(set(int(i) for i in indices)):
+        if not 0 <= i < n:
+            continue
+        if spans and spans[-1][1] == i:
+            spans[-1] = (spans[-1][0], i + 1)
+        else:
+            spans.append((i, i + 1))
+    return spans
+
+
+def drop_indices(chain: Chain, indices: Sequence[int]) -> List[Ball]:
+    # Удаляет шары по индексам: каждый непрерывный участок — одним срезом.
+    # Возвращает удалённые шары (в порядке цепочки) для очков, эффектов и т.п.
     if not indices:
-        return 0
+        return []
+
+    spans = _spans(indices, len(chain))
+    removed: List[Ball] = []
+    for lo, hi in spans:
+        if isinstance(chain, ChainBuffer):
+            removed.extend(chain.ball(i) for i in range(lo, hi))
+        else:
+            removed.extend(chain[lo:hi])
+
+    for lo, hi in reversed(spans):
+        del chain[lo:hi]
+    return removed
+
+
+def _same_color(chain: Chain, i: int, j: int) -> bool:
+    if isinstance(chain, ChainBuffer):
+        codes = chain.color_codes
+        return codes[i] == codes[j]
+    return tuple(chain[i].color) == tuple(chain[j].color)
+
+
+def cascade(
+        chain: Chain, index: int, *, spacing_px: Optional[float] = None,
+        close_gaps: bool = True
+        ) -> List[int]:
+    # Убирает группу в точке index и затем цепную реакцию: пока шары,
+    # сошедшиеся через закрытый разрыв, одного цвета и их серия набирает
+    # MIN_MATCH — удаляем и её. Проверяется только стык, а не вся цепочка:
+    # серии у буфера сливаются инкрементально при удалении.
+    # Без close_gaps разрыв остаётся открытым: убирается только первая
+    # волна, а продолжение случится, когда сегменты состыкуются
+    # (см. advance_segments).
+    # Возвращает размеры удалённых волн; len(...) — глубина комбо.
+    waves: List[int] = []
+    group = group_at(chain, index)
+    junction = -1
+    while group:
+        lo = group[0]
+        waves.append(len(drop_indices(chain, group)))
+        junction = lo
+        if lo <= 0 or lo >= len(chain):
+            break
+        if not close_gaps:
+            if isinstance(chain, ChainBuffer) and _segment_head(chain, lo):
+                chain.set_segment_combo(chain.segment_of(lo), len(waves))
+            break
+        if isinstance(chain, ChainBuffer) and _segment_head(chain, lo):
+            chain.join(chain.segment_of(lo))
+        if not _same_color(chain, lo - 1, lo):
+            break
+        group = group_at(chain, lo)
+
+    # Геометрию закрываем один раз — от самого левого стыка
+    if close_gaps and waves and 0 < junction < len(chain):
+        reflow(chain, spacing_px=spacing_px, start=junction - 1)
+    return waves
+
+
+def advance_segments(
+        chain: ChainBuffer, dt: float, speed: float, *,
+        spacing_px: Optional[float] = None, pull_speed: Optional[float] = None
+        ) -> List[Tuple[int, int]]:
+    # Двигает сегменты цепочки за кадр — O(сегментов), а не O(шаров):
+    # - задний сегмент (голова буфера, у входа спирали) едет со скоростью
+    #   speed и толкает передние, когда догоняет их;
+    # - передние сегменты стоят, но если на концах разрыва одинаковый
+    #   цвет — откатываются назад со скоростью pull_speed;
+    # - коснувшиеся сегменты стыкуются; если на стыке набирается
+    #   MIN_MATCH, группа удаляется — это следующая волна комбо.
+    # Возвращает волны комбо: (сколько шаров удалено, глубина).
+    waves: List[Tuple[int, int]] = []
+    if not chain:
+        return waves
+
+    spacing_px = float(
+        cfg.BALL_DIAMETER + cfg.BALL_SPACING
+        if spacing_px is None else spacing_px
+        )
+    pull = float(cfg.SEGMENT_PULL_SPEED if pull_speed is None else pull_speed)
+    dt = float(dt)
+
+    chain.shift_segment(0, dt * float(speed))
+    codes = chain.color_codes
+    for k in range(1, chain.segment_count):
+        lo, _ = chain.segment_bounds(k)
+        if codes[lo - 1] == codes[lo]:
+            chain.shift_segment(k, -pull * dt)
+
+    k = 1
+    while k < chain.segment_count:
+        lo, _ = chain.segment_bounds(k)
+        rear_t, front_t = chain.t_at(lo - 1), chain.t_at(lo)
+        touching = (
+            front_t <= rear_t
+            or path_spiral.chord_length(rear_t, front_t) <= spacing_px + 0.5
+            )
+        if not touching:
+            k += 1
+            continue
+
+        depth = chain.segment_combo(k)
+        chain.join(k)
+        reflow(chain, spacing_px=spacing_px, start=lo - 1)
+        if codes[lo - 1] != codes[lo]:
+            continue
 
-    for i in sorted(set(indices), reverse=True):
-        if 0 <= i < len(chain):
-            del chain[i]
-    return len(indices)
+        group = group_at(chain, lo)
+        if not group:
+            continue
+        depth += 1
+        waves.append((len(drop_indices(chain, group)), depth))
+        g_lo = group[0]
+        if 0 < g_lo < len(chain) and _segment_head(chain, g_lo):
+            # Новый разрыв помнит глубину комбо, которая его создала
+            chain.set_segment_combo(chain.segment_of(g_lo), depth)
+            k = chain.segment_of(g_lo) + 1
+    return waves
@@ -31,6 +31,9 @@ class PowerUp:
 WIDTH: int = 800
 HEIGHT: int = 600
 FPS: int = 60
+# частота шага симуляции (Гц) и предел шагов догонки за один кадр
+SIM_HZ: int = 120
+MAX_CATCHUP_STEPS: int = 8
 
 
 # ---------------------------------------------------------------------------
@@ -60,6 +63,10 @@ BALL_SPACING: int = 2
 MIN_MATCH: int = 3
 POINTS_PER_BALL: int = 10
 
+# скорость (по t в секунду), с которой передний сегмент откатывается
+# к заднему, если на концах разрыва шары одного цвета
+SEGMENT_PULL_SPEED: float = 4.0
+
 
 # ---------------------------------------------------------------------------
 # Спиральная траектория
@@ -120,6 +127,10 @@ FROG_Y: int = HEIGHT // 2
 FROG_RADIUS: int = 20
 FROG_ROTATION_SPEED: int = 180
 SHOT_SPEED: int = 250
+# слотов в пуле снарядов (пул растёт, если их не хватает)
+PROJECTILE_POOL_SIZE: int = 32
+# число секторов угла в таблице мгновенного выстрела (hitscan)
+HITSCAN_ANGLE_BINS: int = 1024
 
 
 # ---------------------------------------------------------------------------
@@ -1,15 +1,20 @@
 """Сущности игры.
 
-Ball — шар в цепочке, FlyingBall — снаряд, Frog — пушка"""
+Ball — шар в цепочке, FlyingBall — снаряд, ProjectilePool — снаряды
+в полёте, Frog — пушка"""
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
 from typing import Tuple, Iterable, Union
 
-try:
-    import pygame  # type: ignore
-except Exception:  # pragma: no cover
-    pygame = None  # type: ignore
+
+def loaded_pygame():
+    # pygame берём, только если его уже загрузило приложение (main.py).
+    # Сами сущности его не импортируют: headless-режим (zuma.env)
+    # работает без pygame.
+    return sys.modules.get("pygame")
+
 
 from . import config as cfg
 from . import spiral as path_spiral
@@ -57,10 +62,14 @@ class Ball:
         self.t += float(dt) * v
         self.pos = self._xy(self.t)
 
-    def draw(self, screen) -> None:  # pragma: no cover
+    def draw(self, screen, pos: Point | None = None) -> None:  # pragma: no cover
+        # pos — позиция для отрисовки (например, интерполированная)
+        pygame = loaded_pygame()
         if pygame is None:
             return
-        x, y = int(self.pos[0]), int(self.pos[1])
+        if pos is None:
+            pos = self.pos
+        x, y = int(pos[0]), int(pos[1])
 
         is_skull = self.type == self.TYPE_SKULL
         fill = cfg.SKULL_COLOR if is_skull else self.color
@@ -126,17 +135,13 @@ import math
 from dataclasses import dataclass
 from typing import List, Tuple
 
-try:
-    import pygame  # type: ignore
-except Exception:  # pragma: no cover
-    pygame = None  # type: ignore
-
 from . import config as cfg
 
 
 @dataclass
 class FlyingBall:
     pos: List[float]
+    prev_pos: Tuple[float, float]
     vx: float
     vy: float
     color: Tuple[int, int, int]
@@ -157,6 +162,9 @@ class FlyingBall:
         ball_type: str = "normal",
     ) -> None:
         self.pos = [float(x), float(y)]
+        # позиция в начале последнего шага: отрезок prev_pos → pos
+        # проверяется на столкновение целиком (swept-проверка)
+        self.prev_pos = (self.pos[0], self.pos[1])
 
         mag = math.hypot(dx, dy)
         if mag <= 1e-9:
@@ -172,13 +180,17 @@ class FlyingBall:
         self.kind = self.type
 
     def update(self, dt: float) -> None:
+        self.prev_pos = (self.pos[0], self.pos[1])
         self.pos[0] += self.vx * self.speed * float(dt)
         self.pos[1] += self.vy * self.speed * float(dt)
 
-    def draw(self, screen) -> None:  # pragma: no cover
+    def draw(self, screen, pos: Point | None = None) -> None:  # pragma: no cover
+        pygame = loaded_pygame()
         if pygame is None:
             return
-        x, y = int(self.pos[0]), int(self.pos[1])
+        if pos is None:
+            pos = self.pos
+        x, y = int(pos[0]), int(pos[1])
         pygame.draw.circle(screen, self.color, (x, y), int(self.radius))
         pygame.draw.circle(screen, (15, 15, 18), (x, y), int(self.radius), 1)
 
@@ -190,16 +202,293 @@ class FlyingBall:
 
 FlyingBall = FlyingBall
 
+from array import array
+from typing import Iterator, List, Optional
+
+
+class ProjectileView(FlyingBall):
+    """Снаряд пула как вид на его слот.
+
+Вид принадлежит слоту и переиспользуется: после удаления снаряда
+тот же объект станет следующим снарядом в этом слоте."""
+
+    def __init__(self, pool: "ProjectilePool", slot: int):
+        self._pool = pool
+        self._s = int(slot)
+
+    @property
+    def slot(self) -> int:
+        return self._s
+
+    @property
+    def pos(self) -> Tuple[float, float]:
+        return (self._pool._x[self._s], self._pool._y[self._s])
+
+    @pos.setter
+    def pos(self, value) -> None:
+        pool, s = self._pool, self._s
+        pool._x[s] = float(value[0])
+        pool._y[s] = float(value[1])
+        pool._exit[s] = pool.now + pool._exit_in(s)
+
+    @property
+    def prev_pos(self) -> Tuple[float, float]:
+        return (self._pool._px[self._s], self._pool._py[self._s])
+
+    @property
+    def vx(self) -> float:
+        return self._pool._vx[self._s]
+
+    @property
+    def vy(self) -> float:
+        return self._pool._vy[self._s]
+
+    @property
+    def speed(self) -> float:
+        return self._pool._speed[self._s]
+
+    @property
+    def radius(self) -> float:
+        return self._pool._radius[self._s]
+
+    @property
+    def color(self) -> Tuple[int, int, int]:
+        return self._pool._color[self._s]
+
+    @property
+    def kind(self) -> str:
+        return self._pool._kind[self._s]
+
+    type = kind
+
+    def update(self, dt: float) -> None:
+        self._pool._move_slot(self._s, float(dt))
+        # снаряд сдвинулся, а часы пула нет: до вылета стало на dt меньше
+        self._pool._exit[self._s] -= float(dt)
+
+    def is_offscreen(self) -> bool:
+        # Время вылета посчитано при запуске: проверка без геометрии
+        return self._pool.now > self._pool._exit[self._s]
+
+    # вид сравнивается по тождеству, а не по полям
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __repr__(self) -> str:
+        x, y = self.pos
+        return f"ProjectileView(slot={self._s}, pos=({x:.1f}, {y:.1f}))"
+
+
+class ProjectilePool:
+    """Летящие снаряды в заранее выделенных слотах.
+
+Данные снарядов лежат в параллельных массивах, свободные слоты —
+в стеке, живые — плотным списком: удаление меняет удаляемый слот
+местами с последним живым (O(1)). Момент вылета за экран считается
+аналитически при запуске. Снаружи пул ведёт себя как список снарядов:
+append кладёт сам объект (со своими update и is_offscreen) в отдельный
+список, а в слоты снаряды попадают через spawn и spawn_from."""
+
+    def __init__(self, capacity: int | None = None):
+        self.now: float = 0.0
+        self._x = array("d")
+        self._y = array("d")
+        self._px = array("d")
+        self._py = array("d")
+        self._vx = array("d")
+        self._vy = array("d")
+        self._speed = array("d")
+        self._radius = array("d")
+        # момент вылета за экран по часам пула
+        self._exit = array("d")
+        self._color: List[Tuple[int, int, int]] = []
+        self._kind: List[str] = []
+        self._views: List[ProjectileView] = []
+        self._alive = array("B")
+
+        # живые слоты подряд и место каждого слота в этом списке
+        self._active = array("I")
+        self._where = array("I")
+        self._free = array("I")
+        self._extra: List[object] = []
+        self._grow(int(cfg.PROJECTILE_POOL_SIZE if capacity is None else capacity))
+
+    def _grow(self, n: int) -> None:
+        start = len(self._views)
+        n = max(1, int(n))
+        for arr in (self._x, self._y, self._px, self._py, self._vx,
+                    self._vy, self._speed, self._radius, self._exit):
+            arr.extend(array("d", bytes(8 * n)))
+        self._color.extend([cfg.WHITE] * n)
+        self._kind.extend(["normal"] * n)
+        self._views.extend(ProjectileView(self, s) for s in range(start, start + n))
+        self._alive.extend(bytes(n))
+        self._where.extend(array("I", bytes(4 * n)))
+        # слоты выдаются с меньших номеров
+        self._free.extend(range(start + n - 1, start - 1, -1))
+
+    @property
+    def capacity(self) -> int:
+        return len(self._views)
+
+    # --------------------------- запуск и удаление ---------------------------
+    def spawn(
+            self, x: float, y: float, dx: float, dy: float, color, *,
+            speed: float | None = None, radius: float | None = None,
+            kind: str = "normal", prev: Point | None = None
+            ) -> ProjectileView:
+        if not self._free:
+            self._grow(len(self._views))
+        s = self._free.pop()
+
+        mag = math.hypot(dx, dy)
+        if mag <= 1e-9:
+            nx, ny = 1.0, 0.0
+        else:
+            nx, ny = float(dx) / mag, float(dy) / mag
+
+        self._x[s] = float(x)
+        self._y[s] = float(y)
+        self._px[s], self._py[s] = (
+            (self._x[s], self._y[s]) if prev is None
+            else (float(prev[0]), float(prev[1]))
+            )
+        self._vx[s] = nx
+        self._vy[s] = ny
+        self._speed[s] = float(cfg.SHOT_SPEED if speed is None else speed)
+        self._radius[s] = float(cfg.BALL_RADIUS if radius is None else radius)
+        self._color[s] = color
+        self._kind[s] = str(kind)
+        self._exit[s] = self.now + self._exit_in(s)
+
+        self._alive[s] = 1
+        self._where[s] = len(self._active)
+        self._active.append(s)
+        return self._views[s]
+
+    def _exit_in(self, s: int) -> float:
+        # Через сколько секунд снаряд выйдет за экран (с запасом в радиус)
+        r = self._radius[s]
+        limit = math.inf
+        for p, v, hi in ((self._x[s], self._vx[s], cfg.WIDTH),
+                         (self._y[s], self._vy[s], cfg.HEIGHT)):
+            if p < -r or p > hi + r:
+                return -1.0
+            v *= self._speed[s]
+            if v > 0.0:
+                limit = min(limit, (hi + r - p) / v)
+            elif v < 0.0:
+                limit = min(limit, (-r - p) / v)
+        return limit
+
+    def spawn_from(self, proj: FlyingBall) -> ProjectileView:
+        # Запуск по готовому FlyingBall: данные копируются в слот, в пуле
+        # оказывается возвращённый вид, а не сам proj
+        return self.spawn(
+            proj.pos[0], proj.pos[1], proj.vx, proj.vy, proj.color,
+            speed=proj.speed, radius=proj.radius, kind=proj.type,
+            prev=proj.prev_pos,
+            )
+
+    def append(self, proj) -> None:
+        # Как у списка: в пуле оказывается сам объект (в слот его
+        # не копируем), поэтому in и remove с ним работают
+        self._extra.append(proj)
+
+    def extend(self, projectiles) -> None:
+        for proj in projectiles:
+            self.append(proj)
+
+    def remove(self, proj) -> None:
+        if isinstance(proj, ProjectileView) and proj._pool is self:
+            s = proj._s
+            if not self._alive[s]:
+                raise ValueError("projectile is not in the pool")
+            # swap-remove: последний живой слот встаёт на место удалённого
+            k = self._where[s]
+            last = self._active.pop()
+            if last != s:
+                self._active[k] = last
+                self._where[last] = k
+            self._alive[s] = 0
+            self._free.append(s)
+            return
+        self._extra.remove(proj)
+
+    def clear(self) -> None:
+        for s in self._active:
+            self._alive[s] = 0
+            self._free.append(s)
+        del self._active[:]
+        self._extra.clear()
+
+    # --------------------------- движение ---------------------------
+    def _move_slot(self, s: int, dt: float) -> None:
+        x, y = self._x[s], self._y[s]
+        self._px[s] = x
+        self._py[s] = y
+        step = self._speed[s] * dt
+        self._x[s] = x + self._vx[s] * step
+        self._y[s] = y + self._vy[s] * step
+
+    def move(self, dt: float) -> None:
+        # Шаг всех снарядов; посторонние объекты двигаются своим update
+        dt = float(dt)
+        self.now += dt
+        move = self._move_slot
+        for s in self._active:
+            move(s, dt)
+        for proj in self._extra:
+            if hasattr(proj, "update"):
+                proj.update(dt)
+            else:
+                try:
+                    proj.pos[0] += proj.dx * proj.speed * dt
+                    proj.pos[1] += proj.dy * proj.speed * dt
+                except Exception:
+                    pass
+
+    # --------------------------- интерфейс списка ---------------------------
+    def __len__(self) -> int:
+        return len(self._active) + len(self._extra)
+
+    def __bool__(self) -> bool:
+        return bool(self._active) or bool(self._extra)
+
+    def __iter__(self) -> Iterator[FlyingBall]:
+        views = self._views
+        for s in self._active:
+            yield views[s]
+        yield from self._extra
+
+    def __getitem__(self, k: int):
+        n = len(self._active)
+        if k < 0:
+            k += len(self)
+        if 0 <= k < n:
+            return self._views[self._active[k]]
+        return self._extra[k - n]
+
+    def __contains__(self, proj) -> bool:
+        if isinstance(proj, ProjectileView) and proj._pool is self:
+            return bool(self._alive[proj._s])
+        return proj in self._extra
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, ProjectilePool)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ProjectilePool(active={len(self)}, capacity={self.capacity})"
+
 import math
 import random
 import time
 from dataclasses import dataclass, field
-from typing import List, Tuple
-
-try:
-    import pygame  # type: ignore
-except Exception:  # pragma: no cover
-    pygame = None  # type: ignore
+from typing import Any, List, Optional, Tuple
 
 from . import config as cfg
 
@@ -208,6 +497,7 @@ Point = Tuple[float, float]
 
 
 def _clock_seconds() -> float:
+    pygame = loaded_pygame()
     if pygame is not None:
         try:
             return pygame.time.get_ticks() / 1000.0
@@ -232,12 +522,9 @@ class Frog:
 
     radius: int = int(cfg.FROG_RADIUS)
 
-    current_ball_color: Tuple[int, int, int] = field(
-        default_factory=lambda: random.choice(cfg.BALL_COLORS)
-        )
-    next_ball_color: Tuple[int, int, int] = field(
-        default_factory=lambda: random.choice(cfg.BALL_COLORS)
-        )
+    # без явных цветов они выбираются генератором rng
+    current_ball_color: Optional[Tuple[int, int, int]] = None
+    next_ball_color: Optional[Tuple[int, int, int]] = None
 
     shoot_speed_multiplier: float = 1.0
     burst_shoot_count: int = 1
@@ -246,6 +533,31 @@ class Frog:
     shot_cooldown: float = 0.0
     shot_cooldown_time: float = 0.2
 
+    # генератор случайных чисел сессии (random.Random); по умолчанию
+    # общий модуль random
+    rng: Any = field(default=random, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.current_ball_color is None:
+            self.current_ball_color = self.rng.choice(cfg.BALL_COLORS)
+        if self.next_ball_color is None:
+            self.next_ball_color = self.rng.choice(cfg.BALL_COLORS)
+
+    def snapshot(self) -> tuple:
+        # Изменяемое состояние лягушки плоским кортежем
+        return (
+            self.pos, self.angle, self._aim, self.cooldown_multiplier,
+            self._last_shot_time, self.current_ball_color,
+            self.next_ball_color, self.shoot_speed_multiplier,
+            self.burst_shoot_count, self.shot_cooldown,
+            )
+
+    def restore(self, snap: tuple) -> None:
+        (self.pos, self.angle, self._aim, self.cooldown_multiplier,
+         self._last_shot_time, self.current_ball_color,
+         self.next_ball_color, self.shoot_speed_multiplier,
+         self.burst_shoot_count, self.shot_cooldown) = snap
+
     def rotate(self, direction: int) -> None:
         self._aim += math.radians(cfg.FROG_ROTATION_SPEED) * int(direction)
 
@@ -273,7 +585,7 @@ class Frog:
         cd = self.cooldown_base * self.cooldown_multiplier
         return (now - float(self._last_shot_time)) >= float(cd)
 
-    def _projectile(self, ang: float) -> FlyingBall:
+    def _projectile(self, ang: float, color, speed: float) -> FlyingBall:
         x, y = self.pos
         dx, dy = math.cos(ang), math.sin(ang)
         return FlyingBall(
@@ -281,16 +593,31 @@ class Frog:
             y=y,
             dx=dx,
             dy=dy,
-            color=self.current_ball_color,
-            speed=cfg.SHOT_SPEED * float(self.shoot_speed_multiplier),
+            color=color,
+            speed=speed,
             radius=cfg.BALL_RADIUS,
             ball_type="normal",
         )
 
-    def shoot(self, aim_pos: Point | None = None) -> List[FlyingBall]:
-        # Выполняет выстрел, возвращает список снарядов
-        if not self.can_shoot():
+    def shoot(
+            self, aim_pos: Point | None = None, now: float | None = None
+            ) -> List[FlyingBall]:
+        # Выполняет выстрел, возвращает список снарядов.
+        # now — время для перезарядки; без него берутся часы
+        shot = self.fire(aim_pos=aim_pos, now=now)
+        if shot is None:
             return []
+        angles, color, speed = shot
+        return [self._projectile(a, color, speed) for a in angles]
+
+    def fire(
+            self, aim_pos: Point | None = None, now: float | None = None
+            ) -> Optional[Tuple[List[float], Tuple[int, int, int], float]]:
+        # Выстрел без создания снарядов: (углы, цвет, скорость) или None.
+        # Снаряды по этим данным запускает Game в пуле снарядов
+        now = _clock_seconds() if now is None else float(now)
+        if not self.can_shoot(now):
+            return None
 
         if aim_pos is not None:
             self.aim_at(aim_pos)
@@ -303,21 +630,45 @@ class Frog:
             mid = (n - 1) / 2.0
             angles = [self.angle + (i - mid) * (spread / max(1.0, mid)) for i in range(n)]
 
-        shots = [self._projectile(a) for a in angles]
+        color = self.current_ball_color
+        speed = cfg.SHOT_SPEED * float(self.shoot_speed_multiplier)
 
         # Прокрутить боезапас (текущий шар → следующий)
         self.current_ball_color = self.next_ball_color
-        self.next_ball_color = random.choice(cfg.BALL_COLORS)
+        self.next_ball_color = self.rng.choice(cfg.BALL_COLORS)
 
-        self._last_shot_time = _clock_seconds()
+        self._last_shot_time = now
         self.shot_cooldown = self.shot_cooldown_time
-        return shots
+        return angles, color, speed
+
+    def swap(self) -> None:
+        # Меняет местами текущий и следующий шар
+        self.current_ball_color, self.next_ball_color = (
+            self.next_ball_color, self.current_ball_color
+            )
+
+    def aim_target(self, chain):
+        # Шар, в который сейчас попал бы выстрел (по таблице hitscan)
+        from .physics import hitscan
+        return hitscan(self.angle, chain, radius=cfg.BALL_RADIUS)
 
-    def draw(self, screen) -> None:  # pragma: no cover
+    def draw(self, screen, chain=None) -> None:  # pragma: no cover
+        pygame = loaded_pygame()
         if pygame is None:
             return
 
         x, y = int(self.pos[0]), int(self.pos[1])
+
+        # линия-подсказка до шара, в который попадёт выстрел
+        if chain:
+            hit = self.aim_target(chain)
+            if hit is not None:
+                px, py = hit.point
+                pygame.draw.line(
+                    screen, self.current_ball_color, (x, y),
+                    (int(px), int(py)), 1
+                    )
+
         pygame.draw.circle(screen, (70, 200, 120), (x, y), self.radius)
         pygame.draw.circle(screen, (15, 15, 18), (x, y), self.radius, 2)
 
@@ -338,4 +689,4 @@ class Frog:
         ey = y + length * math.sin(self.angle)
         pygame.draw.line(screen, (240, 240, 245), (x, y), (ex, ey), 3)
 
-__all__ = ['Ball','FlyingBall','Frog']
+__all__ = ['Ball','FlyingBall','ProjectilePool','Frog']
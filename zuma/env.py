@@ -0,0 +1,121 @@
+"""Headless-окружение поверх Game для ботов и обучения.
+
+Интерфейс в духе gym: reset(seed) → observation,
+step(action) → (observation, reward, done, info).
+
+Действие — тройка (угол прицела, стрелять, поменять шары).
+Время идёт фиксированными шагами симуляции, перезарядка считается
+по игровому времени, а не по часам, поэтому эпизод прогоняется
+быстрее реального времени. Модуль не импортирует pygame."""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from . import config as cfg
+from .buffer import ChainBuffer
+from .game import Game
+
+Action = Tuple[float, bool, bool]
+Observation = Dict[str, Any]
+
+
+class ZumaEnv:
+    """Одна игровая сессия, управляемая действиями"""
+
+    def __init__(
+            self, level: int = 1, *, dt: float | None = None,
+            frame_skip: int = 1, hitscan: bool = False
+            ):
+        self.level_number = int(level)
+        # длительность одного шага симуляции и число шагов на действие
+        self.dt = float(1.0 / cfg.SIM_HZ if dt is None else dt)
+        self.frame_skip = max(1, int(frame_skip))
+        self.hitscan = bool(hitscan)
+
+        self.game: Optional[Game] = None
+        self.time: float = 0.0
+        self.steps: int = 0
+
+    def reset(self, seed: int | None = None) -> Observation:
+        # Новый эпизод: уровень level_number с нуля. Зерно задаёт
+        # генератор самой сессии, общий random не трогается.
+        self.game = Game(hitscan=self.hitscan, seed=seed)
+        self.game.start_level(self.level_number)
+        # первый выстрел доступен сразу
+        self.game.frog._last_shot_time = -math.inf
+        self.time = 0.0
+        self.steps = 0
+        return self.observation()
+
+    def step(self, action: Sequence) -> Tuple[Observation, float, bool, Dict]:
+        game = self.game
+        if game is None:
+            raise RuntimeError("call reset() before step()")
+
+        before = game.score
+        self.act(action)
+        for _ in range(self.frame_skip):
+            if game.state != "playing":
+                break
+            game.update(self.dt)
+            self.time += self.dt
+        return self.finish_step(before)
+
+    def act(self, action: Sequence) -> None:
+        # Применяет действие (угол, выстрел, смена шаров) без шага времени
+        game = self.game
+        angle, shoot, swap = action
+        if game.state != "playing":
+            return
+        # бот прицеливается мгновенно, без плавного поворота
+        game.frog.angle = game.frog._aim = float(angle)
+        if swap:
+            game.frog.swap()
+        if shoot:
+            game.shoot(now=self.time)
+
+    def finish_step(self, score_before: int) -> Tuple[Observation, float, bool, Dict]:
+        # Итог шага: награда — прирост счёта
+        self.steps += 1
+        game = self.game
+        reward = float(game.score - score_before)
+        done = game.state != "playing"
+        return self.observation(), reward, done, self.info()
+
+    def observation(self) -> Observation:
+        # Состояние в виде простых списков и чисел (без NumPy)
+        game = self.game
+        chain = game.level.chain if game.level is not None else ChainBuffer()
+        frog = game.frog
+        return {
+            "t": list(chain.ts),
+            "color": list(chain.color_codes),
+            "kind": list(chain.kind_codes),
+            "angle": float(frog.angle),
+            # -1 — такого цвета в палитре цепочки нет
+            "current": chain.find_color_code(frog.current_ball_color),
+            "next": chain.find_color_code(frog.next_ball_color),
+            "projectiles": [
+                (float(p.pos[0]), float(p.pos[1]))
+                for p in game.flying_balls
+                ],
+            "time_remaining": float(
+                getattr(game.level, "time_remaining", 0.0)
+                ),
+            "lives": int(game.lives),
+            "score": int(game.score),
+            }
+
+    def info(self) -> Dict:
+        game = self.game
+        return {
+            "state": game.state,
+            "score": int(game.score),
+            "combo": int(game.combo),
+            "time": self.time,
+            "steps": self.steps,
+            }
+
+
+__all__ = ["ZumaEnv", "Action", "Observation"]
@@ -8,46 +8,91 @@
 - применение бонусов"""
 from __future__ import annotations
 
+import math
+import random
 import sys
-from typing import List, Optional, Callable
-
-try:
-    import pygame  # type: ignore
-except Exception:  # pragma: no cover
-    pygame = None  # type: ignore
+from typing import Optional, Callable
 
 from . import config as cfg
+from . import spiral as path_spiral
+from .buffer import ChainBuffer
 from .entities import Ball
 from .entities import Frog
+from .entities import ProjectilePool
+from .entities import loaded_pygame
 from .level import Level
-from .chain import group_at, drop_indices, reflow
-from .physics import hit_index
+from .chain import (cascade, close_gap, drop_indices, insert_at,
+                    insertion_index)
+from .physics import Hit, hitscan, sweep_hit, sweep_hits
 
 
 def _get(ns, name: str, default):
     return getattr(ns, name, default)
 
 
+class Input:
+    """Коды команд ввода: в них переводятся события pygame,
+    их же пишет запись реплея (zuma.replay)"""
+    AIM = 1          # arg: угол прицела
+    SHOOT = 2
+    ENTER = 3
+    ESCAPE = 4
+    PAUSE = 5
+    BACKSPACE = 6
+    CHAR = 7         # arg: символ для чит-кодов
+
+
 class Game:
     """Одна игровая сессия"""
 
-    def __init__(self, screen=None, *, collide: Callable | None = None):
+    def __init__(
+            self, screen=None, *, collide: Callable | None = None,
+            collide_many: Callable | None = None, hitscan: bool = False,
+            seed: int | None = None, rng: random.Random | None = None
+            ):
         self.screen = screen
 
+        # Свой генератор случайных чисел у каждой сессии: уровень, цепочка
+        # и лягушка берут случайность только из него. Без seed зерно
+        # берётся из общего random, так что random.seed по-прежнему
+        # делает игру воспроизводимой.
+        # Зерно хранится, чтобы сессию можно было записать и повторить.
+        self.seed: Optional[int] = None
+        if rng is None:
+            self.seed = random.getrandbits(64) if seed is None else seed
+            rng = random.Random(self.seed)
+        self.rng: random.Random = rng
+        # шагов симуляции и игровое время с начала сессии
+        self.ticks: int = 0
+        self.time: float = 0.0
+        # запись реплея (zuma.replay.Recorder) или None
+        self.recorder = None
+
         self.state: str = "menu"
         self.level_number: int = 1
         self.max_levels: int = int(cfg.MAX_LEVEL)
 
         self.level: Optional[Level] = None
-        self.frog: Frog = Frog()
+        self.frog: Frog = Frog(rng=self.rng)
 
         self.score: int = 0
         self.lives: int = int(cfg.LIVES)
-        self.flying_balls: List[object] = []
+        self.flying_balls: ProjectilePool = ProjectilePool()
+        # глубина последнего каскада (для HUD и ботов)
+        self.combo: int = 0
 
+        # collide_many — пакетная проверка всех снарядов за один вызов;
+        # по умолчанию используется только вместе со стандартным collide
         if collide is None:
             collide = check_collision
+            if collide_many is None and collide is sweep_hit:
+                collide_many = sweep_hits
         self._collide = collide
+        self._collide_many = collide_many
+        # мгновенные выстрелы без полёта снаряда (для быстрых симуляций)
+        self.hitscan: bool = bool(hitscan)
+        # t шаров до последнего шага симуляции (для интерполяции)
+        self._render_prev = None
 
         # --- чит-коды (ввод с клавиатуры) ---
         self._cheat_code: str = "ZUMA500"
@@ -63,8 +108,8 @@ class Game:
             self.state = "victory"
             return
 
-        self.level = Level(self.level_number)
-        self.frog = Frog()
+        self.level = Level(self.level_number, rng=self.rng)
+        self.frog = Frog(rng=self.rng)
         # Счёт и жизни считаем на уровне: так проще понимать правила и защищать проект.
         self.score = 0
         self.lives = int(cfg.LIVES)
@@ -77,8 +122,75 @@ class Game:
         elif self.state == "paused":
             self.state = "playing"
 
+    # --------------------------- снимки ---------------------------
+    # Снимок — плоский кортеж: скаляры сессии, состояние генератора,
+    # лягушки, уровня (с массивами цепочки) и снарядов. Он не меняется,
+    # поэтому из одного снимка можно откатываться много раз: бот
+    # пробует выстрел, симулирует вперёд и возвращается.
+
+    def snapshot(self) -> tuple:
+        return (
+            self.state, self.level_number, self.score, self.lives,
+            self.combo, self.ticks, self.time, self._cheat_buffer,
+            self.rng.getstate(), self.frog.snapshot(),
+            None if self.level is None else self.level.snapshot(),
+            tuple(
+                (p.pos[0], p.pos[1], p.prev_pos, p.vx, p.vy, p.color,
+                 p.speed, p.radius, p.type)
+                for p in self.flying_balls
+                ),
+            )
+
+    def restore(self, snap: tuple) -> None:
+        (self.state, self.level_number, self.score, self.lives,
+         self.combo, self.ticks, self.time, self._cheat_buffer,
+         rng_state, frog, level, projectiles) = snap
+        self.rng.setstate(rng_state)
+        self.frog.restore(frog)
+        if level is None:
+            self.level = None
+        elif self.level is None:
+            self.level = Level.from_snapshot(level, rng=self.rng)
+        else:
+            self.level.restore(level)
+
+        self.flying_balls.clear()
+        for x, y, prev, vx, vy, color, speed, radius, kind in projectiles:
+            self.flying_balls.spawn(
+                x, y, vx, vy, color, speed=speed, radius=radius, kind=kind,
+                prev=prev,
+                )
+        self._render_prev = None
+
+    def clone(self) -> "Game":
+        # Независимая копия сессии (без окна и без записи реплея).
+        # Копия полная и сразу: массивы цепочки, лягушка, снаряды и
+        # таймеры копируются через snapshot/restore, общих данных
+        # с исходной игрой нет. Генератор случайных чисел продолжает
+        # ту же последовательность, что и у исходной игры.
+        other = Game.__new__(Game)
+        other.__dict__.update(self.__dict__)
+        other.screen = None
+        other.recorder = None
+        snap = self.snapshot()
+        # Генератор без засева: restore ставит ему состояние из снимка
+        # (self.rng.getstate())
+        other.rng = random.Random.__new__(random.Random)
+        other.frog = Frog(
+            current_ball_color=self.frog.current_ball_color,
+            next_ball_color=self.frog.next_ball_color, rng=other.rng
+            )
+        other.level = None
+        # пул на живые снаряды; при новых выстрелах он дорастёт сам
+        other.flying_balls = ProjectilePool(max(1, len(self.flying_balls)))
+        other.restore(snap)
+        return other
+
     # --------------------------- input ---------------------------
     def handle_events(self, events) -> None:  # pragma: no cover
+        # События pygame переводятся в команды Input: игра зависит
+        # только от команд и номера шага, поэтому её можно записать
+        pygame = loaded_pygame()
         if pygame is None:
             return
 
@@ -91,104 +203,204 @@ class Game:
                 and self.state in ("playing", "paused")
                 ):
                 self.frog.aim_at(event.pos)
+                self.input(Input.AIM, self.frog._aim)
 
             if (event.type == pygame.MOUSEBUTTONDOWN
                  and event.button == 1
                    and self.state == "playing"):
-                shots = self.frog.shoot(aim_pos=pygame.mouse.get_pos())
-                if shots:
-                    self.flying_balls.extend(shots)
+                self.frog.aim_at(pygame.mouse.get_pos())
+                self.input(Input.AIM, self.frog._aim)
+                self.input(Input.SHOOT)
 
             if event.type != pygame.KEYDOWN:
                 continue
 
             if event.key == pygame.K_ESCAPE:
-                if self.state in ("playing", "paused"):
-                    self.toggle_pause()
-                elif self.state == "victory":
+                if self.state == "victory":
                     sys.exit(0)
+                self.input(Input.ESCAPE)
 
             if event.key == pygame.K_RETURN:
-                if self.state == "menu":
-                    self.start_level(1)
-                elif self.state == "level_complete":
-                    self.level_number += 1
-                    self.start_level(self.level_number)
-                elif self.state in ("game_over", "victory"):
-                    self.level_number = 1
-                    self.start_level(1)
+                self.input(Input.ENTER)
 
             if self.state == "playing":
                 if event.key == pygame.K_LEFT:
                     self.frog.rotate(-1)
+                    self.input(Input.AIM, self.frog._aim)
                 elif event.key == pygame.K_RIGHT:
                     self.frog.rotate(1)
+                    self.input(Input.AIM, self.frog._aim)
                 elif event.key == pygame.K_SPACE:
-                    shots = self.frog.shoot()
-                    if shots:
-                        self.flying_balls.extend(shots)
+                    self.input(Input.SHOOT)
                 elif event.key == pygame.K_p:
-                    self.toggle_pause()
+                    self.input(Input.PAUSE)
 
             # --- чит-коды: ZUMA500  +500 очков ---
             if self.state in ("playing", "paused"):
                 if event.key == pygame.K_BACKSPACE:
-                    self._cheat_buffer = self._cheat_buffer[:-1]
+                    self.input(Input.BACKSPACE)
                 else:
                     ch = getattr(event, "unicode", "")
                     if ch and ch.isprintable():
-                        self._cheat_buffer += ch.upper()
-                        # ограничиваем длину буфера
-                        if len(self._cheat_buffer) > self._cheat_buffer_limit:
-                            self._cheat_buffer = self._cheat_buffer[-self._cheat_buffer_limit:]
+                        self.input(Input.CHAR, ch)
+
+    def input(self, op: int, arg=None) -> None:
+        # Команда ввода на текущем шаге; при записи она попадает в реплей
+        if self.recorder is not None:
+            arg = self.recorder.record(self.ticks, op, arg)
+        self.apply_input(op, arg)
+
+    def apply_input(self, op: int, arg=None) -> None:
+        if op == Input.AIM:
+            self.frog._aim = float(arg)
 
-                        if self._cheat_buffer.endswith(self._cheat_code):
-                            self.score += 500
-                            self._cheat_buffer = ""  # чтобы не срабатывало повторно сразу
+        elif op == Input.SHOOT:
+            if self.state == "playing":
+                # перезарядка по игровому времени, а не по часам
+                self.shoot(now=self.time)
+
+        elif op == Input.ENTER:
+            if self.state == "menu":
+                self.start_level(1)
+            elif self.state == "level_complete":
+                self.level_number += 1
+                self.start_level(self.level_number)
+            elif self.state in ("game_over", "victory"):
+                self.level_number = 1
+                self.start_level(1)
+
+        elif op == Input.ESCAPE:
+            if self.state in ("playing", "paused"):
+                self.toggle_pause()
+
+        elif op == Input.PAUSE:
+            if self.state == "playing":
+                self.toggle_pause()
+
+        elif op == Input.BACKSPACE:
+            if self.state in ("playing", "paused"):
+                self._cheat_buffer = self._cheat_buffer[:-1]
+
+        elif op == Input.CHAR:
+            if self.state in ("playing", "paused"):
+                self._cheat_buffer += str(arg).upper()
+                # ограничиваем длину буфера
+                if len(self._cheat_buffer) > self._cheat_buffer_limit:
+                    self._cheat_buffer = self._cheat_buffer[-self._cheat_buffer_limit:]
+
+                if self._cheat_buffer.endswith(self._cheat_code):
+                    self.score += 500
+                    self._cheat_buffer = ""  # чтобы не срабатывало повторно сразу
+
+    def shoot(self, aim_pos=None, now: float | None = None) -> None:
+        # Выстрел лягушки: снаряды летят, а в режиме hitscan
+        # попадание находится сразу по таблице углов.
+        # now — игровое время для перезарядки (по умолчанию часы)
+        shot = self.frog.fire(aim_pos=aim_pos, now=now)
+        if shot is None:
+            return
+        angles, color, speed = shot
+        if not self.hitscan or self.level is None:
+            x, y = self.frog.pos
+            for a in angles:
+                self.flying_balls.spawn(
+                    x, y, math.cos(a), math.sin(a), color, speed=speed
+                    )
+            return
+        for a in angles:
+            if self.state != "playing" or not self.level.chain:
+                return
+            hit = hitscan(a, self.level.chain, radius=cfg.BALL_RADIUS)
+            if hit is not None:
+                self._on_hit(color, hit.index, hit.point)
 
     # --------------------------- обновление ---------------------------
     def update(self, dt: float) -> None:
+        dt = float(dt)
+        self.tick(dt)
         if self.state != "playing" or self.level is None:
             return
 
-        dt = float(dt)
-        self.level.update(dt)
-        self.frog.update(dt)
+        self._update_world(dt)
+        projectiles = self._move_projectiles(dt)
+        if self._resolve_projectiles(projectiles):
+            self._finish_update()
 
-        # бонус: очередь таймер
-        if (hasattr(self.frog, "burst_timer")
-             and getattr(self.frog, "burst_timer") > 0):
-            self.frog.burst_timer -= dt
-            if self.frog.burst_timer <= 0:
-                self.frog.burst_shoot_count = 1
+    # Шаг update по фазам: их же по очереди вызывает пакетный
+    # симулятор (zuma.vec_env), считая столкновения сразу для всех сессий
 
-        collide = self._collide
+    def tick(self, dt: float) -> None:
+        # Счёт шагов и игрового времени (идёт в любом состоянии)
+        if self.recorder is not None:
+            self.recorder.tick(self)
+        self.ticks += 1
+        self.time += dt
 
-        for proj in list(self.flying_balls):
-            if hasattr(proj, "update"):
-                proj.update(dt)
-            else:
-                try:
-                    proj.pos[0] += proj.dx * proj.speed * dt
-                    proj.pos[1] += proj.dy * proj.speed * dt
-                except Exception:
-                    pass
-
-            hit = None
-            if collide is not None and self.level.chain:
-                hit = collide(proj, self.level.chain)
-
-            if hit is None:
-                if hasattr(proj, "is_offscreen") and proj.is_offscreen():
-                    self._discard_projectile(proj)
-                continue
+    def _update_world(self, dt: float) -> None:
+        self.level.update(dt)
+        self.frog.update(dt)
 
-            self._on_hit(proj, int(hit))
-            self._discard_projectile(proj)
+        # волны комбо от стыковки сегментов
+        if self.level.pending_waves:
+            for removed, depth in self.level.pending_waves:
+                self._score_wave(removed, depth)
+            self.level.pending_waves.clear()
 
-            if self.state != "playing":
-                return
+        # бонус «очередь» кончается вместе с его таймером уровня
+        if self.level.expired_powerups:
+            if (cfg.PowerUp.TYPE_BURST_SHOOT in self.level.expired_powerups
+                    and not self.level.powerup_active(cfg.PowerUp.TYPE_BURST_SHOOT)):
+                self.frog.burst_shoot_count = 1
+            self.level.expired_powerups.clear()
+
+    def _move_projectiles(self, dt: float) -> ProjectilePool:
+        self.flying_balls.move(dt)
+        return self.flying_balls
+
+    def _resolve_projectiles(self, projectiles, batch=None) -> bool:
+        # Применяет попадания; False — игра закончилась посреди шага.
+        # Снаряды убираются из пула после прохода, чтобы порядок
+        # (и индексы batch) не менялись во время цикла.
+        # batch — готовые результаты пакетной проверки (их передаёт
+        # zuma.vec_env); иначе несколько снарядов сразу проверяем одним
+        # вызовом collide_many. Результаты годятся, пока цепочка не
+        # изменилась: после первого попадания снаряды идут по одному.
+        collide = self._collide
+        if (batch is None and self._collide_many is not None
+                and len(projectiles) > 1 and self.level.chain):
+            batch = self._collide_many(projectiles, self.level.chain)
+        done = []
 
+        try:
+            for k, proj in enumerate(projectiles):
+                hit = None
+                if batch is not None:
+                    hit = batch[k]
+                elif collide is not None and self.level.chain:
+                    hit = collide(proj, self.level.chain)
+
+                if hit is None:
+                    if hasattr(proj, "is_offscreen") and proj.is_offscreen():
+                        done.append(proj)
+                    continue
+
+                # swept-проверка отдаёт ещё и точку контакта
+                color = getattr(proj, "color", cfg.WHITE)
+                if isinstance(hit, Hit):
+                    self._on_hit(color, hit.index, hit.point)
+                else:
+                    self._on_hit(color, int(hit))
+                done.append(proj)
+                batch = None
+
+                if self.state != "playing":
+                    return False
+            return True
+        finally:
+            for proj in done:
+                self._discard_projectile(proj)
+
+    def _finish_update(self) -> None:
         self._check_end()
 
         if self.level.is_complete(self.score):
@@ -204,8 +416,8 @@ class Game:
         except ValueError:
             pass
 
-    def _on_hit(self, proj: object, idx: int) -> None:
-        # обработка попадания снаряда в шар цепочки
+    def _on_hit(self, color, idx: int, point=None) -> None:
+        # обработка попадания снаряда цвета color в шар цепочки
         target = self.level.chain[idx]
 
         if getattr(target, "type", Ball.TYPE_NORMAL) == Ball.TYPE_SKULL:
@@ -221,11 +433,10 @@ class Game:
                 self.state = "game_over"
                 return
 
-            # Сжимаем цепочку, чтобы не осталось дырки после удаления.
-            if self.level.chain:
-                spacing = cfg.BALL_DIAMETER + cfg.BALL_SPACING
-                t0 = float(self.level.chain[0].t)
-                reflow(self.level.chain, spacing_px=spacing, t0=t0)
+            # Сжимаем цепочку, чтобы не осталось дырки после удаления:
+            # подтягиваем только шары за дыркой.
+            spacing = cfg.BALL_DIAMETER + cfg.BALL_SPACING
+            close_gap(self.level.chain, idx, spacing_px=spacing)
             return
 
         kind = getattr(target, "type", Ball.TYPE_NORMAL)
@@ -240,21 +451,32 @@ class Game:
             self._pickup_powerup(kind, idx)
             return
 
+        # По точке контакта выбираем сторону: перед шаром или после него
+        if point is not None:
+            idx = insertion_index(self.level.chain, idx, point)
+            target = self.level.chain[idx]
+
         neighbor_t = float(getattr(target, "t", 0.0))
         new_ball = Ball(
-            color=getattr(proj, "color", cfg.WHITE), t=neighbor_t + 0.01,
+            color=color, t=neighbor_t + 0.01,
               ball_type=Ball.TYPE_NORMAL
               )
-        self.level.chain.insert(idx, new_ball)
-
+        # Раздвигаем только хвост за точкой вставки: шары перед ней не сдвигаются
         spacing = cfg.BALL_DIAMETER + cfg.BALL_SPACING
-        t0 = float(self.level.chain[0].t)
-        reflow(self.level.chain, spacing_px=spacing, t0=t0)
+        insert_at(self.level.chain, idx, new_ball, spacing_px=spacing)
+
+        # Каскад: каждая следующая волна приносит очки с множителем глубины.
+        # Разрыв не закрывается сразу: продолжение каскада придёт от
+        # стыковки сегментов (Level.pending_waves).
+        waves = cascade(
+            self.level.chain, idx, spacing_px=spacing, close_gaps=False
+            )
+        for depth, removed in enumerate(waves, start=1):
+            self._score_wave(removed, depth)
 
-        group = group_at(self.level.chain, idx)
-        if group:
-            removed = drop_indices(self.level.chain, group)
-            self.score += int(removed) * int(cfg.POINTS_PER_BALL)
+    def _score_wave(self, removed: int, depth: int) -> None:
+        self.score += int(removed) * int(cfg.POINTS_PER_BALL) * int(depth)
+        self.combo = int(depth)
 
     def _pickup_powerup(self, powerup_type: str, idx: int) -> None:
         # забирает бонус, активирует его эффект
@@ -270,7 +492,6 @@ class Game:
             self.frog.shoot_speed_multiplier = 1.5
         elif powerup_type == cfg.PowerUp.TYPE_BURST_SHOOT:
             self.frog.burst_shoot_count = 3
-            self.frog.burst_timer = float(cfg.POWERUP_DURATION)
         elif powerup_type == cfg.PowerUp.TYPE_EXPLOSION:
             radius = 3
             lo = max(0, idx - radius)
@@ -290,7 +511,41 @@ class Game:
             return
 
     # --------------------------- отрисовка ---------------------------
-    def draw(self, screen) -> None:  # pragma: no cover
+    def remember_render_state(self) -> None:
+        # Запоминает t шаров перед шагом симуляции; снаряды хранят
+        # предыдущую позицию сами (FlyingBall.prev_pos)
+        chain = self.level.chain if self.level is not None else None
+        self._render_prev = (
+            chain.ts if isinstance(chain, ChainBuffer) else None
+            )
+
+    def render_positions(self, alpha: float):
+        # Позиции шаров цепочки между двумя последними состояниями
+        # или None, если интерполировать нечего
+        prev = self._render_prev
+        chain = self.level.chain if self.level is not None else None
+        if (alpha >= 1.0 or prev is None
+                or not isinstance(chain, ChainBuffer)
+                or len(prev) != len(chain)):
+            return None
+        a = max(0.0, float(alpha))
+        ts = [p + (c - p) * a for p, c in zip(prev, chain.ts)]
+        return path_spiral.xy_many(ts)
+
+    @staticmethod
+    def _projectile_render_pos(proj, alpha: float):
+        prev = getattr(proj, "prev_pos", None)
+        if prev is None or alpha >= 1.0:
+            return None
+        a = max(0.0, float(alpha))
+        return (
+            prev[0] + (proj.pos[0] - prev[0]) * a,
+            prev[1] + (proj.pos[1] - prev[1]) * a,
+            )
+
+    def draw(self, screen, alpha: float = 1.0) -> None:  # pragma: no cover
+        # alpha — доля шага симуляции после последнего состояния
+        pygame = loaded_pygame()
         if pygame is None:
             return
 
@@ -305,12 +560,23 @@ class Game:
 
         if self.state in ("playing", "paused"):
             if self.level:
-                for b in self.level.chain:
-                    b.draw(screen)
+                xy = self.render_positions(alpha)
+                if xy is None:
+                    for b in self.level.chain:
+                        b.draw(screen)
+                else:
+                    for b, x, y in zip(self.level.chain, *xy):
+                        b.draw(screen, pos=(x, y))
             for p in self.flying_balls:
                 if hasattr(p, "draw"):
-                    p.draw(screen)
-            self.frog.draw(screen)
+                    pos = self._projectile_render_pos(p, alpha)
+                    if pos is None:
+                        p.draw(screen)
+                    else:
+                        p.draw(screen, pos=pos)
+            self.frog.draw(
+                screen, chain=self.level.chain if self.level else None
+                )
 
             next_color = getattr(
                 self.frog, "next_ball_color", 
@@ -338,6 +604,6 @@ class Game:
             draw_victory(screen, self.score)
 
 
-check_collision = hit_index
+check_collision = sweep_hit
 
-__all__ = ['Game','check_collision']
+__all__ = ['Game','Input','check_collision']
@@ -4,11 +4,14 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from . import config as cfg
 from . import spiral as path_spiral
+from .buffer import ChainBuffer
+from .chain import advance, advance_segments
 from .entities import Ball
+from .timers import TimerHeap
 
 
 def _bonus_type(r: float, *, skull_chance: float) -> str:
@@ -28,7 +31,7 @@ def _bonus_type(r: float, *, skull_chance: float) -> str:
     return Ball.TYPE_NORMAL
 
 
-def _ball_color(kind: str, palette) -> tuple:
+def _ball_color(kind: str, palette, rng=random) -> tuple:
     if kind == Ball.TYPE_SKULL:
         return cfg.SKULL_COLOR
     if kind == cfg.PowerUp.TYPE_SLOW:
@@ -41,12 +44,15 @@ def _ball_color(kind: str, palette) -> tuple:
         return (255, 70, 70)
     if kind == cfg.PowerUp.TYPE_BURST_SHOOT:
         return (30, 60, 70)
-    return random.choice(palette)
+    return rng.choice(palette)
 
 
 class Level:
-    def __init__(self, number: int):
+    def __init__(self, number: int, *, rng=None):
         self.level_number = int(number)
+        # генератор случайных чисел сессии (random.Random);
+        # без него — общий модуль random
+        self.rng = random if rng is None else rng
         self.config: Dict = cfg.LEVELS.get(self.level_number, cfg.LEVELS[1])
 
         self.base_spiral_speed: float = float(
@@ -64,8 +70,17 @@ class Level:
             self.config.get("colors_count", len(cfg.BALL_COLORS))
             )
 
-        self.chain: List[Ball] = []
-        self.active_powerups: List[dict] = []
+        self.chain: ChainBuffer = ChainBuffer()
+        # таймеры бонусов; множитель скорости пересчитывается, только
+        # когда бонус начинается или заканчивается
+        self.timers: TimerHeap = TimerHeap()
+        self._effects: Dict[str, int] = {}
+        self._speed_mult: float = 1.0
+        # бонусы, истёкшие за последний update (их забирает Game)
+        self.expired_powerups: List[str] = []
+        # волны комбо от стыковки сегментов: (удалено шаров, глубина);
+        # Game забирает их и начисляет очки
+        self.pending_waves: List[Tuple[int, int]] = []
 
         self._spawn_initial_chain()
 
@@ -77,52 +92,117 @@ class Level:
         t_values = path_spiral.seed_positions(n, spacing=spacing)
 
         palette = cfg.BALL_COLORS[: max(1, self.colors_count)]
+        balls = []
         for t in t_values:
-            kind = _bonus_type(random.random(), skull_chance=self.skull_chance)
-            col = _ball_color(kind, palette)
-            self.chain.append(Ball(color=col, t=float(t), ball_type=kind))
+            kind = _bonus_type(self.rng.random(), skull_chance=self.skull_chance)
+            col = _ball_color(kind, palette, self.rng)
+            balls.append(Ball(color=col, t=float(t), ball_type=kind))
+        self.chain.extend(balls)
 
     def activate_powerup(self, powerup_type: str) -> None:
-        # добавляет активный бонус в список с таймером
-        self.active_powerups.append(
-            {"type": str(powerup_type), "remaining": float(cfg.POWERUP_DURATION)}
-            )
+        # запускает таймер бонуса
+        kind = str(powerup_type)
+        self.timers.schedule(kind, float(cfg.POWERUP_DURATION))
+        self._set_effect(kind, +1)
+
+    @property
+    def active_powerups(self) -> List[dict]:
+        # Активные бонусы с остатком времени (список собирается по запросу)
+        return [
+            {"type": kind, "remaining": left}
+            for kind, left in self.timers.pending()
+            ]
+
+    def powerup_active(self, powerup_type: str) -> bool:
+        return self._effects.get(powerup_type, 0) > 0
+
+    def _set_effect(self, kind: str, delta: int) -> None:
+        count = self._effects.get(kind, 0) + delta
+        if count > 0:
+            self._effects[kind] = count
+        else:
+            self._effects.pop(kind, None)
+        if kind in (cfg.PowerUp.TYPE_SLOW, cfg.PowerUp.TYPE_REVERSE):
+            self._speed_mult = self._speed_factor()
 
     def _tick_powerups(self, dt: float) -> None:
-        # уменьшает таймеры активных бонусов
-        dt = float(dt)
-        for p in list(self.active_powerups):
-            p["remaining"] -= dt
-            if p["remaining"] <= 0:
-                self.active_powerups.remove(p)
+        # двигает часы таймеров; без истёкших бонусов — одно сравнение
+        expired = self.timers.advance(dt)
+        for kind in expired:
+            self._set_effect(kind, -1)
+        self.expired_powerups.extend(expired)
 
     def _speed_factor(self) -> float:
         # вычисляет множитель скорости спирали с учётом активных бонусов
         slow = 1.0
         direction = 1.0
-        for p in self.active_powerups:
-            if p.get("type") == cfg.PowerUp.TYPE_SLOW:
-                slow = min(slow, float(cfg.POWERUP_SLOW_FACTOR))
-            elif p.get("type") == cfg.PowerUp.TYPE_REVERSE:
-                direction = -1.0
+        if self.powerup_active(cfg.PowerUp.TYPE_SLOW):
+            slow = float(cfg.POWERUP_SLOW_FACTOR)
+        if self.powerup_active(cfg.PowerUp.TYPE_REVERSE):
+            direction = -1.0
         return slow * direction
 
     def update(self, dt: float) -> None:
         dt = float(dt)
         self._tick_powerups(dt)
 
-        speed = float(self.spiral_speed) * self._speed_factor()
-        for b in self.chain:
-            b.update(dt, speed=speed)
+        speed = float(self.spiral_speed) * self._speed_mult
+        if isinstance(self.chain, ChainBuffer):
+            self.pending_waves.extend(advance_segments(self.chain, dt, speed))
+        else:
+            advance(self.chain, dt, speed)
 
         self.time_remaining = max(0.0, float(self.time_remaining) - dt)
 
+    @property
+    def segments(self) -> List[Tuple[int, int, float]]:
+        # Сегменты цепочки: (первый индекс, конец, смещение по t)
+        if isinstance(self.chain, ChainBuffer):
+            return list(self.chain.segments())
+        return [(0, len(self.chain), 0.0)] if self.chain else []
+
+    # Снимок: скаляры уровня, таймеры бонусов и снимок цепочки
+    def snapshot(self) -> tuple:
+        return (
+            self.level_number, self.base_spiral_speed, self.spiral_speed,
+            self.time_remaining, self.target_score, self.skull_chance,
+            self.colors_count,
+            tuple(self.timers.pending()), tuple(self.expired_powerups),
+            tuple(self.pending_waves), self.chain.snapshot(),
+            )
+
+    def restore(self, snap: tuple) -> None:
+        (number, self.base_spiral_speed, self.spiral_speed,
+         self.time_remaining, self.target_score, self.skull_chance,
+         self.colors_count, powerups, expired, waves, chain) = snap
+        if number != self.level_number:
+            self.level_number = number
+            self.config = cfg.LEVELS.get(number, cfg.LEVELS[1])
+        self.timers = TimerHeap(powerups)
+        self._effects = {}
+        for kind, _ in powerups:
+            self._effects[kind] = self._effects.get(kind, 0) + 1
+        self._speed_mult = self._speed_factor()
+        self.expired_powerups = list(expired)
+        self.pending_waves = list(waves)
+        self.chain.restore(chain)
+
+    @classmethod
+    def from_snapshot(cls, snap: tuple, *, rng=None) -> "Level":
+        # Уровень прямо из снимка, без генерации стартовой цепочки
+        level = cls.__new__(cls)
+        level.level_number = None
+        level.rng = random if rng is None else rng
+        level.chain = ChainBuffer()
+        level.restore(snap)
+        return level
+
     def is_complete(self, score: int) -> bool:
         s = int(score)
         return (s >= self.target_score) or (self.time_remaining <= 0.0)
 
     def spawn_skull(self) -> None:
-        if random.random() < float(self.skull_chance):
+        if self.rng.random() < float(self.skull_chance):
             self.chain.insert(
                 0, Ball(color=cfg.SKULL_COLOR,
                         t=0.0, ball_type=Ball.TYPE_SKULL)
@@ -0,0 +1,83 @@
+"""Главный цикл с фиксированным шагом симуляции.
+
+Время кадра копится в аккумуляторе и расходуется шагами одинаковой
+длины (cfg.SIM_HZ), поэтому исход игры не зависит от частоты кадров.
+Остаток аккумулятора (alpha) используется при отрисовке: позиции
+шаров и снарядов интерполируются между двумя последними состояниями.
+Число шагов догонки за кадр ограничено (cfg.MAX_CATCHUP_STEPS):
+после долгой паузы лишнее время отбрасывается, а не копится."""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from . import config as cfg
+
+
+class FixedStep:
+    """Аккумулятор времени для фиксированного шага"""
+
+    def __init__(
+            self, hz: float | None = None, max_steps: int | None = None
+            ):
+        self.step: float = 1.0 / float(cfg.SIM_HZ if hz is None else hz)
+        self.max_steps: int = int(
+            cfg.MAX_CATCHUP_STEPS if max_steps is None else max_steps
+            )
+        self.accumulator: float = 0.0
+        # сколько секунд симуляции отброшено из-за предела догонки
+        self.dropped: float = 0.0
+
+    def steps_for(self, frame_dt: float) -> int:
+        # Добавляет время кадра и возвращает, сколько шагов сделать
+        self.accumulator += max(0.0, float(frame_dt))
+        # небольшой допуск: 1/60 должно давать ровно два шага по 1/120
+        n = int(self.accumulator / self.step + 1e-9)
+        if n > self.max_steps:
+            extra = n - self.max_steps
+            self.dropped += extra * self.step
+            self.accumulator -= extra * self.step
+            n = self.max_steps
+        self.accumulator = max(0.0, self.accumulator - n * self.step)
+        return n
+
+    @property
+    def alpha(self) -> float:
+        # Доля шага, прошедшая после последнего состояния (0..1)
+        return min(1.0, self.accumulator / self.step)
+
+    def advance(
+            self, frame_dt: float, update: Callable[[float], None],
+            before_last: Optional[Callable[[], None]] = None
+            ) -> int:
+        # Выполняет накопившиеся шаги update(step). before_last вызывается
+        # перед последним шагом кадра — там запоминается состояние,
+        # от которого идёт интерполяция.
+        n = self.steps_for(frame_dt)
+        for i in range(n):
+            if before_last is not None and i == n - 1:
+                before_last()
+            update(self.step)
+        return n
+
+
+def run_game_frame(game, clock: FixedStep, frame_dt: float) -> float:
+    # Один кадр игры: шаги симуляции, затем alpha для отрисовки
+    clock.advance(
+        frame_dt, game.update, before_last=game.remember_render_state
+        )
+    return clock.alpha
+
+
+def simulate(game, seconds: float, hz: float | None = None) -> int:
+    # Прогон без окна и без ожидания: столько же шагов, сколько
+    # сделала бы игра за seconds реального времени
+    step = 1.0 / float(cfg.SIM_HZ if hz is None else hz)
+    n = int(float(seconds) / step + 1e-9)
+    for i in range(n):
+        if game.state != "playing":
+            return i
+        game.update(step)
+    return n
+
+
+__all__ = ["FixedStep", "run_game_frame", "simulate"]
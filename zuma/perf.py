@@ -0,0 +1,194 @@
+"""Замеры времени по подсистемам кадра.
+
+Профайлер оборачивает функции стадий (обновление уровня, столкновения,
+выравнивание цепочки, отрисовка, HUD) таймерами, только пока он
+включён: выключенный профайлер возвращает исходные функции на место,
+поэтому в обычной игре замеры ничего не стоят.
+
+Обёртки ставятся на классы и модули, а не на отдельную игру: пока
+профайлер включён, замеряются все сессии процесса (например, все игры
+VecEnv), и включить второй профайлер на те же стадии нельзя.
+
+Каждая стадия пишет длительности вызовов в свой кольцевой буфер
+фиксированного размера; по буферу считаются p50/p95/p99, отчёт
+выгружается в CSV или JSON.
+
+Запуск игры с замерами: python main.py --profile perf.json"""
+from __future__ import annotations
+
+import csv
+import importlib
+import io
+import json
+import math
+import time
+from array import array
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Число последних замеров на стадию (при 120 Гц — около минуты)
+RING_SIZE: int = 8192
+
+
+# Стадия → (модуль, класс или None, имя функции), которую она замеряет
+STAGES: Dict[str, Tuple[str, Optional[str], str]] = {
+    "update": ("game", "Game", "update"),
+    "level": ("level", "Level", "update"),
+    "collision": ("game", "Game", "_resolve_projectiles"),
+    "reflow": ("chain", None, "reflow"),
+    "draw": ("game", "Game", "draw"),
+    "hud": ("ui", None, "draw_play_hud"),
+    }
+
+
+def _owner(module: str, cls: Optional[str]) -> object:
+    # Модули импортируются только для выбранных стадий: zuma.ui
+    # подтягивает pygame, а headless-замерам он не нужен
+    mod = importlib.import_module(f"{__package__}.{module}")
+    return mod if cls is None else getattr(mod, cls)
+
+
+class Ring:
+    """Кольцевой буфер длительностей (в секундах)"""
+
+    __slots__ = ("_data", "_next", "count")
+
+    def __init__(self, size: int = RING_SIZE):
+        self._data = array("d", bytes(8 * max(1, int(size))))
+        self._next = 0
+        # сколько замеров записано за всё время
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self._data[self._next] = seconds
+        self._next = (self._next + 1) % len(self._data)
+        self.count += 1
+
+    def clear(self) -> None:
+        self._next = 0
+        self.count = 0
+
+    def samples(self) -> List[float]:
+        # Замеры, которые ещё в буфере, от старых к новым
+        data = self._data
+        if self.count < len(data):
+            return data[:self._next].tolist()
+        return data[self._next:].tolist() + data[:self._next].tolist()
+
+    def summary(self) -> Dict[str, float]:
+        # Сводка в миллисекундах по замерам из буфера
+        data = sorted(self.samples())
+        if not data:
+            return {"count": self.count, "mean": 0.0, "p50": 0.0,
+                    "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def pct(q: float) -> float:
+            # ближайший ранг
+            return data[max(0, math.ceil(q * len(data)) - 1)] * 1000.0
+
+        return {
+            "count": self.count,
+            "mean": sum(data) / len(data) * 1000.0,
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+            "max": data[-1] * 1000.0,
+            }
+
+
+class Profiler:
+    """Замеры по стадиям для всего процесса; пока не включён, ничего не меняет"""
+
+    def __init__(
+            self, stages: Optional[Sequence[str]] = None, *,
+            size: int = RING_SIZE
+            ):
+        names = list(STAGES) if stages is None else list(stages)
+        unknown = [n for n in names if n not in STAGES]
+        if unknown:
+            raise ValueError(f"unknown stages: {', '.join(unknown)}")
+        self._targets: Dict[str, Tuple[object, str]] = {
+            n: (_owner(*STAGES[n][:2]), STAGES[n][2]) for n in names
+            }
+        self.rings: Dict[str, Ring] = {n: Ring(size) for n in names}
+        self._originals: Dict[str, Callable] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def _timed(self, fn: Callable, ring: Ring) -> Callable:
+        clock = time.perf_counter
+        add = ring.add
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                add(clock() - t0)
+        timed.__wrapped_by_profiler__ = True
+        return timed
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        for name, (owner, attr) in self._targets.items():
+            if getattr(owner.__dict__[attr], "__wrapped_by_profiler__", False):
+                raise RuntimeError(f"stage {name!r} is already profiled")
+        for name, (owner, attr) in self._targets.items():
+            fn = owner.__dict__[attr]
+            self._originals[name] = fn
+            setattr(owner, attr, self._timed(fn, self.rings[name]))
+
+    def disable(self) -> None:
+        for name, fn in self._originals.items():
+            owner, attr = self._targets[name]
+            setattr(owner, attr, fn)
+        self._originals.clear()
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.disable()
+
+    def reset(self) -> None:
+        for ring in self.rings.values():
+            ring.clear()
+
+    # --------------------------- отчёт ---------------------------
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: ring.summary() for name, ring in self.rings.items()}
+
+    def to_json(self, *, samples: bool = False) -> str:
+        out: Dict[str, Dict] = {}
+        for name, ring in self.rings.items():
+            row: Dict = dict(ring.summary())
+            if samples:
+                row["samples_ms"] = [s * 1000.0 for s in ring.samples()]
+            out[name] = row
+        return json.dumps(out, indent=2)
+
+    def to_csv(self) -> str:
+        buf = io.StringIO()
+        fields = ["stage", "count", "mean", "p50", "p95", "p99", "max"]
+        writer = csv.DictWriter(buf, fieldnames=fields, lineterminator="\n")
+        writer.writeheader()
+        for name, row in self.summary().items():
+            writer.writerow({"stage": name, **row})
+        return buf.getvalue()
+
+    def export(self, path: str) -> None:
+        # Формат по расширению: .csv — сводка, иначе JSON с замерами
+        text = (
+            self.to_csv() if path.lower().endswith(".csv")
+            else self.to_json(samples=True)
+            )
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+
+__all__ = ["Profiler", "Ring", "RING_SIZE", "STAGES"]
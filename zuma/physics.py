@@ -1,8 +1,150 @@
 """Физика/столкновения.
-Функции этого модуля определяют попадание летящего шарика в шар цепочки"""
+Функции этого модуля определяют попадание летящего шарика в шар цепочки.
+
+Для буфера цепочки точечная проверка идёт в пространстве t: по радиусу
+и углу снаряда находятся окна t (не больше одного на виток), а шары
+в них ищутся бинарным поиском — O(витки · log n) на снаряд.
+Для swept-проверки используется broadphase — равномерная сетка
+(spatial hash) по координатам шаров.
+
+sweep_hit проверяет не конечную точку, а весь отрезок, пройденный
+снарядом за кадр: находится самое раннее касание и точка контакта,
+поэтому при большом dt снаряд не пролетает сквозь шары.
+
+sweep_hits делает ту же проверку сразу для всех летящих снарядов:
+с NumPy — одной матрицей «снаряды × шары», без него — по одному.
+
+hitscan — мгновенный выстрел из центра спирали (там сидит лягушка).
+Окна t, где луч под углом θ пересекает трассу, зависят только от
+геометрии, поэтому считаются один раз на сектор угла (HitscanTable)."""
 from __future__ import annotations
 
-from typing import Optional, Sequence
+import math
+import weakref
+from typing import (Dict, Iterator, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+from functools import lru_cache
+
+from . import config as cfg
+from . import spiral as path_spiral
+from .buffer import ChainBuffer
+
+
+class SpatialHash:
+    """Равномерная сетка индексов шаров по их координатам.
+
+Размер ячейки не меньше расстояния столкновения, поэтому для запроса
+хватает ячеек 2×2 (максимум 3×3) вокруг точки."""
+
+    __slots__ = ("cell", "cells", "version")
+
+    def __init__(self, cell: float | None = None):
+        self.cell = float(
+            cfg.BALL_DIAMETER + cfg.BALL_SPACING if cell is None else cell
+            )
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.version = -1
+
+    def rebuild(self, xs: Sequence[float], ys: Sequence[float]) -> None:
+        inv = 1.0 / self.cell
+        floor = math.floor
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            key = (floor(x * inv), floor(y * inv))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [i]
+            else:
+                bucket.append(i)
+        self.cells = cells
+
+    def query(self, x: float, y: float, r: float) -> List[int]:
+        # Индексы шаров из ячеек, задевающих квадрат [x±r, y±r]
+        return self.query_box(x - r, y - r, x + r, y + r)
+
+    def query_box(
+            self, xa: float, ya: float, xb: float, yb: float
+            ) -> List[int]:
+        # Индексы шаров из ячеек, задевающих прямоугольник [xa, xb]×[ya, yb]
+        inv = 1.0 / self.cell
+        floor = math.floor
+        x0, x1 = floor(xa * inv), floor(xb * inv)
+        y0, y1 = floor(ya * inv), floor(yb * inv)
+        out: List[int] = []
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    out.extend(bucket)
+        return out
+
+
+# Сетки по буферам цепочек; перестраиваются, когда меняется версия буфера
+_grids: "weakref.WeakKeyDictionary[ChainBuffer, SpatialHash]" = (
+    weakref.WeakKeyDictionary()
+    )
+
+
+def chain_grid(chain: ChainBuffer) -> SpatialHash:
+    # Сетка для буфера: одна перестройка на кадр, сколько бы ни было снарядов
+    grid = _grids.get(chain)
+    if grid is None:
+        grid = _grids[chain] = SpatialHash()
+    if grid.version != chain.version:
+        grid.rebuild(*chain.positions())
+        grid.version = chain.version
+    return grid
+
+
+# Запас по t на границах окон (ошибки округления)
+_T_EPS = 1e-6
+
+
+def track_windows(
+        px: float, py: float, r: float
+        ) -> Iterator[Tuple[float, float]]:
+    # Окна [ta, tb] по t, в которых центр шара может лежать ближе r
+    # к точке (px, py). Радиус спирали r(t) = R0 - k·t даёт диапазон t,
+    # угол 0.2·t = φ + 2πn ± asin(r/ρ) — не больше одного окна на виток.
+    dx, dy = px - cfg.SPIRAL_CENTER_X, py - cfg.SPIRAL_CENTER_Y
+    rho = math.hypot(dx, dy)
+    if rho <= r:
+        return
+    k = float(cfg.SPIRAL_TIGHTNESS)
+    r0 = float(cfg.SPIRAL_START_RADIUS)
+    t_lo = (r0 - rho - r) / k
+    t_hi = (r0 - rho + r) / k
+
+    phi = math.atan2(dy, dx)
+    half = math.asin(r / rho)
+    two_pi = 2.0 * math.pi
+    n0 = math.ceil((0.2 * t_lo - phi - half) / two_pi)
+    n1 = math.floor((0.2 * t_hi - phi + half) / two_pi)
+    for n in range(n0, n1 + 1):
+        a = phi + two_pi * n
+        ta = max(t_lo, (a - half) / 0.2) - _T_EPS
+        tb = min(t_hi, (a + half) / 0.2) + _T_EPS
+        if ta <= tb:
+            yield ta, tb
+
+
+def _scan(
+        px: float, py: float, r: float, chain: ChainBuffer, indices
+        ) -> Optional[int]:
+    # Первый по порядку шар из indices, центр которого ближе r к точке
+    r2 = r * r
+    for i in indices:
+        bx, by = path_spiral.xy(chain.t_at(i))
+        if (px - bx) ** 2 + (py - by) ** 2 <= r2:
+            return i
+    return None
 
 
 def hit_index(projectile, chain: Sequence) -> Optional[int]:
@@ -15,6 +157,33 @@ def hit_index(projectile, chain: Sequence) -> Optional[int]:
     pr = float(getattr(projectile, "radius", 0.0))
     rr = pr * pr
 
+    if isinstance(chain, ChainBuffer):
+        if not chain:
+            return None
+        r = pr + float(cfg.BALL_RADIUS)
+
+        # Цепочка лежит в кольце вокруг центра спирали (радиус убывает по t).
+        # Пока снаряд вне кольца, координаты шаров даже не пересчитываются.
+        rho = math.hypot(px - cfg.SPIRAL_CENTER_X, py - cfg.SPIRAL_CENTER_Y)
+        outer = path_spiral.radius_for(chain.t_at(0)) + r
+        inner = path_spiral.radius_for(chain.t_at(len(chain) - 1)) - r
+        if rho > outer or rho < inner:
+            return None
+        if rho <= r:
+            # У самого центра окна по углу не определены
+            return _scan(px, py, r, chain, range(len(chain)))
+
+        # Окна идут по возрастанию t, а значит и индекса:
+        # первое пересечение — наименьший индекс
+        for ta, tb in track_windows(px, py, r):
+            hit = _scan(
+                px, py, r, chain,
+                range(chain.bisect_t(ta), chain.bisect_t(tb))
+                )
+            if hit is not None:
+                return hit
+        return None
+
     for i, b in enumerate(chain):
         bx, by = float(b.pos[0]), float(b.pos[1])
         br = float(getattr(b, "radius", 0.0))
@@ -24,6 +193,414 @@ def hit_index(projectile, chain: Sequence) -> Optional[int]:
     return None
 
 
+class Hit(NamedTuple):
+    """Результат swept-проверки: индекс шара, доля пути за кадр до касания
+(0..1) и центр снаряда в момент касания."""
+
+    index: int
+    toi: float
+    point: Tuple[float, float]
+
+
+def _toi(
+        ax: float, ay: float, dx: float, dy: float,
+        cx: float, cy: float, r2: float
+        ) -> Optional[float]:
+    # Наименьшее s ∈ [0, 1], при котором |A + s·D - C|² <= r²
+    fx, fy = ax - cx, ay - cy
+    c = fx * fx + fy * fy - r2
+    if c <= 0.0:
+        return 0.0
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    if a <= 0.0 or b >= 0.0:
+        return None
+    disc = b * b - a * c
+    if disc < 0.0:
+        return None
+    s = (-b - math.sqrt(disc)) / a
+    return s if s <= 1.0 else None
+
+
+def _ring_span(ax: float, ay: float, bx: float, by: float) -> Tuple[float, float]:
+    # Минимальное и максимальное расстояние от центра спирали до отрезка AB
+    cx, cy = cfg.SPIRAL_CENTER_X, cfg.SPIRAL_CENTER_Y
+    dx, dy = bx - ax, by - ay
+    ll = dx * dx + dy * dy
+    s = 0.0
+    if ll > 0.0:
+        s = min(1.0, max(0.0, ((cx - ax) * dx + (cy - ay) * dy) / ll))
+    near = math.hypot(ax + s * dx - cx, ay + s * dy - cy)
+    far = max(math.hypot(ax - cx, ay - cy), math.hypot(bx - cx, by - cy))
+    return near, far
+
+
+def _outside_ring(
+        ax: float, ay: float, bx: float, by: float, r: float,
+        chain: ChainBuffer
+        ) -> bool:
+    # Отрезок AB целиком вне кольца, в котором лежит цепочка
+    near, far = _ring_span(ax, ay, bx, by)
+    outer = path_spiral.radius_for(chain.t_at(0)) + r
+    inner = path_spiral.radius_for(chain.t_at(len(chain) - 1)) - r
+    return near > outer or far < inner
+
+
+def sweep_hit(projectile, chain: Sequence) -> Optional[Hit]:
+    # Самое раннее касание шара цепочки на отрезке prev_pos → pos.
+    # При равном времени касания побеждает меньший индекс.
+    try:
+        bx, by = float(projectile.pos[0]), float(projectile.pos[1])
+    except Exception:
+        return None
+    prev = getattr(projectile, "prev_pos", None)
+    if prev is None:
+        ax, ay = bx, by
+    else:
+        ax, ay = float(prev[0]), float(prev[1])
+    dx, dy = bx - ax, by - ay
+
+    pr = float(getattr(projectile, "radius", 0.0))
+    best: Optional[Tuple[float, int]] = None
+
+    if isinstance(chain, ChainBuffer):
+        if not chain:
+            return None
+        r = pr + float(cfg.BALL_RADIUS)
+
+        # Отрезок целиком вне кольца цепочки — шары не проверяются
+        if _outside_ring(ax, ay, bx, by, r, chain):
+            return None
+
+        grid = chain_grid(chain)
+        xs, ys = chain.positions()
+        r2 = r * r
+        candidates = grid.query_box(
+            min(ax, bx) - r, min(ay, by) - r, max(ax, bx) + r, max(ay, by) + r
+            )
+        for i in candidates:
+            s = _toi(ax, ay, dx, dy, xs[i], ys[i], r2)
+            if s is not None and (best is None or (s, i) < best):
+                best = (s, i)
+    else:
+        for i, b in enumerate(chain):
+            r = pr + float(getattr(b, "radius", 0.0))
+            s = _toi(
+                ax, ay, dx, dy, float(b.pos[0]), float(b.pos[1]), r * r
+                )
+            if s is not None and (best is None or s < best[0]):
+                best = (s, i)
+
+    if best is None:
+        return None
+    s, i = best
+    return Hit(i, s, (ax + s * dx, ay + s * dy))
+
+
+def _segments(projectiles: Sequence):
+    # Начала отрезков, смещения за кадр и радиусы снарядов (массивы NumPy)
+    n = len(projectiles)
+    a = np.empty((n, 2))
+    b = np.empty((n, 2))
+    pr = np.empty(n)
+    for k, p in enumerate(projectiles):
+        b[k] = (float(p.pos[0]), float(p.pos[1]))
+        prev = getattr(p, "prev_pos", None)
+        a[k] = b[k] if prev is None else (float(prev[0]), float(prev[1]))
+        pr[k] = float(getattr(p, "radius", 0.0))
+    return a, b - a, pr
+
+
+def _toi_matrix(a, d, pr, cx, cy):
+    # Те же формулы, что и в _toi, для всех пар «снаряд × шар» сразу.
+    # a, d: (..., P, 2), pr: (..., P), cx, cy: (..., L) → (..., P, L);
+    # NaN (дополнение до общей длины) даёт «нет касания» (inf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fx = a[..., 0:1] - cx[..., None, :]
+        fy = a[..., 1:2] - cy[..., None, :]
+        r = pr[..., None] + float(cfg.BALL_RADIUS)
+        c = fx * fx + fy * fy - r * r
+        dd = (d * d).sum(axis=-1)[..., None]
+        bb = fx * d[..., 0:1] + fy * d[..., 1:2]
+        disc = bb * bb - dd * c
+        s = (-bb - np.sqrt(disc)) / dd
+        ok = (dd > 0.0) & (bb < 0.0) & (disc >= 0.0) & (s <= 1.0)
+        return np.where(c <= 0.0, 0.0, np.where(ok, s, np.inf))
+
+
+def _first_hits(s, a, d, count: int) -> List[Optional[Hit]]:
+    # По матрице (P, L) — первое касание каждого из count снарядов;
+    # argmin берёт первый минимум — при равном времени меньший индекс
+    first = s.argmin(axis=-1)
+    out: List[Optional[Hit]] = []
+    for k in range(count):
+        i = int(first[k])
+        toi = float(s[k, i])
+        if toi == math.inf:
+            out.append(None)
+            continue
+        out.append(Hit(
+            i, toi, (float(a[k, 0] + toi * d[k, 0]),
+                     float(a[k, 1] + toi * d[k, 1]))
+            ))
+    return out
+
+
+def sweep_hits(projectiles: Sequence, chain: Sequence) -> List[Optional[Hit]]:
+    # sweep_hit для каждого снаряда; для буфера с NumPy — один проход
+    # по матрице «снаряды × шары» вместо цикла по снарядам
+    if np is None or not isinstance(chain, ChainBuffer) or not chain:
+        return [sweep_hit(p, chain) for p in projectiles]
+    if not projectiles:
+        return []
+
+    a, d, pr = _segments(projectiles)
+    xs, ys = chain.positions()
+    cx = np.frombuffer(xs, dtype=np.float64)
+    cy = np.frombuffer(ys, dtype=np.float64)
+    s = _toi_matrix(a, d, pr, cx, cy)
+    return _first_hits(s, a, d, len(projectiles))
+
+
+# С какого числа сессий со снарядами sweep_hits_stacked строит общую матрицу
+_STACK_MIN = 8
+
+
+def sweep_hits_stacked(
+        groups: Sequence[Sequence], chains: Sequence
+        ) -> List[List[Optional[Hit]]]:
+    # sweep_hits для нескольких независимых сессий: снаряды groups[g]
+    # проверяются только с цепочкой chains[g]. Проверка кольца идёт
+    # одной векторной операцией по всем снарядам; для оставшихся t всех
+    # цепочек собираются в один массив, координаты шаров считаются одним
+    # вызовом xy_many, касания — одной матрицей «сессии × снаряды × шары».
+    out: List[List[Optional[Hit]]] = [[] for _ in groups]
+    # На паре сессий накладные расходы NumPy больше выигрыша
+    stack = np is not None and sum(1 for p in groups if p) >= _STACK_MIN
+    sessions, rings, owners = [], [], []
+    for g, (projs, chain) in enumerate(zip(groups, chains)):
+        if not projs:
+            continue
+        if not stack:
+            out[g] = [sweep_hit(p, chain) for p in projs]
+            continue
+        if not isinstance(chain, ChainBuffer) or not chain:
+            out[g] = sweep_hits(projs, chain)
+            continue
+        out[g] = [None] * len(projs)
+        rings.append((chain.t_at(0), chain.t_at(len(chain) - 1)))
+        owners.extend([len(sessions)] * len(projs))
+        sessions.append(g)
+    if not sessions:
+        return out
+
+    # Отрезки всех снарядов и кольца их цепочек
+    projs = [p for g in sessions for p in groups[g]]
+    a, d, pr = _segments(projs)
+    owner = np.asarray(owners)
+    ring_t = np.asarray(rings)
+    r = pr + float(cfg.BALL_RADIUS)
+    outer = path_spiral.radius_many(ring_t[:, 0])[owner] + r
+    inner = path_spiral.radius_many(ring_t[:, 1])[owner] - r
+
+    # _ring_span для всех отрезков сразу
+    c = np.array([cfg.SPIRAL_CENTER_X, cfg.SPIRAL_CENTER_Y], dtype=float)
+    ll = (d * d).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.where(ll > 0.0, ((c - a) * d).sum(axis=1) / ll, 0.0)
+    u = np.clip(u, 0.0, 1.0)
+    near = np.hypot(*(a + u[:, None] * d - c).T)
+    far = np.maximum(np.hypot(*(a - c).T), np.hypot(*(a + d - c).T))
+    keep = np.flatnonzero(~((near > outer) | (far < inner)))
+    if not len(keep):
+        return out
+
+    # Строки матрицы — сессии, у которых остались снаряды
+    rows_of = {}
+    rows, slots, members = [], [], []
+    for j in keep.tolist():
+        sess = owners[j]
+        row = rows_of.get(sess)
+        if row is None:
+            row = rows_of[sess] = len(members)
+            members.append([])
+        rows.append(row)
+        slots.append(len(members[row]))
+        members[row].append(j)
+    live = list(rows_of)
+
+    # t всех шаров подряд: относительные t плюс смещения сегментов
+    rels, seg_lens, seg_offs, lens = [], [], [], []
+    for sess in live:
+        rel, segs = chains[sessions[sess]].t_parts()
+        rels.append(np.frombuffer(rel, dtype=np.float64))
+        lens.append(len(rel))
+        for count, off in segs:
+            seg_lens.append(count)
+            seg_offs.append(off)
+    flat_t = np.concatenate(rels) + np.repeat(seg_offs, seg_lens)
+    flat_x, flat_y = path_spiral.xy_many(flat_t)
+
+    # Раскладка по строкам; хвосты коротких строк — NaN
+    n_rows = np.asarray(lens)
+    cols = np.arange(n_rows.max())
+    valid = cols < n_rows[:, None]
+    idx = np.where(valid, (np.cumsum(n_rows) - n_rows)[:, None] + cols, 0)
+    xs = np.where(valid, flat_x[idx], np.nan)
+    ys = np.where(valid, flat_y[idx], np.nan)
+
+    n_slots = max(slots) + 1
+    ma = np.full((len(live), n_slots, 2), np.nan)
+    md = np.zeros((len(live), n_slots, 2))
+    mpr = np.zeros((len(live), n_slots))
+    ma[rows, slots] = a[keep]
+    md[rows, slots] = d[keep]
+    mpr[rows, slots] = pr[keep]
+
+    s = _toi_matrix(ma, md, mpr, xs, ys)
+    base = np.cumsum([0] + [len(groups[g]) for g in sessions])
+    for row, sess in enumerate(live):
+        g = sessions[sess]
+        hits = _first_hits(s[row], ma[row], md[row], len(members[row]))
+        for j, hit in zip(members[row], hits):
+            out[g][j - int(base[sess])] = hit
+    return out
+
+
+class HitscanTable:
+    """Окна t, в которых шар цепочки может задеть луч из центра спирали.
+
+Угол делится на bins секторов; для сектора хранится список
+(ta, tb, s_min) — по одному окну на виток, от внутренних витков
+к внешним; s_min — нижняя граница расстояния до касания по лучу.
+Секторы заполняются лениво, при первом запросе."""
+
+    def __init__(
+            self, geometry: Tuple[float, float, float, float],
+            bins: int, reach: float
+            ):
+        _, _, self.start_r, self.tight = geometry
+        self.bins = int(bins)
+        self.reach = float(reach)
+        # тот же диапазон t, что и у таблицы длины дуги
+        self.span = self.start_r / self.tight
+        self._rows: Dict[int, Tuple[Tuple[float, float, float], ...]] = {}
+
+    def sector(self, angle: float) -> int:
+        return math.floor(angle / (2.0 * math.pi) * self.bins) % self.bins
+
+    def windows(self, angle: float) -> Tuple[Tuple[float, float, float], ...]:
+        b = self.sector(angle)
+        row = self._rows.get(b)
+        if row is None:
+            row = self._rows[b] = self._build(b)
+        return row
+
+    def _radius(self, t: float) -> float:
+        return max(0.0, self.start_r - self.tight * t)
+
+    def _build(self, b: int) -> Tuple[Tuple[float, float, float], ...]:
+        two_pi = 2.0 * math.pi
+        width = two_pi / self.bins
+        a0 = b * width
+        reach = self.reach
+        out = []
+        n0 = math.floor((0.2 * -self.span - a0) / two_pi)
+        n1 = math.ceil((0.2 * self.span - a0) / two_pi)
+        for n in range(n0, n1 + 1):
+            lo = (a0 + two_pi * n) / 0.2
+            hi = (a0 + width + two_pi * n) / 0.2
+            # Полуширина по углу asin(reach/r) растёт к центру; берём её
+            # по наименьшему радиусу окна (неподвижная точка, снизу вверх)
+            half = 0.0
+            for _ in range(50):
+                r_min = self._radius(hi + half / 0.2)
+                if r_min <= reach:
+                    half = math.pi / 2
+                    break
+                nxt = math.asin(reach / r_min)
+                if nxt - half < 1e-12:
+                    break
+                half = nxt
+            else:
+                half = math.pi / 2
+            ta = max(-self.span, lo - half / 0.2)
+            tb = min(self.span, hi + half / 0.2)
+            if ta > tb:
+                continue
+            s_min = max(0.0, self._radius(tb) - reach)
+            out.append((ta - _T_EPS, tb + _T_EPS, s_min))
+        out.sort(key=lambda w: w[2])
+        return tuple(out)
+
+
+@lru_cache(maxsize=8)
+def _hitscan_table_for(
+        geometry: Tuple[float, float, float, float], bins: int, reach: float
+        ) -> HitscanTable:
+    return HitscanTable(geometry, bins, reach)
+
+
+def hitscan_table(radius: float | None = None) -> HitscanTable:
+    # Таблица для текущей геометрии и радиуса снаряда; строится один раз
+    pr = float(cfg.BALL_RADIUS if radius is None else radius)
+    return _hitscan_table_for(
+        path_spiral._geometry(), int(cfg.HITSCAN_ANGLE_BINS),
+        pr + float(cfg.BALL_RADIUS)
+        )
+
+
+def _ray_contact(
+        ux: float, uy: float, bx: float, by: float, r2: float
+        ) -> Optional[float]:
+    # Расстояние по лучу (из начала координат, направление u) до касания
+    along = bx * ux + by * uy
+    if along <= 0.0:
+        return None
+    perp2 = bx * bx + by * by - along * along
+    if perp2 > r2:
+        return None
+    return max(0.0, along - math.sqrt(max(0.0, r2 - perp2)))
+
+
+def hitscan(
+        angle: float, chain: Sequence, radius: float | None = None
+        ) -> Optional[Hit]:
+    # Мгновенный выстрел из центра спирали под углом angle: первый шар
+    # на луче и точка касания (toi = 0 — снаряд не летит)
+    cx, cy = float(cfg.SPIRAL_CENTER_X), float(cfg.SPIRAL_CENTER_Y)
+    ux, uy = math.cos(angle), math.sin(angle)
+    pr = float(cfg.BALL_RADIUS if radius is None else radius)
+    best: Optional[Tuple[float, int]] = None
+
+    if isinstance(chain, ChainBuffer):
+        if not chain:
+            return None
+        table = hitscan_table(pr)
+        r2 = table.reach * table.reach
+        for ta, tb, s_min in table.windows(angle):
+            if best is not None and s_min > best[0]:
+                break
+            for i in range(chain.bisect_t(ta), chain.bisect_t(tb)):
+                x, y = path_spiral.xy(chain.t_at(i))
+                s = _ray_contact(ux, uy, x - cx, y - cy, r2)
+                if s is not None and (best is None or (s, i) < best):
+                    best = (s, i)
+    else:
+        for i, b in enumerate(chain):
+            r = pr + float(getattr(b, "radius", 0.0))
+            s = _ray_contact(
+                ux, uy, float(b.pos[0]) - cx, float(b.pos[1]) - cy, r * r
+                )
+            if s is not None and (best is None or s < best[0]):
+                best = (s, i)
+
+    if best is None:
+        return None
+    s, i = best
+    return Hit(i, 0.0, (cx + s * ux, cy + s * uy))
+
+
 def check_collision(flying_ball, chain):
     # Возвращает индекс первого шара, в который попал flying_ball, либо None
     return hit_index(flying_ball, chain)
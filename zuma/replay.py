@@ -0,0 +1,351 @@
+"""Запись и проверка реплеев.
+
+Реплей — это зерно сессии, начальный уровень и поток команд ввода
+(Input) с номерами шагов симуляции. Игра идёт фиксированным шагом,
+случайность берётся только из генератора сессии, а перезарядка
+считается по игровому времени, поэтому по реплею игра повторяется
+без окна и без ожидания — так быстро, как позволяет процессор.
+
+Для проверки в реплее хранятся итоговые очки и состояние, хэш
+состояния в конце и контрольные хэши каждые interval шагов: по ним
+видно, на каком шаге повтор разошёлся с записью.
+
+Формат (little-endian):
+  заголовок  "ZRPL", версия u8, флаги u8, seed u64, уровень u16, Гц u16
+  команды    число, затем (приращение шага, код u8, аргумент);
+             угол — float32, символ — код, остальные без аргумента
+  хэши       interval, число, по 8 байт на контрольную точку
+  итог       шагов, очки, код состояния u8, хэш 8 байт
+Целые числа без фиксированной длины пишутся как varint.
+
+Проверка пачки файлов: python -m zuma.replay verify *.zrp --workers 8"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from . import config as cfg
+from .game import Game, Input
+
+MAGIC = b"ZRPL"
+# 2 — в хэше состояния таймеры, сегменты, перезарядка и генератор
+VERSION = 2
+
+# Контрольный хэш раз в 5 с игры при 120 Гц
+CHECKPOINT_INTERVAL: int = 600
+
+_FLAG_STARTED = 1   # запись начата в уже запущенном уровне
+_FLAG_HITSCAN = 2
+
+_STATES = ("menu", "playing", "paused", "level_complete", "game_over", "victory")
+
+_HEADER = struct.Struct("<4sBBQHH")
+_F32 = struct.Struct("<f")
+
+# Команда: (шаг, код, аргумент)
+Command = Tuple[int, int, object]
+
+
+class ReplayError(ValueError):
+    """Повреждённый или несовместимый файл реплея"""
+
+
+@dataclass
+class Replay:
+    seed: int
+    level: int
+    hz: int = int(cfg.SIM_HZ)
+    started: bool = False
+    hitscan: bool = False
+    inputs: List[Command] = field(default_factory=list)
+    interval: int = CHECKPOINT_INTERVAL
+    checkpoints: List[bytes] = field(default_factory=list)
+    ticks: int = 0
+    score: int = 0
+    state: str = "menu"
+    digest: bytes = b""
+
+
+def state_hash(game: Game) -> bytes:
+    # 8 байт по всему, что влияет на дальнейшую игру: счёт и жизни,
+    # лягушка с перезарядкой и модификаторами выстрела, цепочка с
+    # сегментами, таймеры бонусов, волны комбо, снаряды и генератор
+    h = hashlib.blake2b(digest_size=8)
+    frog = game.frog
+    h.update(struct.pack(
+        "<qqiiBdddddid", game.ticks, game.score, game.lives,
+        game.level_number,
+        _STATES.index(game.state) if game.state in _STATES else 255,
+        frog.angle, frog._aim, frog._last_shot_time, frog.shot_cooldown,
+        frog.cooldown_multiplier, frog.burst_shoot_count,
+        frog.shoot_speed_multiplier,
+        ))
+    h.update(bytes(frog.current_ball_color) + bytes(frog.next_ball_color))
+    level = game.level
+    if level is not None:
+        chain = level.chain
+        h.update(struct.pack(
+            "<dd", float(level.time_remaining), float(level.spiral_speed)
+            ))
+        h.update(chain.ts.tobytes())
+        h.update(bytes(chain.color_codes))
+        h.update(bytes(chain.kind_codes))
+        for k, (lo, hi, off) in enumerate(chain.segments()):
+            h.update(struct.pack("<IIdB", lo, hi, off, chain.segment_combo(k)))
+        for key, remaining in level.timers.pending():
+            h.update(key.encode("utf-8") + struct.pack("<d", remaining))
+        for removed, depth in level.pending_waves:
+            h.update(struct.pack("<qq", removed, depth))
+    for p in game.flying_balls:
+        h.update(struct.pack(
+            "<dddd", float(p.pos[0]), float(p.pos[1]), float(p.vx), float(p.vy)
+            ))
+    version, state, gauss = game.rng.getstate()
+    h.update(struct.pack(f"<B{len(state)}I", version, *state))
+    h.update(repr(gauss).encode("ascii"))
+    return h.digest()
+
+
+class Recorder:
+    """Пишет команды сессии Game (подключается как game.recorder)"""
+
+    def __init__(self, game: Game, *, interval: int = CHECKPOINT_INTERVAL):
+        if game.seed is None or not 0 <= game.seed < 2 ** 64:
+            raise ValueError("recording needs a Game created with a 64-bit seed")
+        if game.ticks:
+            raise ValueError("recording must start before the first update")
+        self.game = game
+        self.replay = Replay(
+            seed=int(game.seed), level=int(game.level_number),
+            started=game.state == "playing", hitscan=bool(game.hitscan),
+            interval=max(1, int(interval)),
+            )
+        game.recorder = self
+
+    def record(self, tick: int, op: int, arg=None):
+        # Запоминает команду; возвращает аргумент в том виде, в котором
+        # он сохранится (угол — float32), чтобы запись и повтор совпадали
+        inputs = self.replay.inputs
+        if op == Input.AIM:
+            arg = _F32.unpack(_F32.pack(float(arg)))[0]
+            # из нескольких поворотов за шаг важен последний
+            if inputs and inputs[-1][0] == tick and inputs[-1][1] == Input.AIM:
+                inputs.pop()
+        inputs.append((int(tick), int(op), arg))
+        return arg
+
+    def tick(self, game: Game) -> None:
+        # Вызывается Game.tick перед каждым шагом симуляции
+        if game.ticks and game.ticks % self.replay.interval == 0:
+            self.replay.checkpoints.append(state_hash(game))
+
+    def finish(self) -> Replay:
+        game = self.game
+        game.recorder = None
+        rep = self.replay
+        rep.ticks = game.ticks
+        rep.score = int(game.score)
+        rep.state = game.state
+        rep.digest = state_hash(game)
+        return rep
+
+
+# --------------------------- бинарный формат ---------------------------
+def _put_varint(out: bytearray, n: int) -> None:
+    n = int(n)
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated replay")
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode(rep: Replay) -> bytes:
+    flags = (_FLAG_STARTED if rep.started else 0) | (_FLAG_HITSCAN if rep.hitscan else 0)
+    out = bytearray(_HEADER.pack(
+        MAGIC, VERSION, flags, rep.seed, rep.level, rep.hz
+        ))
+    _put_varint(out, len(rep.inputs))
+    prev = 0
+    for tick, op, arg in rep.inputs:
+        _put_varint(out, tick - prev)
+        prev = tick
+        out.append(op)
+        if op == Input.AIM:
+            out += _F32.pack(arg)
+        elif op == Input.CHAR:
+            _put_varint(out, ord(arg))
+    _put_varint(out, rep.interval)
+    _put_varint(out, len(rep.checkpoints))
+    for digest in rep.checkpoints:
+        out += digest
+    _put_varint(out, rep.ticks)
+    _put_varint(out, max(0, rep.score))
+    out.append(_STATES.index(rep.state))
+    out += rep.digest
+    return bytes(out)
+
+
+def decode(data: bytes) -> Replay:
+    if len(data) < _HEADER.size:
+        raise ReplayError("truncated replay")
+    magic, version, flags, seed, level, hz = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayError("not a replay file")
+    if version != VERSION:
+        raise ReplayError(f"unsupported replay version {version}")
+    rep = Replay(
+        seed=seed, level=level, hz=hz, started=bool(flags & _FLAG_STARTED),
+        hitscan=bool(flags & _FLAG_HITSCAN),
+        )
+    pos = _HEADER.size
+    count, pos = _get_varint(data, pos)
+    tick = 0
+    for _ in range(count):
+        delta, pos = _get_varint(data, pos)
+        tick += delta
+        if pos >= len(data):
+            raise ReplayError("truncated replay")
+        op = data[pos]
+        pos += 1
+        arg = None
+        if op == Input.AIM:
+            if pos + 4 > len(data):
+                raise ReplayError("truncated replay")
+            arg = _F32.unpack_from(data, pos)[0]
+            pos += 4
+        elif op == Input.CHAR:
+            code, pos = _get_varint(data, pos)
+            if code > sys.maxunicode:
+                raise ReplayError("bad character in replay")
+            arg = chr(code)
+        rep.inputs.append((tick, op, arg))
+    rep.interval, pos = _get_varint(data, pos)
+    count, pos = _get_varint(data, pos)
+    for _ in range(count):
+        rep.checkpoints.append(bytes(data[pos:pos + 8]))
+        pos += 8
+    rep.ticks, pos = _get_varint(data, pos)
+    rep.score, pos = _get_varint(data, pos)
+    if pos + 9 != len(data):
+        raise ReplayError("truncated replay")
+    rep.state = _STATES[data[pos]] if data[pos] < len(_STATES) else "?"
+    rep.digest = bytes(data[pos + 1:pos + 9])
+    return rep
+
+
+# --------------------------- повтор ---------------------------
+def replay_game(rep: Replay) -> Tuple[Game, Replay]:
+    # Повторяет сессию без окна. Возвращает игру в конечном состоянии
+    # и заново снятую запись (для сравнения с исходной)
+    game = Game(seed=rep.seed, hitscan=rep.hitscan)
+    game.level_number = rep.level
+    if rep.started:
+        game.start_level(rep.level)
+    check = Recorder(game, interval=rep.interval)
+
+    dt = 1.0 / float(rep.hz)
+    inputs = rep.inputs
+    n = len(inputs)
+    k = 0
+    update = game.update
+    for tick in range(rep.ticks):
+        while k < n and inputs[k][0] == tick:
+            game.input(inputs[k][1], inputs[k][2])
+            k += 1
+        update(dt)
+    while k < n:
+        game.input(inputs[k][1], inputs[k][2])
+        k += 1
+    return game, check.finish()
+
+
+def verify(rep: Replay) -> Optional[str]:
+    # None — реплей сходится с записью, иначе описание расхождения
+    _, got = replay_game(rep)
+    for i, (a, b) in enumerate(zip(rep.checkpoints, got.checkpoints)):
+        if a != b:
+            return f"state diverged by tick {(i + 1) * rep.interval}"
+    if len(got.checkpoints) != len(rep.checkpoints):
+        return "checkpoint count differs"
+    if got.score != rep.score:
+        return f"score {got.score} != recorded {rep.score}"
+    if got.state != rep.state:
+        return f"state {got.state!r} != recorded {rep.state!r}"
+    if got.digest != rep.digest:
+        return "final state hash differs"
+    return None
+
+
+def verify_bytes(data: bytes) -> Optional[str]:
+    try:
+        return verify(decode(data))
+    except ReplayError as e:
+        return str(e)
+
+
+def _verify_file(path: str) -> Tuple[str, Optional[str]]:
+    with open(path, "rb") as f:
+        return path, verify_bytes(f.read())
+
+
+def verify_files(
+        paths: Sequence[str], *, workers: int | None = None, chunk: int = 8
+        ) -> List[Tuple[str, Optional[str]]]:
+    # Проверка пачки файлов; workers=1 — без пула процессов
+    if workers == 1:
+        return [_verify_file(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_verify_file, paths, chunksize=max(1, int(chunk))))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m zuma.replay", description="Replay tools"
+        )
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("verify", help="re-simulate replays and check hashes")
+    check.add_argument("paths", nargs="+")
+    check.add_argument("--workers", type=int, default=os.cpu_count(),
+                       help="worker processes (1 = no pool)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    results = verify_files(args.paths, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+    bad = 0
+    for path, problem in results:
+        if problem is not None:
+            bad += 1
+            print(f"FAIL {path}: {problem}")
+    print(f"{len(results) - bad}/{len(results)} replays ok in {elapsed:.1f} s")
+    return 1 if bad else 0
+
+
+__all__ = [
+    "Replay", "ReplayError", "Recorder", "state_hash", "encode", "decode",
+    "replay_game", "verify", "verify_bytes", "verify_files",
+    ]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
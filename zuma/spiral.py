@@ -7,7 +7,14 @@
 from __future__ import annotations
 
 import math
-from typing import Tuple, List
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Tuple, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
 
 from . import config as cfg
 
@@ -29,6 +36,51 @@ def xy(t: float) -> Tuple[float, float]:
         )
 
 
+def tangent(t: float) -> Tuple[float, float]:
+    # Направление движения по спирали в точке t (производная xy по t)
+    k = float(cfg.SPIRAL_TIGHTNESS)
+    r = radius_for(t)
+    a = angle_for(t)
+    c, s = math.cos(a), math.sin(a)
+    return -k * c - 0.2 * r * s, -k * s + 0.2 * r * c
+
+
+def radius_many(ts: Sequence[float]):
+    # Пакетный вариант radius_for
+    if np is not None:
+        t = np.asarray(ts, dtype=float)
+        return np.maximum(0.0, cfg.SPIRAL_START_RADIUS - cfg.SPIRAL_TIGHTNESS * t)
+    return [radius_for(float(t)) for t in ts]
+
+
+def xy_many(ts: Sequence[float]):
+    # Пакетный вариант xy: по массиву t возвращает пару массивов (xs, ys).
+    # С NumPy — один векторный проход, без него — списки.
+    if np is not None:
+        t = np.asarray(ts, dtype=float)
+        r = radius_many(t)
+        a = 0.2 * t
+        return (
+            cfg.SPIRAL_CENTER_X + r * np.cos(a),
+            cfg.SPIRAL_CENTER_Y + r * np.sin(a),
+            )
+
+    cx, cy = cfg.SPIRAL_CENTER_X, cfg.SPIRAL_CENTER_Y
+    r0, k = cfg.SPIRAL_START_RADIUS, cfg.SPIRAL_TIGHTNESS
+    cos, sin = math.cos, math.sin
+    xs: List[float] = []
+    ys: List[float] = []
+    for t in ts:
+        t = float(t)
+        r = r0 - k * t
+        if r < 0.0:
+            r = 0.0
+        a = 0.2 * t
+        xs.append(cx + r * cos(a))
+        ys.append(cy + r * sin(a))
+    return xs, ys
+
+
 def chord_length(t0: float, t1: float) -> float:
     # Вычисляет расстояние по прямой между двумя точками спирали
     x0, y0 = xy(t0)
@@ -36,21 +88,174 @@ def chord_length(t0: float, t1: float) -> float:
     return math.hypot(x1 - x0, y1 - y0)
 
 
-def step_t(
-        start_t: float, target_dist: float, *,
-        forward: bool = True, tol: float = 0.5, cap: int = 200
-        ) -> float:
-    # Подбирает новое t, чтобы расстояние от start_t было близко к target_dist
+# ---------------------------------------------------------------------------
+# Таблица t ↔ длина дуги
+# ---------------------------------------------------------------------------
+
+# Шаг дискретизации таблицы по t (около 2.5 px дуги на внешнем витке)
+ARC_TABLE_DT: float = 0.05
+
+
+class ArcTable:
+    """Предвычисленная длина дуги спирали s(t) на равномерной сетке по t.
+
+Прямой запрос (t → s) — интерполяция по сетке, обратный (s → t) —
+бинарный поиск по монотонному массиву s и интерполяция.
+Вне покрытого диапазона оба запроса возвращают None."""
+
+    __slots__ = ("t_min", "t_max", "dt", "s")
+
+    def __init__(self, t_min: float, t_max: float, dt: float = ARC_TABLE_DT):
+        n = max(2, int(math.ceil((t_max - t_min) / dt)) + 1)
+        self.t_min = float(t_min)
+        self.dt = float(dt)
+        self.t_max = self.t_min + (n - 1) * self.dt
+
+        s = [0.0] * n
+        px, py = xy(self.t_min)
+        acc = 0.0
+        for i in range(1, n):
+            x, y = xy(self.t_min + i * self.dt)
+            acc += math.hypot(x - px, y - py)
+            s[i] = acc
+            px, py = x, y
+        self.s = s
+
+    def arc_at(self, t: float) -> Optional[float]:
+        # Длина дуги от t_min до t
+        u = (float(t) - self.t_min) / self.dt
+        if u < 0.0 or u > len(self.s) - 1:
+            return None
+        i = min(int(u), len(self.s) - 2)
+        f = u - i
+        return self.s[i] + (self.s[i + 1] - self.s[i]) * f
+
+    def t_at(self, arc: float) -> Optional[float]:
+        # Обратный запрос: t, на котором набирается длина дуги arc
+        s = self.s
+        arc = float(arc)
+        if arc < 0.0 or arc > s[-1]:
+            return None
+        i = bisect_left(s, arc)
+        if i == 0:
+            return self.t_min
+        # За концом спирали (r = 0) s не растёт: берём первую точку плато
+        s0, s1 = s[i - 1], s[i]
+        f = 0.0 if s1 <= s0 else (arc - s0) / (s1 - s0)
+        return self.t_min + (i - 1 + f) * self.dt
+
+
+def _geometry() -> Tuple[float, float, float, float]:
+    return (
+        float(cfg.SPIRAL_CENTER_X), float(cfg.SPIRAL_CENTER_Y),
+        float(cfg.SPIRAL_START_RADIUS), float(cfg.SPIRAL_TIGHTNESS),
+        )
+
+
+@lru_cache(maxsize=8)
+def _arc_table_for(geometry: Tuple[float, float, float, float]) -> ArcTable:
+    _, _, start_r, tight = geometry
+    # Покрываем t от «радиуса 2·R0» (запас для prepend/reverse) до r = 0
+    span = start_r / tight
+    return ArcTable(-span, span)
+
+
+def arc_table() -> ArcTable:
+    # Таблица для текущей геометрии из конфига; строится один раз
+    return _arc_table_for(_geometry())
+
+
+# Режимы подбора шага в step_t
+STEP_TABLE = "table"
+STEP_NEWTON = "newton"
+STEP_SEARCH = "search"
+
+
+def _step_t_table(
+        start_t: float, target_dist: float, forward: bool, tol: float
+        ) -> Tuple[Optional[float], int]:
+    table = arc_table()
+    s0 = table.arc_at(start_t)
+    if s0 is None:
+        return None, 0
+
+    sign = 1.0 if forward else -1.0
+    want = float(target_dist)
+    # Хорда короче дуги: подправляем целевую длину дуги на ошибку по хорде
+    for it in range(1, 9):
+        t = table.t_at(s0 + sign * want)
+        if t is None:
+            return None, it
+        err = chord_length(start_t, t) - target_dist
+        if abs(err) <= tol:
+            return t, it
+        want -= err
+    return None, 8
+
+
+def _derivs(t: float) -> Tuple[float, float, float, float, float, float]:
+    # Точка спирали и её первая/вторая производные по t (r = R0 - k·t, a = 0.2·t)
+    k = float(cfg.SPIRAL_TIGHTNESS)
+    r = cfg.SPIRAL_START_RADIUS - k * t
+    a = 0.2 * t
+    c, s = math.cos(a), math.sin(a)
+    x = cfg.SPIRAL_CENTER_X + r * c
+    y = cfg.SPIRAL_CENTER_Y + r * s
+    dx = -k * c - 0.2 * r * s
+    dy = -k * s + 0.2 * r * c
+    ddx = 0.4 * k * s - 0.04 * r * c
+    ddy = -0.4 * k * c - 0.04 * r * s
+    return x, y, dx, dy, ddx, ddy
+
+
+def _step_t_newton(
+        start_t: float, target_dist: float, forward: bool, tol: float,
+        cap: int = 12
+        ) -> Tuple[Optional[float], int]:
+    # Решаем f(t) = |P(t) - P(t0)|² - d² = 0 методом Галлея.
+    # Производные берутся в замкнутом виде, поэтому хватает 2–3 шагов.
+    t_end = cfg.SPIRAL_START_RADIUS / cfg.SPIRAL_TIGHTNESS
+    x0, y0, dx0, dy0, _, _ = _derivs(start_t)
+    speed = math.hypot(dx0, dy0)
+    if speed <= 1e-12 or start_t >= t_end:
+        return None, 0
+
+    sign = 1.0 if forward else -1.0
+    d2 = target_dist * target_dist
+    t = start_t + sign * target_dist / speed
+
+    for it in range(1, cap + 1):
+        if t >= t_end or (t - start_t) * sign <= 0.0:
+            return None, it
+        x, y, dx, dy, ddx, ddy = _derivs(t)
+        ex, ey = x - x0, y - y0
+        dist2 = ex * ex + ey * ey
+        if abs(math.sqrt(dist2) - target_dist) <= tol:
+            return t, it
+
+        f = dist2 - d2
+        f1 = 2.0 * (ex * dx + ey * dy)
+        f2 = 2.0 * (dx * dx + dy * dy + ex * ddx + ey * ddy)
+        den = 2.0 * f1 * f1 - f * f2
+        if abs(f1) <= 1e-12 or abs(den) <= 1e-12:
+            return None, it
+        t -= 2.0 * f * f1 / den
+    return None, cap
+
+
+def _step_t_search(
+        start_t: float, target_dist: float, forward: bool, tol: float, cap: int
+        ) -> Tuple[float, int]:
     sign = 1.0 if forward else -1.0
     probe = start_t
     step = sign * 1.0
 
-    for _ in range(cap):
+    for it in range(1, cap + 1):
         nxt = probe + step
         d = chord_length(start_t, nxt)
         err = d - target_dist
         if abs(err) <= tol:
-            return nxt
+            return nxt, it
 
       # Если недобрали расстояние — продолжаем идти в том же направлении
         if err < 0:
@@ -60,7 +265,69 @@ def step_t(
         # Если пересекли расстояние — сокращаем шаг
         step *= 0.5
 
-    return probe + step
+    return probe + step, cap
+
+
+def solve_step_t(
+        start_t: float, target_dist: float, *,
+        forward: bool = True, tol: float = 0.5, cap: int = 200,
+        method: str = STEP_TABLE
+        ) -> Tuple[float, int]:
+    # То же, что step_t, но возвращает ещё и число итераций.
+    # Если быстрый режим не сошёлся — добираем перебором шага.
+    start_t = float(start_t)
+    target_dist = float(target_dist)
+    used = 0
+    if method == STEP_TABLE:
+        t, used = _step_t_table(start_t, target_dist, forward, tol)
+    elif method == STEP_NEWTON:
+        t, used = _step_t_newton(start_t, target_dist, forward, tol)
+    elif method == STEP_SEARCH:
+        t = None
+    else:
+        raise ValueError(f"unknown step_t method: {method!r}")
+
+    if t is not None:
+        return t, used
+    t, it = _step_t_search(start_t, target_dist, forward, tol, cap)
+    return t, used + it
+
+
+def step_t(
+        start_t: float, target_dist: float, *,
+        forward: bool = True, tol: float = 0.5, cap: int = 200,
+        method: str = STEP_TABLE
+        ) -> float:
+    # Подбирает новое t, чтобы расстояние от start_t было близко к target_dist.
+    # По умолчанию — по таблице длины дуги, вне её диапазона — перебором шага.
+    return solve_step_t(
+        start_t, target_dist, forward=forward, tol=tol, cap=cap, method=method
+        )[0]
+
+
+def iteration_report(
+        levels: dict | None = None, spacing: float | None = None
+        ) -> dict:
+    """Сколько итераций тратит каждый режим step_t на посев цепочек уровней.
+
+Возвращает {номер уровня: {режим: (всего итераций, максимум за вызов)}}."""
+    levels = cfg.LEVELS if levels is None else levels
+    if spacing is None:
+        spacing = cfg.BALL_DIAMETER + cfg.BALL_SPACING
+
+    report: dict = {}
+    for num, conf in levels.items():
+        n = int(conf.get("initial_balls", 30))
+        row = {}
+        for method in (STEP_SEARCH, STEP_TABLE, STEP_NEWTON):
+            t, total, worst = 0.0, 0, 0
+            for _ in range(n - 1):
+                t, it = solve_step_t(t, spacing, method=method)
+                total += it
+                worst = max(worst, it)
+            row[method] = (total, worst)
+        report[num] = row
+    return report
 
 
 def seed_positions(count: int, spacing: float | None = None) -> List[float]:
@@ -0,0 +1,56 @@
+"""Таймеры эффектов на min-куче.
+
+Таймер — это момент окончания по часам кучи и ключ эффекта. Шаг
+времени без истёкших таймеров стоит одно сравнение с вершиной кучи,
+запуск и окончание эффекта — O(log n). Текущие остатки времени
+считаются только по запросу (HUD, тесты, снимки состояния)."""
+from __future__ import annotations
+
+import heapq
+from typing import Iterable, List, Tuple
+
+
+class TimerHeap:
+    """Таймеры, упорядоченные по моменту окончания"""
+
+    __slots__ = ("now", "_heap", "_seq")
+
+    def __init__(self, timers: Iterable[Tuple[str, float]] = ()):
+        self.now: float = 0.0
+        # (момент окончания, порядковый номер, ключ): номер сохраняет
+        # порядок запуска у таймеров с одинаковым окончанием
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        for key, remaining in timers:
+            self.schedule(key, remaining)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, key: str, duration: float) -> None:
+        heapq.heappush(self._heap, (self.now + float(duration), self._seq, key))
+        self._seq += 1
+
+    def advance(self, dt: float) -> List[str]:
+        # Сдвигает часы; возвращает ключи истёкших таймеров по порядку
+        self.now += float(dt)
+        heap = self._heap
+        if not heap or heap[0][0] > self.now:
+            return []
+        expired = []
+        while heap and heap[0][0] <= self.now:
+            expired.append(heapq.heappop(heap)[2])
+        return expired
+
+    def pending(self) -> List[Tuple[str, float]]:
+        # Действующие таймеры в порядке запуска: (ключ, остаток времени)
+        return [
+            (key, end - self.now)
+            for end, _, key in sorted(self._heap, key=lambda e: e[1])
+            ]
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+
+__all__ = ["TimerHeap"]
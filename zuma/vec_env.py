@@ -0,0 +1,145 @@
+"""Синхронный прогон N сессий ZumaEnv (пакет для ботов и обучения).
+
+Это не векторизованный симулятор: состояние сессий не сведено в общие
+массивы, и обновление мира (Level.update с advance_segments и
+таймерами бонусов, лягушка), движение снарядов и правила (вставка,
+каскады, бонусы) выполняет код Game по каждой сессии в цикле.
+
+Общей сделана только проверка столкновений, и только при NumPy и не
+менее physics._STACK_MIN идущих сессиях: t всех цепочек собираются в
+одну матрицу, касания считаются одной матрицей
+«сессии × снаряды × шары» (physics.sweep_hits_stacked). Иначе каждая
+сессия шагает обычным Game.update. Ускорение относительно цикла по
+ZumaEnv не гарантируется — доля столкновений в шаге невелика; его
+стоит мерить бенчмарком на своей машине.
+
+Случайность у каждой сессии своя (Game.rng), поэтому исход каждой
+сессии совпадает с одиночной ZumaEnv с тем же seed.
+
+Бенчмарк: python -m zuma.vec_env"""
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from . import physics
+from .env import Observation, ZumaEnv
+from .physics import sweep_hits_stacked
+
+
+class VecEnv:
+    """N независимых сессий, шагающих синхронно"""
+
+    def __init__(
+            self, n: int, level: int = 1, *, dt: float | None = None,
+            frame_skip: int = 1, hitscan: bool = False
+            ):
+        self.envs: List[ZumaEnv] = [
+            ZumaEnv(level, dt=dt, frame_skip=frame_skip, hitscan=hitscan)
+            for _ in range(int(n))
+            ]
+
+    def __len__(self) -> int:
+        return len(self.envs)
+
+    def reset(self, seeds: Sequence[int] | None = None) -> List[Observation]:
+        return [
+            env.reset(None if seeds is None else seeds[i])
+            for i, env in enumerate(self.envs)
+            ]
+
+    def step(
+            self, actions: Sequence[Sequence]
+            ) -> Tuple[List[Observation], List[float], List[bool], List[Dict]]:
+        envs = self.envs
+        if any(env.game is None for env in envs):
+            raise RuntimeError("call reset() before step()")
+        before = [env.game.score for env in envs]
+        for env, action in zip(envs, actions):
+            env.act(action)
+
+        for _ in range(envs[0].frame_skip if envs else 0):
+            if not self._substep():
+                break
+
+        obs, rewards, dones, infos = [], [], [], []
+        for env, score in zip(envs, before):
+            o, r, d, info = env.finish_step(score)
+            obs.append(o)
+            rewards.append(r)
+            dones.append(d)
+            infos.append(info)
+        return obs, rewards, dones, infos
+
+    def _substep(self) -> bool:
+        # Один шаг симуляции всех идущих сессий; False — все закончились.
+        # Мир и снаряды — по сессиям, столкновения — одним пакетом
+        active = [env for env in self.envs if env.game.state == "playing"]
+        if not active:
+            return False
+        if physics.np is None or len(active) < physics._STACK_MIN:
+            # пакет не соберётся: разбивка на фазы дала бы только накладные
+            for env in active:
+                env.game.update(env.dt)
+                env.time += env.dt
+            return True
+
+        groups = []
+        for env in active:
+            game = env.game
+            game.tick(env.dt)
+            game._update_world(env.dt)
+            groups.append(game._move_projectiles(env.dt))
+
+        hits = sweep_hits_stacked(
+            groups, [env.game.level.chain for env in active]
+            )
+        for env, projectiles, batch in zip(active, groups, hits):
+            game = env.game
+            if game._resolve_projectiles(projectiles, batch):
+                game._finish_update()
+            env.time += env.dt
+        return True
+
+
+def _policy(i: int, k: int) -> Tuple[float, bool, bool]:
+    # Простая детерминированная стратегия для бенчмарка
+    return ((i * 0.37 + k * 0.05) % 6.283, k % 8 == 0, k % 50 == 49)
+
+
+def bench(
+        sizes: Sequence[int] = (1, 64, 1024), steps: int = 100
+        ) -> List[Tuple[int, float, float]]:
+    # Шагов сессий в секунду: цикл по ZumaEnv и VecEnv
+    rows = []
+    for n in sizes:
+        envs = [ZumaEnv(frame_skip=4) for _ in range(n)]
+        for i, env in enumerate(envs):
+            env.reset(i)
+        t0 = time.perf_counter()
+        for k in range(steps):
+            for i, env in enumerate(envs):
+                env.step(_policy(i, k))
+        loop_rate = n * steps / (time.perf_counter() - t0)
+
+        vec = VecEnv(n, frame_skip=4)
+        vec.reset(list(range(n)))
+        t0 = time.perf_counter()
+        for k in range(steps):
+            vec.step([_policy(i, k) for i in range(n)])
+        vec_rate = n * steps / (time.perf_counter() - t0)
+        rows.append((n, loop_rate, vec_rate))
+    return rows
+
+
+def main() -> None:  # pragma: no cover
+    print(f"{'N':>6} {'loop steps/s':>14} {'vec steps/s':>14}")
+    for n, loop_rate, vec_rate in bench():
+        print(f"{n:>6} {loop_rate:>14.0f} {vec_rate:>14.0f}")
+
+
+__all__ = ["VecEnv", "bench"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()